@@ -0,0 +1,158 @@
+"""
+Import cost of the app's first run of each screen, from `python -X importtime`.
+
+Usage:
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --json imports.json
+
+Every screen is rendered in a fresh interpreter that has already imported
+Streamlit, as a running server has, so only what the app itself imports is
+measured:
+    login      the unauthenticated page
+    settings   after the OAuth callback, with the year selection
+    dashboard  after "Generate dashboard"
+
+Reported per screen: import time, modules imported, the slowest top-level
+imports and which `DEFERRED_MODULES` were loaded. Fails when the login or
+settings screen loads one of them, as cold starts of new pods wait on it.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCREENS = ("login", "settings", "dashboard")
+# only needed once a dashboard is shown
+DEFERRED_MODULES = (
+    "pandas",
+    "pyarrow",
+    "altair",
+    "matplotlib",
+    "reportlab",
+    "components.charts",
+    "components.dashboard",
+)
+MARKER = "-- app runs --"
+ATHLETE_ID = 1001
+TOP_IMPORTS = 8
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, nesting level, cumulative us) of the imports after `MARKER`."""
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), level, int(cumulative)))
+    return imports
+
+
+def _child(screen: str):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(
+        str(Path(__file__).resolve().parent.parent / "app.py"), default_timeout=300
+    )
+    runs = []
+
+    def run():
+        started = time.perf_counter()
+        app.run()
+        runs.append(time.perf_counter() - started)
+        if app.exception:
+            raise RuntimeError(app.exception[0].message)
+
+    print(MARKER, file=sys.stderr, flush=True)
+    if screen != "login":
+        app.query_params["code"] = str(ATHLETE_ID)
+    run()
+    if screen == "dashboard":
+        next(b for b in app.button if b.label == "Generate dashboard").click()
+        run()
+
+    loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    print(json.dumps({"run_s": runs, "deferred_loaded": loaded}))
+
+
+def measure(screen: str, strava_url: str) -> dict:
+    """Import report of one screen, rendered in a new interpreter."""
+    env = {
+        **os.environ,
+        "STRAVA_URL": strava_url,
+        "STRAVA_DATA_DIR": tempfile.mkdtemp(prefix="strava_imports_"),
+    }
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", __spec__.name, "--child", screen],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=Path(__file__).resolve().parent.parent,
+        check=True,
+    )
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+    imports = parse_importtime(child.stderr)
+    top_level = sorted(
+        ((name, us) for name, level, us in imports if level == 0),
+        key=lambda item: -item[1],
+    )
+    return {
+        "screen": screen,
+        "import_ms": sum(us for _, us in top_level) / 1000,
+        "modules": len(imports),
+        "first_run_ms": result["run_s"][-1] * 1000,
+        "deferred_loaded": result["deferred_loaded"],
+        "top_imports_ms": {name: us / 1000 for name, us in top_level[:TOP_IMPORTS]},
+    }
+
+
+def print_report(reports: list[dict]):
+    for report in reports:
+        loaded = ", ".join(report["deferred_loaded"]) or "none"
+        print(
+            f"{report['screen']}: {report['import_ms']:.0f} ms importing "
+            f"{report['modules']} modules, run {report['first_run_ms']:.0f} ms, "
+            f"deferred modules loaded: {loaded}"
+        )
+        for name, ms in report["top_imports_ms"].items():
+            print(f"    {ms:>8.0f} ms  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time of the app screens")
+    parser.add_argument("--screens", nargs="+", choices=SCREENS, default=SCREENS)
+    parser.add_argument("--json", default=None, help="also write the report here")
+    parser.add_argument("--port", type=int, default=8096)
+    parser.add_argument("--child", choices=SCREENS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child)
+        return
+
+    from benchmarks.strava_stub import StravaStub, start_in_thread
+
+    strava_url = start_in_thread(StravaStub(), args.port)
+    reports = [measure(screen, strava_url) for screen in args.screens]
+    print_report(reports)
+    if args.json:
+        Path(args.json).write_text(json.dumps(reports, indent=2))
+
+    failed = [
+        report["screen"]
+        for report in reports
+        if report["screen"] != "dashboard" and report["deferred_loaded"]
+    ]
+    if failed:
+        raise SystemExit(f"Deferred modules loaded by: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Concurrent-session load test of the dashboard, run headlessly.
+
+Usage:
+    python -m benchmarks.load_test --sessions 20 --athletes 10
+    python -m benchmarks.load_test --sessions 50 --years 2023 2024 --json out.json
+
+Every simulated session runs `app.py` in Streamlit's AppTest, all in this
+process like the sessions of one server, against a local Strava stand-in
+(`benchmarks.strava_stub`). Each session logs in, generates the dashboard,
+toggles the activity filters and switches years. Sessions are spread over
+`--athletes` athletes, so athletes with several open sessions share the
+server caches as they would in production.
+
+Reported: p50/p95/p99 rerun latency per step, memory growth of the process
+and Strava API calls per session. Data is written to a fresh temporary
+folder unless STRAVA_DATA_DIR is set.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import psutil
+
+from benchmarks.strava_stub import ACTIVITIES_PER_YEAR, StravaStub, start_in_thread
+
+APP_PATH = str(Path(__file__).resolve().parent.parent / "app.py")
+RUN_TIMEOUT_S = 300
+FIRST_ATHLETE_ID = 1001
+MEMORY_SAMPLE_S = 0.2
+PERCENTILES = (50, 95, 99)
+
+
+class Session:
+    """One simulated user, driving the app through a scripted flow."""
+
+    def __init__(self, athlete_id: int, years: list[int]):
+        from streamlit.testing.v1 import AppTest
+
+        self.athlete_id = athlete_id
+        self.years = years
+        self.timings = []  # (step, seconds)
+        self.app = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_S)
+
+    def run(self, step: str):
+        started = time.perf_counter()
+        self.app.run()
+        self.timings.append((step, time.perf_counter() - started))
+        if self.app.exception:
+            raise RuntimeError(f"{step}: {self.app.exception[0].message}")
+
+    def _button(self, label: str):
+        return next(button for button in self.app.button if button.label == label)
+
+    def _multiselect(self, prefix: str):
+        return next(
+            widget for widget in self.app.multiselect if widget.label.startswith(prefix)
+        )
+
+    def flow(self):
+        # OAuth callback: the stub logs the code in as that athlete
+        self.app.query_params["code"] = str(self.athlete_id)
+        self.run("login")
+
+        self.app.selectbox(key="selected_year").set_value(self.years[0])
+        self._button("Generate dashboard").click()
+        self.run("generate")
+
+        categories = self._multiselect("Filter by Sport Category")
+        all_categories = list(categories.value)
+        categories.set_value(all_categories[:1])
+        self.run("filter category")
+
+        sports = self._multiselect(f"Filter by {all_categories[0]} type")
+        sports.set_value(sports.value[:1])
+        self.run("filter sport")
+
+        self._multiselect("Weekdays").set_value(
+            ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+        )
+        self.run("filter weekdays")
+
+        self._multiselect("Filter by Sport Category").set_value(all_categories)
+        self.run("reset filters")
+
+        for year in self.years[1:]:
+            self.app.selectbox(key="selected_year").set_value(year)
+            self.run("switch year")
+
+
+class MemorySampler(threading.Thread):
+    """Peak resident memory of this process while the test runs."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.process = psutil.Process()
+        self.peak = self.process.memory_info().rss
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(MEMORY_SAMPLE_S):
+            self.peak = max(self.peak, self.process.memory_info().rss)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def _run_session(athlete_id: int, years: list[int]) -> dict:
+    session = Session(athlete_id, years)
+    error = None
+    try:
+        session.flow()
+    except Exception as exc:  # report the failure, keep the other sessions
+        error = f"{type(exc).__name__}: {exc}"
+        traceback.print_exc()
+    return {"athlete_id": athlete_id, "timings": session.timings, "error": error}
+
+
+def latency_table(results: list[dict]) -> dict:
+    """Step -> runs and latency percentiles in ms, plus "all" steps."""
+    per_step = {}
+    for result in results:
+        for step, seconds in result["timings"]:
+            per_step.setdefault(step, []).append(seconds * 1000)
+    per_step["all"] = [ms for values in per_step.values() for ms in values]
+
+    return {
+        step: {
+            "runs": len(values),
+            **{
+                f"p{q}": float(value)
+                for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))
+            },
+        }
+        for step, values in per_step.items()
+    }
+
+
+def run_load_test(sessions, athletes, years, concurrency, stub=None) -> dict:
+    """Run `sessions` concurrent sessions, returns the measurements."""
+    from services.cache import get_cache, silence_streamlit_warnings
+
+    process = psutil.Process()
+    athlete_ids = [FIRST_ATHLETE_ID + i % athletes for i in range(sessions)]
+
+    # importing the app's modules is not per-session memory: render the login
+    # screen once, which makes no API calls, and load the dashboard's modules
+    Session(FIRST_ATHLETE_ID - 1, years).run("warm up")
+    importlib.import_module("components.dashboard")
+    silence_streamlit_warnings()  # of AppTest running without a server
+
+    rss_before = process.memory_info().rss
+    sampler = MemorySampler()
+    sampler.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency, thread_name_prefix="session") as pool:
+        results = list(pool.map(_run_session, athlete_ids, [years] * sessions))
+    elapsed = time.perf_counter() - started
+    sampler.stop()
+    rss_after = process.memory_info().rss
+
+    report = {
+        "sessions": sessions,
+        "athletes": athletes,
+        "years": years,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "errors": [r["error"] for r in results if r["error"]],
+        "latency_ms": latency_table(results),
+        "memory_mb": {
+            "before": rss_before / 1024**2,
+            "after": rss_after / 1024**2,
+            "peak": max(sampler.peak, rss_after) / 1024**2,
+            "growth_per_session": (rss_after - rss_before) / 1024**2 / sessions,
+            "cache": get_cache().current_bytes / 1024**2,
+        },
+    }
+    if stub is not None:
+        calls = Counter()
+        for endpoints in stub.calls_per_athlete().values():
+            calls.update(endpoints)
+        report["api_calls_per_session"] = {
+            endpoint: count / sessions for endpoint, count in sorted(calls.items())
+        }
+        report["api_calls_per_session"]["total"] = sum(calls.values()) / sessions
+    return report
+
+
+def print_report(report: dict):
+    print(
+        f"{report['sessions']} sessions of {report['athletes']} athletes, "
+        f"years {', '.join(map(str, report['years']))}, "
+        f"{report['concurrency']} at a time: {report['elapsed_s']:.1f} s"
+    )
+    print(
+        f"\n{'step':<18}{'runs':>6}" + "".join(f"{f'p{q} ms':>10}" for q in PERCENTILES)
+    )
+    for step, row in report["latency_ms"].items():
+        print(
+            f"{step:<18}{row['runs']:>6}"
+            + "".join(f"{row[f'p{q}']:>10.0f}" for q in PERCENTILES)
+        )
+
+    memory = report["memory_mb"]
+    print(
+        f"\nMemory: {memory['before']:.0f} MB -> {memory['after']:.0f} MB "
+        f"(peak {memory['peak']:.0f} MB, {memory['growth_per_session']:.1f} MB "
+        f"per session, shared cache {memory['cache']:.0f} MB)"
+    )
+    if "api_calls_per_session" in report:
+        calls = ", ".join(
+            f"{endpoint} {count:.1f}"
+            for endpoint, count in report["api_calls_per_session"].items()
+        )
+        print(f"API calls per session: {calls}")
+    if report["errors"]:
+        print(
+            f"\n{len(report['errors'])} sessions failed, first: {report['errors'][0]}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--athletes", type=int, default=None, help="default: one each")
+    parser.add_argument(
+        "--years", type=int, nargs="+", default=[datetime.now().year - 1]
+    )
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--activities", type=int, default=ACTIVITIES_PER_YEAR)
+    parser.add_argument("--latency", type=float, default=None, help="stub, seconds")
+    parser.add_argument("--strava-url", default=None, help="use a running stub")
+    parser.add_argument("--port", type=int, default=8095)
+    parser.add_argument("--json", default=None, help="also write the report here")
+    args = parser.parse_args()
+
+    stub = None
+    if args.strava_url is None:
+        stub = StravaStub(args.activities)
+        if args.latency is not None:
+            stub.latency = args.latency
+        args.strava_url = start_in_thread(stub, args.port)
+
+    # read by the app's modules at import, which happens in the first session
+    os.environ["STRAVA_URL"] = args.strava_url
+    os.environ.setdefault("STRAVA_DATA_DIR", tempfile.mkdtemp(prefix="strava_load_"))
+
+    report = run_load_test(
+        args.sessions,
+        min(args.athletes or args.sessions, args.sessions),
+        args.years,
+        args.concurrency or args.sessions,
+        stub,
+    )
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+    if report["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
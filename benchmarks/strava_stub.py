@@ -0,0 +1,301 @@
+"""
+Local stand-in for the Strava API, serving generated athletes.
+
+Usage:
+    python -m benchmarks.strava_stub --port 8095 --activities 1500
+    STRAVA_URL=http://localhost:8095 streamlit run app.py
+
+Covers what the dashboard calls: the OAuth token exchange (any numeric
+`code` logs in as that athlete id) and refresh, the athlete profile and
+stats, and paginated activities. Every athlete has `--activities` activities per year,
+generated deterministically from the athlete id, and requests are counted
+per athlete and endpoint.
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+import tornado.web
+
+STUB_PORT = 8095
+ACTIVITIES_PER_YEAR = 1500
+LATENCY_S = 0.05  # added to every response, roughly Strava's
+TOKEN_TTL_S = 21600
+FIRST_YEAR = 2015
+
+# sport type -> (share of activities, mean distance m, mean speed m/s, climb m/km)
+SPORTS = {
+    "Run": (0.35, 10000, 3.0, 10),
+    "Ride": (0.25, 50000, 7.5, 12),
+    "Walk": (0.12, 5000, 1.4, 5),
+    "Hike": (0.05, 12000, 1.2, 60),
+    "Swim": (0.08, 2000, 0.7, 0),
+    "VirtualRide": (0.08, 30000, 8.5, 8),
+    "WeightTraining": (0.07, 0, 0, 0),
+}
+# stats totals -> sport types counted in them
+STATS_SPORTS = {"run": ("Run",), "ride": ("Ride", "VirtualRide"), "swim": ("Swim",)}
+
+
+def _encode_polyline(points: np.ndarray) -> str:
+    """Google encoded polyline of (lat, lon) points."""
+    chars = []
+    deltas = np.diff(np.round(points * 1e5).astype(np.int64), axis=0, prepend=0)
+    for value in deltas.ravel().tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+
+def generate_activities(athlete_id: int, year: int, count: int) -> list[dict]:
+    """`count` activities of one athlete and year, sorted by start."""
+    rng = np.random.default_rng([athlete_id, year])
+    names = list(SPORTS)
+    shares = np.array([SPORTS[name][0] for name in names])
+    # a few home areas, so routes overlap like real ones
+    homes = rng.uniform([45, 5], [55, 20], size=(3, 2))
+
+    start = datetime(year, 1, 1, tzinfo=timezone.utc).timestamp()
+    starts = np.sort(rng.uniform(start, start + 365 * 86400, count))
+    activities = []
+    for i, started in enumerate(starts):
+        sport = names[rng.choice(len(names), p=shares / shares.sum())]
+        _, mean_distance, speed, climb = SPORTS[sport]
+        distance = float(rng.gamma(4, mean_distance / 4)) if mean_distance else 0.0
+        moving = int(distance / speed) if speed else int(rng.uniform(1800, 5400))
+        polyline = ""
+        if distance and sport not in ("Swim", "VirtualRide"):
+            steps = rng.normal(0, 0.002, size=(60, 2))
+            polyline = _encode_polyline(homes[i % 3] + np.cumsum(steps, axis=0))
+
+        local = datetime.fromtimestamp(started, timezone.utc)
+        activities.append(
+            {
+                "id": athlete_id * 10**7 + (year - FIRST_YEAR) * 10**5 + i,
+                "name": f"{sport} {i}",
+                "distance": distance,
+                "moving_time": moving,
+                "elapsed_time": moving + int(rng.exponential(300)),
+                "total_elevation_gain": float(distance / 1000 * climb),
+                "sport_type": sport,
+                "start_date": local.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "start_date_local": local.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "kudos_count": int(rng.poisson(5)),
+                "comment_count": int(rng.poisson(0.5)),
+                "athlete_count": 1 + int(rng.poisson(0.4)),
+                "average_heartrate": float(rng.normal(140, 12)),
+                "average_watts": (
+                    float(rng.normal(180, 40)) if "Ride" in sport else None
+                ),
+                "map": {"summary_polyline": polyline},
+            }
+        )
+    return activities
+
+
+class StravaStub:
+    """Generated data and request counts, shared by the handlers."""
+
+    def __init__(self, activities_per_year=ACTIVITIES_PER_YEAR, latency=LATENCY_S):
+        self.activities_per_year = activities_per_year
+        self.latency = latency
+        self.calls = Counter()  # (athlete_id, endpoint) -> requests
+        self._years = {}
+        self._lock = threading.Lock()
+
+    def activities(self, athlete_id: int, after: int, before: int) -> list[dict]:
+        first = datetime.fromtimestamp(after, timezone.utc).year
+        last = datetime.fromtimestamp(max(after, before - 1), timezone.utc).year
+        activities = []
+        for year in range(max(first, FIRST_YEAR), last + 1):
+            with self._lock:
+                if (athlete_id, year) not in self._years:
+                    self._years[athlete_id, year] = generate_activities(
+                        athlete_id, year, self.activities_per_year
+                    )
+            activities.extend(self._years[athlete_id, year])
+        return [
+            activity
+            for activity in activities
+            if after < _epoch(activity["start_date"]) < before
+        ]
+
+    def count(self, athlete_id: int, endpoint: str):
+        with self._lock:
+            self.calls[athlete_id, endpoint] += 1
+
+    def calls_per_athlete(self) -> dict[int, Counter]:
+        per_athlete = {}
+        for (athlete_id, endpoint), calls in self.calls.items():
+            per_athlete.setdefault(athlete_id, Counter())[endpoint] = calls
+        return per_athlete
+
+
+def _epoch(value: str) -> float:
+    started = datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ")
+    return started.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _tokens(athlete_id: int) -> dict:
+    now = int(time.time())
+    return {
+        "token_type": "Bearer",
+        "access_token": f"access-{athlete_id}-{now}",
+        "refresh_token": f"refresh-{athlete_id}",
+        "expires_at": now + TOKEN_TTL_S,
+        "expires_in": TOKEN_TTL_S,
+        "athlete": {"id": athlete_id},
+    }
+
+
+class StubHandler(tornado.web.RequestHandler):
+    endpoint = None
+
+    def initialize(self, stub: StravaStub):
+        self.stub = stub
+
+    async def prepare(self):
+        await asyncio.sleep(self.stub.latency)
+
+    def athlete_id(self) -> int:
+        token = self.request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not token.startswith("access-"):
+            raise tornado.web.HTTPError(401)
+        athlete_id = int(token.split("-")[1])
+        self.stub.count(athlete_id, self.endpoint)
+        return athlete_id
+
+
+class TokenHandler(StubHandler):
+    def post(self):
+        if self.get_argument("grant_type") == "authorization_code":
+            athlete_id = int(self.get_argument("code"))
+            self.stub.count(athlete_id, "token")
+        else:
+            athlete_id = int(self.get_argument("refresh_token").split("-")[1])
+            self.stub.count(athlete_id, "refresh")
+        self.write(_tokens(athlete_id))
+
+
+class AthleteHandler(StubHandler):
+    endpoint = "athlete"
+
+    def get(self):
+        athlete_id = self.athlete_id()
+        self.write(
+            {
+                "id": athlete_id,
+                "firstname": "Athlete",
+                "lastname": str(athlete_id),
+                "profile": "https://example.com/profile.png",
+            }
+        )
+
+
+class ActivitiesHandler(StubHandler):
+    endpoint = "activities"
+
+    def get(self):
+        athlete_id = self.athlete_id()
+        page = int(self.get_argument("page", "1"))
+        per_page = int(self.get_argument("per_page", "30"))
+        activities = self.stub.activities(
+            athlete_id,
+            int(self.get_argument("after", "0")),
+            int(self.get_argument("before", str(int(time.time())))),
+        )
+        self.set_header("Content-Type", "application/json")
+        self.write(json.dumps(activities[(page - 1) * per_page : page * per_page]))
+
+
+class StatsHandler(StubHandler):
+    endpoint = "stats"
+
+    def get(self, athlete_id):
+        if int(athlete_id) != self.athlete_id():
+            raise tornado.web.HTTPError(403)
+
+        now = time.time()
+        year_start = datetime(datetime.now().year, 1, 1, tzinfo=timezone.utc)
+        periods = {
+            "ytd": self.stub.activities(int(athlete_id), year_start.timestamp(), now),
+            "all": self.stub.activities(int(athlete_id), 0, now),
+        }
+        stats = {}
+        for period, activities in periods.items():
+            for sport, sport_types in STATS_SPORTS.items():
+                selected = [a for a in activities if a["sport_type"] in sport_types]
+                stats[f"{period}_{sport}_totals"] = {
+                    "count": len(selected),
+                    "distance": sum(a["distance"] for a in selected),
+                    "moving_time": sum(a["moving_time"] for a in selected),
+                    "elapsed_time": sum(a["elapsed_time"] for a in selected),
+                    "elevation_gain": sum(a["total_elevation_gain"] for a in selected),
+                }
+        self.write(stats)
+
+
+class DeauthorizeHandler(StubHandler):
+    endpoint = "deauthorize"
+
+    def post(self):
+        self.athlete_id()
+        self.write({})
+
+
+def make_app(stub: StravaStub) -> tornado.web.Application:
+    args = {"stub": stub}
+    return tornado.web.Application(
+        [
+            (r"/oauth/token", TokenHandler, args),
+            (r"/api/v3/athlete", AthleteHandler, args),
+            (r"/api/v3/athlete/activities", ActivitiesHandler, args),
+            (r"/api/v3/athletes/(\d+)/stats", StatsHandler, args),
+            (r"/api/v3/oauth/deauthorize", DeauthorizeHandler, args),
+        ]
+    )
+
+
+def start_in_thread(stub: StravaStub, port: int = STUB_PORT) -> str:
+    """Serve `stub` on a daemon thread, returns its STRAVA_URL."""
+    ready = threading.Event()
+
+    def run():
+        async def serve():
+            make_app(stub).listen(port, address="127.0.0.1")
+            ready.set()
+            await asyncio.Event().wait()
+
+        asyncio.run(serve())
+
+    threading.Thread(target=run, name="strava-stub", daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Strava API stand-in")
+    parser.add_argument("--port", type=int, default=STUB_PORT)
+    parser.add_argument("--activities", type=int, default=ACTIVITIES_PER_YEAR)
+    parser.add_argument("--latency", type=float, default=LATENCY_S)
+    args = parser.parse_args()
+
+    async def serve():
+        make_app(StravaStub(args.activities, args.latency)).listen(args.port)
+        print(f"STRAVA_URL=http://localhost:{args.port}")
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -154,3 +154,89 @@ def render_grouped_bar_chart(
     )
 
     st.altair_chart(chart, use_container_width=True)
+
+
+def render_line_chart(
+    df: pd.DataFrame,
+    x_col: str,
+    y_col: str,
+    color_col: str,
+    x_title: str = "",
+    y_title: str = "",
+    x_sort: list | None = None,
+    height: int = 250,
+    x_type: str = "O",
+    y_format: str = ",.0f",
+):
+    """
+    Render one line per value of `color_col` using Altair.
+
+    `x_type` is an Altair type code, "T" draws a time series without points.
+    """
+    chart = (
+        alt.Chart(df)
+        .mark_line(point=x_type != "T")
+        .encode(
+            x=alt.X(
+                f"{x_col}:{x_type}",
+                sort=x_sort or "ascending",
+                title=x_title,
+                axis=alt.Axis(labelAngle=0),
+            ),
+            y=alt.Y(f"{y_col}:Q", title=y_title),
+            color=alt.Color(
+                f"{color_col}:N", title="", legend=alt.Legend(orient="top")
+            ),
+            tooltip=[
+                alt.Tooltip(f"{color_col}:N", title=""),
+                alt.Tooltip(f"{x_col}:{x_type}", title=x_title),
+                alt.Tooltip(f"{y_col}:Q", title=y_title, format=y_format),
+            ],
+        )
+        .properties(height=height)
+    )
+
+    st.altair_chart(chart, use_container_width=True)
+
+
+def render_stacked_bar_chart(
+    df: pd.DataFrame,
+    x_col: str,
+    y_col: str,
+    color_col: str,
+    x_title: str = "",
+    y_title: str = "",
+    x_sort: list | None = None,
+    height: int = 250,
+):
+    """
+    Render bars of `y_col` stacked by `color_col` using Altair.
+    """
+    chart = (
+        alt.Chart(df)
+        .mark_bar()
+        .encode(
+            x=alt.X(
+                f"{x_col}:O",
+                sort=x_sort or "ascending",
+                title=x_title,
+                axis=alt.Axis(labelAngle=0),
+            ),
+            y=alt.Y(f"{y_col}:Q", title=y_title),
+            color=alt.Color(
+                f"{color_col}:N",
+                title="",
+                scale=alt.Scale(scheme="redyellowblue", reverse=True),
+                legend=alt.Legend(orient="top"),
+            ),
+            order=alt.Order(f"{color_col}:N"),
+            tooltip=[
+                alt.Tooltip(f"{x_col}:O", title=x_title),
+                alt.Tooltip(f"{color_col}:N", title="Zone"),
+                alt.Tooltip(f"{y_col}:Q", title=y_title),
+            ],
+        )
+        .properties(height=height)
+    )
+
+    st.altair_chart(chart, use_container_width=True)
@@ -27,5 +27,6 @@ about = (
     "You can select the year for which you want to see the summary. "
     "Data is fetched directly from the Strava API after you authorize your account. "
     "You can deauthorize your account at any time by pressing the 'Logout' button. "
-    "No user data is stored in any database."
+    "No user data is stored in any database, downloaded activities are only "
+    "kept in the app's local data folder."
 )
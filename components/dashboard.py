@@ -0,0 +1,94 @@
+import streamlit as st
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime
+
+from components.export import render_export
+from components.tabs import (
+    overview,
+    training_patterns,
+    monthly_stats,
+    weekly_stats,
+    activity_distribution,
+    best_efforts,
+    training_load,
+    routes,
+    pace,
+)
+from services.distance_bins import get_distance_bins
+from services.filters.ui import apply_activity_filters
+from services.sketches import selection_sketches
+from services.strava_api.client import StravaClient
+from services.strava_api.rate_limit import RateLimitExceeded
+
+
+def render_dashboard(year: int):
+    """Filters, export and tabs of the selected year."""
+    client = StravaClient()
+
+    # --- LOAD DATA ---
+    # Strava's year to date totals take one request, made alongside the
+    # download and shown until the downloaded activities replace them
+    preview = st.empty()
+    with st.spinner("Downloading activities..."):
+        cached = client.activities_cached(year)
+        download = client.start_activities(year)
+        if year == datetime.now().year and not cached:
+            stats = client.start_athlete_stats()
+            wait([stats, download], return_when=FIRST_COMPLETED)
+            if not download.done() and stats.result():
+                with preview.container():
+                    overview.render_preview(stats.result(), year)
+        try:
+            activities = download.result()
+        except RateLimitExceeded as error:
+            reset = datetime.fromtimestamp(error.reset_at)
+            today = reset.date() == datetime.now().date()
+            reset = reset.strftime("%H:%M" if today else "%b %d, %H:%M")
+            st.warning(
+                f"Strava's request limit is reached, try again after {reset}. "
+                "Activities downloaded so far are kept."
+            )
+            st.stop()
+        rollups = client.get_rollups()
+        sketches = client.get_sketches()
+    preview.empty()
+
+    # --- FILTERS ---
+    df, selected_sport, aggregates = apply_activity_filters(activities, rollups)
+
+    if df.empty:
+        st.info("No activities for selected filters, try different options")
+        st.stop()
+
+    # --- EXPORT ---
+    render_export(df, year)
+
+    # --- DOMAIN LOGIC ---
+    # stored sketches only describe whole sports, not other filters
+    quantiles = selection_sketches(df, sketches if aggregates is not None else None)
+    distance_bins = get_distance_bins(selected_sport, quantiles["distance_km"])
+
+    # --- TABS ---
+    tabs = st.tabs(
+        [
+            "Overview",
+            "Training patterns",
+            "Monthly Stats",
+            "Weekly Stats",
+            "Activity Distribution",
+            "Best Efforts",
+            "Training Load",
+            "Map",
+            "Pace & Speed",
+        ]
+    )
+
+    overview.render(tabs[0], df, year)
+    training_patterns.render(tabs[1], df, aggregates)
+    monthly_stats.render(tabs[2], df, aggregates)
+    weekly_stats.render(tabs[3], df, aggregates)
+    activity_distribution.render(tabs[4], df, distance_bins, aggregates, quantiles)
+    best_efforts.render(tabs[5], df, year)
+    training_load.render(tabs[6], year)
+    routes.render(tabs[7], df)
+    pace.render(tabs[8], df, activities)
@@ -0,0 +1,33 @@
+import streamlit as st
+
+from services.cache import get_cache
+
+
+def render_cache_usage():
+    """Render memory usage of the shared cache (debug only)."""
+    cache = get_cache()
+    usage = cache.usage()
+
+    with st.expander("Cache usage", expanded=False):
+        used_mb = cache.current_bytes / 1024**2
+        budget_mb = cache.max_bytes / 1024**2
+        st.metric(
+            "Memory",
+            f"{used_mb:.1f} / {budget_mb:.0f} MB",
+            help=f"Policy: {cache.policy.upper()}, evictions: {cache.evictions}",
+        )
+        st.progress(min(cache.current_bytes / cache.max_bytes, 1.0))
+
+        usage["MB"] = (usage["bytes"] / 1024**2).round(2)
+
+        st.caption("Per function")
+        st.dataframe(
+            usage.groupby("function")[["entries", "MB", "hits"]].sum(),
+            use_container_width=True,
+        )
+
+        st.caption("Per athlete")
+        st.dataframe(
+            usage.groupby("athlete_id")[["entries", "MB", "hits"]].sum(),
+            use_container_width=True,
+        )
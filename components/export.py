@@ -0,0 +1,52 @@
+import streamlit as st
+
+from services.reports.export import (
+    EXPORT_FORMATS,
+    EXPORT_MIME_TYPES,
+    get_export_queue,
+)
+
+EXPORT_POLL_S = 0.5
+
+
+def render_export(df, year: int):
+    """
+    Export of the selected activities to PDF or HTML, from the sidebar.
+
+    The report is rendered by the background export queue, the sidebar only
+    polls its progress, so the dashboard stays responsive meanwhile.
+    """
+    with st.sidebar:
+        st.markdown("---")
+        st.header("Export")
+        label = st.segmented_control(
+            "Format", list(EXPORT_FORMATS), default="PDF", key="export_format"
+        )
+        if st.button("Export report", use_container_width=True):
+            st.session_state.export_job = get_export_queue().submit(
+                df,
+                EXPORT_FORMATS[label or "PDF"],
+                f"Strava Summary {year}",
+                st.session_state.athlete_id,
+            )
+        _render_export_status(year)
+
+
+@st.fragment(run_every=EXPORT_POLL_S)
+def _render_export_status(year: int):
+    job = st.session_state.export_job
+    if job is None:
+        return
+
+    if not job.finished.is_set():
+        st.progress(job.progress, text="Rendering report...")
+    elif job.error is not None:
+        st.error(f"Export failed: {job.error}")
+    else:
+        st.download_button(
+            "Download report",
+            job.result,
+            file_name=f"strava_summary_{year}.{job.output_format}",
+            mime=EXPORT_MIME_TYPES[job.output_format],
+            use_container_width=True,
+        )
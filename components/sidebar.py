@@ -1,11 +1,12 @@
+import os
 import streamlit as st
 from datetime import datetime
-from services.strava_api.client import StravaClient
+from services.strava_api.auth import StravaAuth
 from components.constants import about
 
 
 def sidebar():
-    client = StravaClient()
+    client = StravaAuth()
     query_params = st.query_params
 
     # --- OAuth callback ---
@@ -14,8 +15,18 @@ def sidebar():
             client.exchange_code(query_params["code"])
 
         st.query_params.clear()
+        st.query_params["session"] = client.start_session()
         st.rerun()
 
+    # --- Page reload: session state is new, tokens are in the token store ---
+    # the key in the URL is used up, the next reload needs the new one
+    if not st.session_state.access_token and "session" in query_params:
+        key = client.restore_session(query_params["session"])
+        if key:
+            st.query_params["session"] = key
+        else:
+            st.query_params.clear()
+
     with st.sidebar:
         if not st.session_state.access_token:
             st.info(about)
@@ -57,3 +68,10 @@ def sidebar():
 
             if st.button("Generate dashboard", use_container_width=True):
                 st.session_state.dashboard_ready = True
+
+            if os.getenv("STRAVA_DEBUG"):
+                from components.debug import render_cache_usage
+
+                st.markdown("---")
+                st.header("Debug")
+                render_cache_usage()
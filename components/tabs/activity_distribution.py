@@ -1,23 +1,129 @@
 import streamlit as st
 
-from services.charts_data import process_data_histogram
-from components.charts import render_bar_chart
+from services.charts_data import (
+    ELEVATION_BINS,
+    TIME_BINS,
+    process_data_histogram,
+)
+from services.constants import MONTHS_MAP
+from services.metrics_data import format_seconds
+from services.pace import SPEED_METRIC, pace_metric
+from services.zones import (
+    HR_ZONES,
+    POWER_ZONES,
+    process_zones_data,
+    time_in_zones,
+    update_zone_histograms,
+    zone_thresholds,
+)
+from components.charts import render_bar_chart, render_stacked_bar_chart
+from components.metrics import render_metric
 
+ZONE_PERIODS = {"Week": "week", "Month": "month", "Year": "year"}
 
-def render(tab, df, distance_bins):
+PERCENTILE_METRICS = {
+    "elapsed_time": ("Duration", lambda v: format_seconds(v, "hm")),
+    "distance_km": ("Distance", lambda v: f"{v:.1f} km"),
+    "elevation_gain_m": ("Elevation Gain", lambda v: f"{v:.0f} m"),
+}
+
+
+def _pace_or_speed(sport_categories) -> tuple[str, str, object]:
+    """Column, title and formatter of the selection's pace or speed."""
+    metrics = {pace_metric(c) for c in sport_categories.astype(str).unique()}
+    col, label, scale = metrics.pop() if len(metrics) == 1 else SPEED_METRIC
+    title, unit = label.removesuffix(")").split(" (")
+    if col == "average_speed_kmh":
+        return col, title, lambda v: f"{v:.1f} {unit}"
+    unit = unit.removeprefix("min")
+    return (
+        col,
+        title,
+        lambda v: "{}:{:02d} {}".format(*divmod(round(v * scale * 60), 60), unit),
+    )
+
+
+def render_percentiles(quantiles, sport_categories):
+    """
+    Median and 90th percentile of each metric, read from quantile sketches.
+
+    Pace or speed as the pace tab shows the selected sports, speed when they
+    are mixed.
+    """
+    col, title, fmt = _pace_or_speed(sport_categories)
+    metrics = {**PERCENTILE_METRICS, col: (title, fmt)}
+
+    columns = st.columns(len(metrics))
+    for column, (metric, (title, fmt)) in zip(columns, metrics.items()):
+        p50, p90 = quantiles[metric].quantiles([0.5, 0.9])
+        with column:
+            if p50 != p50:  # NaN: no values
+                render_metric(title, "–")
+                continue
+            render_metric(
+                f"{title} (median)",
+                fmt(p50),
+                f"Half of the selected activities are below {fmt(p50)}, "
+                f"90% are below {fmt(p90)}.",
+            )
+
+
+def render_zones(df, stream, zones, reference, title):
+    histograms = update_zone_histograms(
+        st.session_state.athlete_id, df["id"].tolist(), stream
+    )
+    if histograms.empty:
+        st.caption(
+            f"No {title.lower()} data: download activity streams "
+            "in the Best Efforts tab."
+        )
+        return
+
+    period = st.segmented_control(
+        "Period", list(ZONE_PERIODS), default="Month", key=f"zones_period_{stream}"
+    )
+    freq = ZONE_PERIODS[period or "Month"]
+
+    seconds = time_in_zones(histograms, stream, zone_thresholds(zones, reference))
+    zones_df = process_zones_data(df, seconds, freq)
+    x_sort = None
+    if freq == "month":
+        zones_df["period"] = zones_df["period"].map(MONTHS_MAP)
+        x_sort = list(MONTHS_MAP.values())
+
+    render_stacked_bar_chart(
+        zones_df,
+        x_col="period",
+        y_col="hours",
+        color_col="zone",
+        x_title=period,
+        y_title="Time (h)",
+        x_sort=x_sort,
+    )
+    st.caption(f"Based on {len(histograms)} of {len(df)} activities with streams.")
+
+
+def render(tab, df, distance_bins, aggregates=None, quantiles=None):
     """
     Activity distribution:
+    - typical activity (percentiles)
     - time
     - distance
     - elevation gain
+    - time in heart rate and power zones
     """
     with tab:
+        if quantiles is not None:
+            st.subheader("Typical Activity")
+            render_percentiles(quantiles, df["sport_category"])
+
         st.subheader("Time")
 
         time_hist_df = process_data_histogram(
             df,
             col="elapsed_time",
-            bins=(0, 60, 120, 300, 600, float("inf")),
+            bins=TIME_BINS,
+            aggregates=aggregates,
         )
 
         render_bar_chart(
@@ -35,6 +141,7 @@ def render(tab, df, distance_bins):
             df,
             col="distance_km",
             bins=distance_bins,
+            aggregates=aggregates,
         )
 
         render_bar_chart(
@@ -51,7 +158,8 @@ def render(tab, df, distance_bins):
         elevation_hist_df = process_data_histogram(
             df,
             col="elevation_gain_m",
-            bins=(0, 100, 500, 1000, 2000, float("inf")),
+            bins=ELEVATION_BINS,
+            aggregates=aggregates,
         )
 
         render_bar_chart(
@@ -62,3 +170,19 @@ def render(tab, df, distance_bins):
             y_title="Number of Activities",
             height=200,
         )
+
+        st.subheader("Time in Heart Rate Zones")
+        max_hr = st.number_input(
+            "Max heart rate (bpm)",
+            min_value=120,
+            max_value=230,
+            value=190,
+            key="max_hr",
+        )
+        render_zones(df, "heartrate", HR_ZONES, max_hr, "Heart rate")
+
+        st.subheader("Time in Power Zones")
+        ftp = st.number_input(
+            "FTP (W)", min_value=50, max_value=600, value=250, key="ftp"
+        )
+        render_zones(df, "watts", POWER_ZONES, ftp, "Power")
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from services.best_efforts import (
+    BEST_EFFORT_DISTANCES,
+    BEST_EFFORT_DURATIONS,
+    best_effort_curves,
+    update_best_efforts,
+)
+from services.metrics_data import format_seconds
+from services.streams import StreamStore
+from services.strava_api.client import StravaClient
+from services.strava_api.rate_limit import RateLimitExceeded
+from components.charts import render_line_chart
+
+
+def _download_streams(df):
+    progress = st.progress(0.0, text="Downloading activity streams...")
+
+    def on_progress(done, total):
+        progress.progress(done / total, text=f"Downloading streams {done}/{total}")
+
+    try:
+        StravaClient().sync_streams(df["id"].tolist(), on_progress=on_progress)
+    except RateLimitExceeded as error:
+        progress.empty()
+        reset = datetime.fromtimestamp(error.reset_at)
+        today = reset.date() == datetime.now().date()
+        reset = reset.strftime("%H:%M" if today else "%b %d, %H:%M")
+        st.warning(
+            f"Strava's request limit is reached, try again after {reset}. "
+            "Streams downloaded so far are kept."
+        )
+        return
+    st.rerun()
+
+
+def render(tab, df, year: int):
+    """
+    Best efforts:
+    - fastest times over standard distances
+    - power curve over standard durations
+    """
+    with tab:
+        athlete_id = st.session_state.athlete_id
+        missing = int((~df["id"].isin(StreamStore(athlete_id).ids())).sum())
+        if missing:
+            st.info(
+                "Best efforts are computed from activity streams, "
+                f"{missing} selected activities have no streams downloaded yet."
+            )
+            if st.button("Download streams"):
+                _download_streams(df)
+
+        efforts = update_best_efforts(athlete_id, df)
+        if efforts.empty:
+            return
+
+        # records are per sport: a ride must not set the fastest 5 km run
+        categories = sorted(df["sport_category"].astype(str).unique())
+        efforts = efforts[efforts["sport_category"].isin(categories)]
+        this_year = str(year)
+        periods = [this_year, "All time"]
+
+        st.subheader("Fastest Times")
+        times = best_effort_curves(efforts, "distance")
+        times = times[times["period"].isin(periods)]
+        if times.empty:
+            st.caption("No activities with distance streams.")
+        for category in categories:
+            category_times = times[times["sport_category"] == category]
+            if category_times.empty:
+                continue
+            table = category_times.pivot(
+                index="effort", columns="period", values="value"
+            )
+            table = table.reindex(
+                index=[e for e in BEST_EFFORT_DISTANCES if e in table.index],
+                columns=[p for p in periods if p in table.columns],
+            )
+            st.markdown(f"**{category}**")
+            st.dataframe(
+                table.map(lambda s: format_seconds(s, "hms") if pd.notna(s) else "–"),
+                use_container_width=True,
+            )
+
+        st.subheader("Power Curve")
+        power = best_effort_curves(efforts, "duration")
+        power = power[power["period"].isin(periods)]
+        if power.empty:
+            st.caption("No activities with power streams.")
+        for category in categories:
+            category_power = power[power["sport_category"] == category]
+            if category_power.empty:
+                continue
+            st.markdown(f"**{category}**")
+            render_line_chart(
+                category_power.astype({"effort": str}),
+                x_col="effort",
+                y_col="value",
+                color_col="period",
+                x_title="Duration",
+                y_title="Average Power (W)",
+                x_sort=list(BEST_EFFORT_DURATIONS),
+            )
@@ -7,7 +7,7 @@ from components.charts import (
 )
 
 
-def render(tab, df):
+def render(tab, df, aggregates=None):
     """
     Monthly statistics:
     - time (moving vs elapsed)
@@ -22,6 +22,7 @@ def render(tab, df):
             freq="month",
             col=["moving_time_h", "elapsed_time_h"],
             agg="sum",
+            aggregates=aggregates,
         )
 
         render_grouped_bar_chart(
@@ -45,6 +46,7 @@ def render(tab, df):
             col="distance_km",
             agg="sum",
             result_name="total_distance_km",
+            aggregates=aggregates,
         )
 
         render_bar_chart(
@@ -63,6 +65,7 @@ def render(tab, df):
             col="elevation_gain_m",
             agg="sum",
             result_name="total_elevation_gain_m",
+            aggregates=aggregates,
         )
 
         render_bar_chart(
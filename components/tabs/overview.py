@@ -1,5 +1,5 @@
 import streamlit as st
-from services.metrics_data import process_metrics_data
+from services.metrics_data import process_athlete_stats, process_metrics_data
 from components.metrics import render_metric
 
 
@@ -78,3 +78,23 @@ def render(tab, df, year: int):
             render_metric("Total Activity Companions", metrics_data["total_athletes"])
             render_metric("Total Comments", metrics_data["total_comments"])
         tab.markdown("---")
+
+
+def render_preview(stats: dict, year: int):
+    """Headline totals from Strava's athlete stats, while activities download."""
+    metrics_data = process_athlete_stats(stats, period="ytd")
+
+    st.subheader(f"Summary for {year}")
+    st.caption(
+        "Runs, rides and swims so far this year, as counted by Strava. "
+        "Totals of all activities follow once they are downloaded."
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        render_metric("Total Activities", metrics_data["total_activities"])
+    with col2:
+        render_metric("Total Time", metrics_data["total_time_hms"])
+    with col3:
+        render_metric("Total Distance (km)", metrics_data["total_distance_km"])
+    with col4:
+        render_metric("Total Elevation gain", metrics_data["total_elevation_gain_m"])
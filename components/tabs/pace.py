@@ -0,0 +1,73 @@
+import streamlit as st
+
+from services.pace import PACE_WINDOWS, build_sport_trends, pace_metric
+from components.charts import render_line_chart
+from components.metrics import render_metric
+
+
+def _format(value: float, is_pace: bool) -> str:
+    if is_pace:
+        minutes, seconds = divmod(round(value * 60), 60)
+        return f"{minutes}:{seconds:02d}"
+    return f"{value:.1f}"
+
+
+def render(tab, df, activities):
+    """
+    Pace and speed per sport:
+    - median and best pace (or speed) of the selection
+    - rolling median and percentile trends of the year
+
+    Trends are computed on all `activities` of a sport and cached, filters
+    only choose which sports are shown.
+    """
+    with tab:
+        with_distance = df[df["average_speed_kmh"].notna()]
+        if with_distance.empty:
+            st.info("No selected activities with distance.")
+            return
+
+        sports = with_distance["sport_type"].astype(str)
+        col1, col2 = st.columns(2)
+        with col1:
+            sport = st.selectbox(
+                "Sport", list(sports.value_counts().index), key="pace_sport"
+            )
+        with col2:
+            window = st.segmented_control(
+                "Rolling window",
+                list(PACE_WINDOWS),
+                default="28 days",
+                key="pace_window",
+            )
+
+        selected = with_distance[sports == sport]
+        col, label, scale = pace_metric(str(selected["sport_category"].iloc[0]))
+        is_pace = col == "pace_min_per_km"
+        values = selected[col] * scale
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            render_metric("Activities", len(selected))
+        with col2:
+            render_metric(f"Median {label}", _format(values.median(), is_pace))
+        with col3:
+            best = values.min() if is_pace else values.max()
+            render_metric(f"Best {label}", _format(best, is_pace))
+
+        trends = build_sport_trends(
+            activities, sport, PACE_WINDOWS[window or "28 days"]
+        )
+        lines = trends.drop(columns="value").melt(
+            id_vars="start_datetime_local", var_name="line", value_name="value"
+        )
+        render_line_chart(
+            lines.dropna(),
+            x_col="start_datetime_local",
+            y_col="value",
+            color_col="line",
+            y_title=label,
+            height=350,
+            x_type="T",
+            y_format=".2f",
+        )
@@ -0,0 +1,104 @@
+import pydeck as pdk
+import streamlit as st
+
+from services.heatmap import heatmap_grid, update_activity_cells
+from services.routes import process_routes_data, update_route_index
+from components.charts import render_line_chart
+
+HEATMAP_DETAIL = {"Low": 13, "Medium": 15, "High": 17}  # tile zoom levels
+
+
+def render_heatmap(df):
+    cells = update_activity_cells(st.session_state.athlete_id, df)
+    cells = [c for c in cells.values() if len(c)]
+    if not cells:
+        st.info("No selected activities with a recorded route.")
+        return
+
+    detail = st.segmented_control(
+        "Detail", list(HEATMAP_DETAIL), default="Medium", key="heatmap_detail"
+    )
+    grid = heatmap_grid(cells, HEATMAP_DETAIL[detail or "Medium"])
+    center = grid.loc[grid["count"].idxmax()]
+
+    st.pydeck_chart(
+        pdk.Deck(
+            layers=[
+                pdk.Layer(
+                    "HeatmapLayer",
+                    data=grid,
+                    get_position=["lng", "lat"],
+                    get_weight="count",
+                    radius_pixels=20,
+                )
+            ],
+            initial_view_state=pdk.ViewState(
+                latitude=center["lat"], longitude=center["lng"], zoom=10
+            ),
+            tooltip=False,
+        ),
+        height=500,
+    )
+    st.caption(f"{len(cells)} activities with a recorded route.")
+
+
+def render_routes(df):
+    index = update_route_index(st.session_state.athlete_id, df)
+    summary, activities = process_routes_data(df, index)
+    if summary.empty:
+        st.caption("No route was repeated at least 3 times.")
+        return
+
+    st.dataframe(
+        summary[["name", "count", "moving_time_min", "speed_kmh", "last"]],
+        column_config={
+            "name": "Route",
+            "count": "Activities",
+            "moving_time_min": st.column_config.NumberColumn(
+                "Median time (min)", format="%.0f"
+            ),
+            "speed_kmh": st.column_config.NumberColumn(
+                "Median speed (km/h)", format="%.1f"
+            ),
+            "last": "Last",
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+
+    route = st.selectbox("Route", summary["name"], key="route")
+    trend = activities[activities["name"] == route]
+    col1, col2 = st.columns(2)
+    with col1:
+        render_line_chart(
+            trend,
+            x_col="start_datetime_local",
+            y_col="moving_time_min",
+            color_col="name",
+            y_title="Moving time (min)",
+            x_type="T",
+        )
+    with col2:
+        render_line_chart(
+            trend,
+            x_col="start_datetime_local",
+            y_col="speed_kmh",
+            color_col="name",
+            y_title="Speed (km/h)",
+            x_type="T",
+            y_format=".1f",
+        )
+
+
+def render(tab, df):
+    """
+    Map:
+    - heatmap of where the selected activities were recorded
+    - repeated routes with time and speed trends
+    """
+    with tab:
+        st.subheader("Where I Train")
+        render_heatmap(df)
+
+        st.subheader("Repeated Routes")
+        render_routes(df)
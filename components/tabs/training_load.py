@@ -0,0 +1,87 @@
+import pandas as pd
+import streamlit as st
+
+from services.activity_store import ActivityStore
+from services.training_load import get_training_load
+from components.charts import render_line_chart
+from components.metrics import render_metric
+
+CURVES = {"fitness": "Fitness", "fatigue": "Fatigue", "form": "Form"}
+
+
+def render(tab, year: int):
+    """
+    Training load over the athlete's whole history:
+    - fitness (42-day), fatigue (7-day) and form curves
+    - acute:chronic workload ratio
+    """
+    with tab:
+        athlete_id = st.session_state.athlete_id
+        version = ActivityStore(athlete_id).rollups_version
+        load = get_training_load(
+            athlete_id,
+            version,
+            ftp=st.session_state.get("ftp", 250),
+            max_hr=st.session_state.get("max_hr", 190),
+        )
+        if load.empty:
+            st.info("No activities to compute training load from.")
+            return
+
+        this_year = load[load.index.year == year]
+        if this_year.empty:
+            st.info(f"No training load for {year}.")
+            return
+
+        st.caption(
+            "Computed from all stored activities, regardless of filters. "
+            "Activity load uses power and FTP when available, then heart rate "
+            "and max heart rate (set in Activity Distribution), then moving time."
+        )
+
+        latest = this_year.iloc[-1]
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            render_metric("Fitness", f"{latest['fitness']:.0f}", "42-day average load")
+        with col2:
+            render_metric("Fatigue", f"{latest['fatigue']:.0f}", "7-day average load")
+        with col3:
+            render_metric("Form", f"{latest['form']:+.0f}", "Fitness minus fatigue")
+        with col4:
+            acwr = latest["acwr"]
+            render_metric(
+                "Workload Ratio",
+                "–" if pd.isna(acwr) else f"{acwr:.2f}",
+                "Fatigue divided by fitness, 0.8-1.3 is a common target range",
+            )
+
+        st.subheader("Fitness, Fatigue and Form")
+        curves = (
+            this_year[list(CURVES)]
+            .rename(columns=CURVES)
+            .rename_axis("date")
+            .reset_index()
+            .melt(id_vars="date", var_name="curve", value_name="value")
+        )
+        render_line_chart(
+            curves,
+            x_col="date",
+            y_col="value",
+            color_col="curve",
+            y_title="Load",
+            height=350,
+            x_type="T",
+        )
+
+        st.subheader("Acute:Chronic Workload Ratio")
+        ratio = this_year["acwr"].rename_axis("date").reset_index()
+        ratio["curve"] = "Workload ratio"
+        render_line_chart(
+            ratio.dropna(),
+            x_col="date",
+            y_col="acwr",
+            color_col="curve",
+            y_title="Ratio",
+            x_type="T",
+            y_format=".2f",
+        )
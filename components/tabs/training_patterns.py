@@ -12,7 +12,7 @@ from components.charts import (
 )
 
 
-def render(tab, df):
+def render(tab, df, aggregates=None):
     """
     Training patterns view:
     - weekday vs month heatmap
@@ -27,11 +27,13 @@ def render(tab, df):
         with col_left:
             st.subheader("Training patterns: days vs months")
 
-            heatmap_df = process_heatmap_day_month(df)
+            heatmap_df = process_heatmap_day_month(df, aggregates)
             render_weekday_month_heatmap(heatmap_df)
 
             st.subheader("Number of activities per month")
-            monthly_df = process_time_data(df, freq="month", agg="count")
+            monthly_df = process_time_data(
+                df, freq="month", agg="count", aggregates=aggregates
+            )
             render_bar_chart(
                 monthly_df,
                 x_col="month_str",
@@ -44,7 +46,9 @@ def render(tab, df):
         with col_right:
             st.subheader("Activities per weekday")
 
-            weekday_df = process_time_data(df, freq="day_name", agg="count")
+            weekday_df = process_time_data(
+                df, freq="day_name", agg="count", aggregates=aggregates
+            )
             render_bar_chart(
                 weekday_df,
                 x_col="day_name",
@@ -56,7 +60,9 @@ def render(tab, df):
             )
 
             st.subheader("Weekend vs Weekday Activities")
-            weekend_df = process_time_data(df, freq="weekend", agg="count")
+            weekend_df = process_time_data(
+                df, freq="weekend", agg="count", aggregates=aggregates
+            )
             render_pie_chart(
                 weekend_df,
                 category_col="is_weekend",
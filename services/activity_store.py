@@ -0,0 +1,211 @@
+import pandas as pd
+
+from services.dedup import deduplicate
+from services.rollups import ActivityRollups
+from services.sketches import SKETCH_METRICS, build_sketches
+from services.storage import athlete_dir, file_lock, load_pickle, save_pickle
+
+CATEGORICAL_COLUMNS = ["sport_type", "sport_category"]
+
+
+class ActivityStore:
+    """
+    Processed activities and their rollups, persisted per athlete.
+
+    Activities are kept in one file per year, keyed by Strava activity id.
+    Every change goes through `upsert`, `delete` or `replace`, which update
+    the rollup tables with the delta of the changed rows only, and rebuild the
+    quantile sketches of the changed months. Changes hold the athlete's file
+    lock, as the dashboard, webhook receiver and importer write concurrently.
+    """
+
+    def __init__(self, athlete_id: int):
+        self.athlete_id = athlete_id
+        self.path = athlete_dir(athlete_id)
+
+    def _activities_path(self, year: int):
+        return self.path / f"activities_{year}.pkl"
+
+    @property
+    def _rollups_path(self):
+        return self.path / "rollups.pkl"
+
+    @property
+    def _sketches_path(self):
+        return self.path / "sketches.pkl"
+
+    @property
+    def lock(self):
+        """Held around every read-modify-write of the athlete's files."""
+        return file_lock(self.path / "store.lock")
+
+    def _reconciled_path(self, year: int):
+        return self.path / f"reconciled_{year}"
+
+    def reconciled_at(self, year: int) -> float:
+        """When the year was last replaced by a full download, 0 if never."""
+        path = self._reconciled_path(year)
+        return path.stat().st_mtime if path.exists() else 0
+
+    def years(self) -> list[int]:
+        return sorted(
+            int(path.stem.split("_")[1]) for path in self.path.glob("activities_*.pkl")
+        )
+
+    def load(self, year: int) -> pd.DataFrame | None:
+        return load_pickle(self._activities_path(year))
+
+    def ids(self) -> set[int]:
+        """Ids of the activities stored in any year."""
+        ids = set()
+        for year in self.years():
+            stored = self.load(year)
+            if stored is not None:
+                ids.update(stored["id"].tolist())
+        return ids
+
+    def rollups(self) -> ActivityRollups:
+        # version first: a write in between is picked up by the next version
+        version = self.rollups_version
+        return ActivityRollups(load_pickle(self._rollups_path), version)
+
+    def sketches(self) -> dict:
+        """Quantile sketches per (sport_type, year, month), see `build_sketches`."""
+        sketches = load_pickle(self._sketches_path)
+        # stores written before sketches, or before some of their metrics
+        if sketches is None or any(
+            set(SKETCH_METRICS) - set(metrics) for metrics in sketches.values()
+        ):
+            with self.lock:
+                sketches = {}
+                for year in self.years():
+                    sketches.update(build_sketches(deduplicate(self.load(year))))
+                save_pickle(sketches, self._sketches_path)
+        return sketches
+
+    @property
+    def rollups_version(self) -> int:
+        """Changes whenever rollups are written (0 if there are none)."""
+        if not self._rollups_path.exists():
+            return 0
+        return self._rollups_path.stat().st_mtime_ns
+
+    @property
+    def sketches_version(self) -> int:
+        """Changes whenever sketches are written (0 if there are none)."""
+        if not self._sketches_path.exists():
+            return 0
+        return self._sketches_path.stat().st_mtime_ns
+
+    def year_version(self, year: int) -> int:
+        """Changes whenever the year's activities are written (0 if never)."""
+        path = self._activities_path(year)
+        return path.stat().st_mtime_ns if path.exists() else 0
+
+    @property
+    def _pushed_path(self):
+        return self.path / "pushed"
+
+    @property
+    def pushed_version(self) -> int:
+        """Changes whenever pushed (webhook) changes are applied, 0 if never."""
+        if not self._pushed_path.exists():
+            return 0
+        return self._pushed_path.stat().st_mtime_ns
+
+    def mark_pushed(self):
+        """Record that changes were applied outside the dashboard."""
+        self._pushed_path.touch()
+
+    def upsert(self, year: int, df: pd.DataFrame) -> pd.DataFrame:
+        """Insert new and replace edited activities, returns the year's frame."""
+        with self.lock:
+            stored = self.load(year)
+            if df.empty:
+                return stored if stored is not None else df
+
+            if stored is None or stored.empty:
+                replaced = None
+                activities = df
+            else:
+                is_replaced = stored["id"].isin(df["id"])
+                replaced = stored[is_replaced]
+                activities = pd.concat([stored[~is_replaced], df], ignore_index=True)
+
+            self._save(year, activities, added=df, removed=replaced)
+            return self.load(year)
+
+    def insert_new(self, year: int, df: pd.DataFrame) -> pd.DataFrame:
+        """Insert activities not stored in the year yet, stored ones are kept."""
+        with self.lock:
+            stored = self.load(year)
+            if stored is not None:
+                df = df[~df["id"].isin(stored["id"])]
+            return self.upsert(year, df)
+
+    def delete(self, year: int, ids) -> pd.DataFrame | None:
+        """Remove activities by id, returns the year's frame."""
+        with self.lock:
+            stored = self.load(year)
+            if stored is None or stored.empty:
+                return stored
+
+            is_deleted = stored["id"].isin(ids)
+            if is_deleted.any():
+                self._save(year, stored[~is_deleted], removed=stored[is_deleted])
+            return self.load(year)
+
+    def replace(self, year: int, df: pd.DataFrame) -> pd.DataFrame | None:
+        """
+        Make the year equal to a full download of it, returns the year's frame.
+
+        Catches what tail syncs miss without webhooks: activities edited or
+        deleted on Strava after they were stored. Only rows that differ are
+        applied, Strava's summaries have no update time to compare instead.
+        """
+        with self.lock:
+            stored = self.load(year)
+            if stored is not None and not stored.empty:
+                ids = df["id"] if not df.empty else []
+                stored = self.delete(year, stored.loc[~stored["id"].isin(ids), "id"])
+                if not df.empty and not stored.empty:
+                    columns = sorted(set(df.columns) & set(stored.columns))
+                    unchanged = _row_hashes(df, columns).isin(
+                        _row_hashes(stored, columns)
+                    )
+                    df = df[~unchanged.to_numpy()]
+            frame = self.upsert(year, df)
+            self._reconciled_path(year).touch()
+            return frame
+
+    def _save(self, year, activities, added=None, removed=None):
+        activities = activities.astype({col: "category" for col in CATEGORICAL_COLUMNS})
+        activities = activities.sort_values("start_datetime_local", ignore_index=True)
+        save_pickle(activities, self._activities_path(year))
+
+        # sketches cannot subtract values: rebuild the months that changed.
+        # Written before the rollups, so whoever sees the new rollups_version
+        # also reads the new sketches.
+        changed = pd.concat(
+            [rows["month"] for rows in (added, removed) if rows is not None]
+        ).unique()
+        sketches = {
+            key: value
+            for key, value in self.sketches().items()
+            if not (key[1] == year and key[2] in changed)
+        }
+        month_rows = activities[activities["month"].isin(changed)]
+        sketches.update(build_sketches(deduplicate(month_rows)))
+        save_pickle(sketches, self._sketches_path)
+
+        rollups = self.rollups()
+        rollups.apply(added=added, removed=removed)
+        save_pickle(rollups.tables, self._rollups_path)
+
+
+def _row_hashes(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    """Hash of every row's values, equal for equal rows however typed."""
+    values = df[columns].astype(
+        {col: str for col in columns if isinstance(df[col].dtype, pd.CategoricalDtype)}
+    )
+    return pd.util.hash_pandas_object(values, index=False)
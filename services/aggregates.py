@@ -0,0 +1,139 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+from services.cache import memory_cache
+from services.frame_store import dataset_id
+
+# additive columns: their totals for any sport selection are sums of slices
+SUM_COLUMNS = [
+    "distance_km",
+    "elevation_gain_m",
+    "moving_time",
+    "elapsed_time",
+    "moving_time_h",
+    "elapsed_time_h",
+]
+
+GROUP_COLUMNS = {
+    "month": "month",
+    "week": "week",
+    "day_name": "day_name",
+    "weekend": "is_weekend",
+    "daypart": "daypart",
+}
+
+# time buckets read from the athlete's stored rollups when available
+ROLLUP_PERIODS = {"month": "monthly", "week": "weekly"}
+
+
+class SportAggregates:
+    """
+    Chart aggregates stored per sport type.
+
+    Time buckets, heatmap and histogram counts are grouped once per dataset
+    with `sport_type` as the first key. Charts for any sport selection are then
+    built by summing the selected slices, so their cost depends on the number
+    of sports and buckets, not on the number of activities.
+
+    Monthly and weekly totals are taken from the athlete's `rollups` if given.
+    """
+
+    def __init__(self, df: pd.DataFrame, rollups=None):
+        self._df = df
+        self.dataset_id = dataset_id(df)
+        self._sport_codes = df["sport_type"].cat.codes.to_numpy()
+        self._sport_types = df["sport_type"].cat.categories
+        self._sport_category = (
+            df[["sport_type", "sport_category"]]
+            .dropna(subset=["sport_type"])
+            .drop_duplicates("sport_type")
+            .set_index("sport_type")["sport_category"]
+            .astype(str)
+        )
+
+        self._tables = {}
+        for freq, col in GROUP_COLUMNS.items():
+            if rollups is not None and freq in ROLLUP_PERIODS:
+                year = int(df["year"].iloc[0])
+                self._tables[freq] = rollups.totals(ROLLUP_PERIODS[freq], year)
+                continue
+
+            grouped = df.groupby(["sport_type", col], observed=True)
+            table = grouped[SUM_COLUMNS].sum()
+            table["count"] = grouped.size()
+            self._tables[freq] = table
+
+        self._heatmap = df.groupby(
+            ["sport_type", "month", "day_name"], observed=True
+        ).size()
+
+        self.sports = list(self._sport_types)
+
+    def __sizeof__(self) -> int:
+        # the frame is kept alive by the aggregates, even once its own cache
+        # entry is evicted; histograms are cached as entries of their own
+        tables = sum(
+            int(table.memory_usage(deep=True).sum()) for table in self._tables.values()
+        )
+        frame = int(self._df.memory_usage(index=True, deep=True).sum())
+        return frame + tables + int(self._heatmap.memory_usage(deep=True))
+
+    def select(self, categories=None, sports=None) -> "SportAggregates":
+        """View of the aggregates restricted to sport categories and/or types."""
+        selected = self._sport_category.index
+        if categories is not None:
+            selected = selected[self._sport_category.isin(categories).to_numpy()]
+        if sports is not None:
+            selected = selected[selected.isin(sports)]
+
+        view = copy.copy(self)
+        view.sports = list(selected)
+        return view
+
+    def totals(self, freq: str) -> pd.DataFrame:
+        """Summed SUM_COLUMNS and activity count per bucket of `freq`."""
+        table = self._tables[freq]
+        selected = table[table.index.get_level_values("sport_type").isin(self.sports)]
+        return selected.groupby(level=GROUP_COLUMNS[freq]).sum()
+
+    def heatmap(self) -> pd.Series:
+        """Activity count per (month, day_name)."""
+        selected = self._heatmap[
+            self._heatmap.index.get_level_values("sport_type").isin(self.sports)
+        ]
+        return selected.groupby(level=["month", "day_name"]).sum()
+
+    def histogram(self, col: str, scale: float, bins: pd.IntervalIndex) -> np.ndarray:
+        """Activity count per bin of `col * scale`."""
+        counts = get_sport_histograms(self.dataset_id, col, scale, tuple(bins), self)
+        rows = self._sport_types.get_indexer(self.sports)
+        return counts[rows].sum(axis=0)
+
+    def _sport_histograms(self, col, scale, bins) -> np.ndarray:
+        n_sports, n_bins = len(self._sport_types), len(bins)
+
+        bin_codes = pd.cut(self._df[col] * scale, bins=bins).cat.codes.to_numpy()
+        valid = (bin_codes >= 0) & (self._sport_codes >= 0)
+
+        flat = self._sport_codes[valid].astype(np.int64) * n_bins + bin_codes[valid]
+        return np.bincount(flat, minlength=n_sports * n_bins).reshape(n_sports, n_bins)
+
+
+@memory_cache("sport_histograms")
+def get_sport_histograms(key: str, col, scale, bins: tuple, _aggregates):
+    """Per-sport counts of one histogram, measured as their own cache entry."""
+    return _aggregates._sport_histograms(col, scale, pd.IntervalIndex(list(bins)))
+
+
+@memory_cache("sport_aggregates")
+def get_sport_aggregates(key: str, _df: pd.DataFrame, _rollups=None):
+    return SportAggregates(_df, _rollups)
+
+
+def build_sport_aggregates(df: pd.DataFrame, rollups=None) -> SportAggregates:
+    """Per-sport aggregates of a dataset, built once and cached."""
+    # with and without rollups, the monthly and weekly tables differ
+    source = "frame" if rollups is None else f"rollups {rollups.version}"
+    return get_sport_aggregates(f"{dataset_id(df)}:{source}", df, rollups)
@@ -0,0 +1,319 @@
+"""
+JSON API serving the dashboard's aggregates from the local data folder.
+
+Usage:
+    STRAVA_API_TOKEN=... python -m services.api.server [--port 8091]
+        [--address 127.0.0.1]
+
+Endpoints, all GET:
+    /athletes/<id>/years
+    /athletes/<id>/years/<year>/metrics
+    /athletes/<id>/years/<year>/time?freq=month&agg=sum&col=distance_km
+    /athletes/<id>/years/<year>/histogram?col=distance_km[&bins=0&bins=10...]
+    /athletes/<id>/years/<year>/heatmap
+
+Year endpoints take the dashboard's filters: category, sport, weekday (0 is
+Monday) and daypart (repeatable), date_from, date_to (YYYY-MM-DD),
+distance_min and distance_max (km). Only stored activities are served, no
+Strava calls are made. Responses carry an ETag derived from the store's
+version and the query, so conditional requests are answered with 304
+without computing anything.
+
+Every request must send `Authorization: Bearer <STRAVA_API_TOKEN>`, the
+server refuses to start without the token. It listens on the loopback
+interface unless `--address` says otherwise.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+import tornado.web
+
+from services.activity_store import ActivityStore
+from services.aggregates import GROUP_COLUMNS, SUM_COLUMNS, build_sport_aggregates
+from services.cache import frame_fingerprint, memory_cache, silence_streamlit_warnings
+from services.charts_data import (
+    ELEVATION_BINS,
+    HISTOGRAM_METRICS,
+    TIME_BINS,
+    process_data_histogram,
+    process_heatmap_day_month,
+    process_time_data,
+)
+from services.dedup import deduplicate
+from services.distance_bins import get_distance_bins
+from services.filters.logic import build_filter_index
+from services.metrics_data import process_metrics_data
+from services.reports.year_review import serializable
+from services.sketches import selection_sketches
+from services.storage import athlete_exists
+from services.strava_api.client import load_rollups, load_sketches
+
+API_PORT = int(os.getenv("STRAVA_API_PORT", "8091"))
+API_ADDRESS = os.getenv("STRAVA_API_ADDRESS", "127.0.0.1")
+API_WORKERS = 4  # threads computing cache misses, the event loop only routes
+
+FILTER_ARGS = [
+    "category",
+    "sport",
+    "date_from",
+    "date_to",
+    "weekday",
+    "daypart",
+    "distance_min",
+    "distance_max",
+]
+ENDPOINT_ARGS = {
+    "metrics": [],
+    "time": ["freq", "agg", "col"],
+    "histogram": ["col", "bins"],
+    "heatmap": [],
+}
+
+
+def _one(args: dict, name: str, default=None):
+    values = args.get(name)
+    return values[-1] if values else default
+
+
+def parse_filters(args: dict, year: int) -> dict:
+    """`FilterIndex.mask` arguments from query arguments."""
+    filters = {}
+    if "category" in args:
+        filters["categories"] = list(args["category"])
+    if "sport" in args:
+        filters["sports"] = list(args["sport"])
+    if "date_from" in args or "date_to" in args:
+        filters["date_range"] = (
+            date.fromisoformat(_one(args, "date_from", f"{year}-01-01")),
+            date.fromisoformat(_one(args, "date_to", f"{year}-12-31")),
+        )
+    if "weekday" in args:
+        filters["weekdays"] = [int(day) for day in args["weekday"]]
+    if "daypart" in args:
+        filters["dayparts"] = list(args["daypart"])
+    if "distance_min" in args or "distance_max" in args:
+        filters["distance_range"] = (
+            float(_one(args, "distance_min", 0)),
+            float(_one(args, "distance_max", "inf")),
+        )
+    return filters
+
+
+@memory_cache("api_activities", athlete_arg="athlete_id")
+def _year_activities(athlete_id: int, year: int, version: int):
+    df = ActivityStore(athlete_id).load(year)
+    if df is None or df.empty:
+        return None
+    df = deduplicate(df)
+    df.attrs["dataset_id"] = frame_fingerprint(df)
+    return df
+
+
+def _metrics(df, aggregates, args, athlete_id):
+    return process_metrics_data(df.copy())
+
+
+def _time(df, aggregates, args, athlete_id):
+    freq = _one(args, "freq", "month")
+    agg = _one(args, "agg", "count")
+    cols = list(args.get("col", []))
+    if freq not in GROUP_COLUMNS:
+        raise ValueError(f"freq must be one of {list(GROUP_COLUMNS)}")
+    if agg not in ("count", "sum"):
+        raise ValueError("agg must be count or sum")
+    if agg == "sum" and (not cols or not set(cols) <= set(SUM_COLUMNS)):
+        raise ValueError(f"col must be one or more of {SUM_COLUMNS}")
+
+    col = cols if len(cols) > 1 else next(iter(cols), None)
+    return process_time_data(df, freq=freq, col=col, agg=agg, aggregates=aggregates)
+
+
+def _histogram(df, aggregates, args, athlete_id):
+    col = _one(args, "col", "distance_km")
+    if col not in HISTOGRAM_METRICS:
+        raise ValueError(f"col must be one of {list(HISTOGRAM_METRICS)}")
+
+    if "bins" in args:
+        bins = tuple(sorted(float(edge) for edge in args["bins"]))
+        if len(set(bins)) < 2:
+            raise ValueError("bins must have at least two distinct edges")
+    elif col == "elapsed_time":
+        bins = TIME_BINS
+    elif col == "elevation_gain_m":
+        bins = ELEVATION_BINS
+    else:
+        # as the dashboard: quintiles of the selection, merged from the
+        # stored sketches when only sports are filtered
+        sketches = load_sketches(athlete_id) if aggregates is not None else None
+        quantiles = selection_sketches(df, sketches)
+        bins = get_distance_bins(
+            sorted(args.get("category", [])), quantiles["distance_km"]
+        )
+    return process_data_histogram(df, col, bins, aggregates=aggregates)
+
+
+def _heatmap(df, aggregates, args, athlete_id):
+    return process_heatmap_day_month(df, aggregates)
+
+
+ENDPOINTS = {
+    "metrics": _metrics,
+    "time": _time,
+    "histogram": _histogram,
+    "heatmap": _heatmap,
+}
+
+
+@memory_cache("api_responses", athlete_arg="athlete_id")
+def aggregate_response(
+    athlete_id: int, year: int, version: int, endpoint: str, params: tuple
+) -> str | None:
+    """
+    JSON body of an endpoint, None if the year has no activities.
+
+    Goes through the dashboard's cached pipeline: the filter index, per-sport
+    aggregates (with the stored rollups) and sketches of the year.
+    """
+    df = _year_activities(athlete_id, year, version)
+    if df is None:
+        return None
+
+    args = dict(params)
+    filters = parse_filters(args, year)
+    aggregates = None
+    if set(filters) <= {"categories", "sports"}:
+        aggregates = build_sport_aggregates(df, load_rollups(athlete_id)).select(
+            **filters
+        )
+    selected = df.iloc[build_filter_index(df).positions(**filters)]
+
+    if selected.empty:
+        data = {} if endpoint == "metrics" else []
+    else:
+        data = ENDPOINTS[endpoint](selected, aggregates, args, athlete_id)
+        if isinstance(data, pd.DataFrame):
+            data = serializable(data).to_dict(orient="records")
+    return json.dumps(data, default=str)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, executor: ThreadPoolExecutor):
+        self.executor = executor
+
+    def prepare(self):
+        # stored activities are personal data: every client shares the token
+        sent = self.request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(sent.encode(), self.settings["api_token"].encode()):
+            raise tornado.web.HTTPError(401, reason="Invalid API token")
+
+    def set_default_headers(self):
+        self.set_header("Content-Type", "application/json")
+        # clients may keep responses but must revalidate them (ETag)
+        self.set_header("Cache-Control", "private, no-cache")
+
+    def write_error(self, status_code, **kwargs):
+        self.finish({"error": self._reason})
+
+    def not_modified(self, *key) -> bool:
+        """Set the ETag of `key`, True if the client's copy is current."""
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        self.set_header("Etag", f'"{etag}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            return True
+        return False
+
+    def store(self, athlete_id: str) -> ActivityStore:
+        if not athlete_exists(int(athlete_id)):
+            raise tornado.web.HTTPError(404, reason="Unknown athlete")
+        return ActivityStore(int(athlete_id))
+
+
+class YearsHandler(BaseHandler):
+    def get(self, athlete_id):
+        store = self.store(athlete_id)
+        if self.not_modified(store.athlete_id, store.rollups_version):
+            return
+        self.write(json.dumps(store.years()))
+
+
+class AggregateHandler(BaseHandler):
+    def initialize(self, executor: ThreadPoolExecutor, endpoint: str):
+        super().initialize(executor)
+        self.endpoint = endpoint
+
+    async def get(self, athlete_id, year):
+        store = self.store(athlete_id)
+        year = int(year)
+        names = FILTER_ARGS + ENDPOINT_ARGS[self.endpoint]
+        params = tuple(
+            (name, tuple(self.get_query_arguments(name)))
+            for name in names
+            if self.get_query_arguments(name)
+        )
+        key = (store.athlete_id, year, store.rollups_version, self.endpoint, params)
+        if self.not_modified(*key):
+            return
+
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self.executor, aggregate_response, *key
+            )
+        except ValueError as error:
+            raise tornado.web.HTTPError(400, reason=str(error))
+        if body is None:
+            raise tornado.web.HTTPError(404, reason=f"No activities in {year}")
+        self.write(body)
+
+
+def make_app(api_token: str, workers: int = API_WORKERS) -> tornado.web.Application:
+    if not api_token:
+        raise ValueError("An API token is required")
+    executor = ThreadPoolExecutor(workers, thread_name_prefix="api")
+    year_path = r"/athletes/(\d+)/years/(\d{4})"
+    return tornado.web.Application(
+        [
+            (r"/athletes/(\d+)/years", YearsHandler, {"executor": executor}),
+            *(
+                (
+                    f"{year_path}/{endpoint}",
+                    AggregateHandler,
+                    {"executor": executor, "endpoint": endpoint},
+                )
+                for endpoint in ENDPOINTS
+            ),
+        ],
+        api_token=api_token,
+    )
+
+
+async def serve(port: int, workers: int, address: str = API_ADDRESS):
+    api_token = os.getenv("STRAVA_API_TOKEN")
+    if not api_token:
+        raise RuntimeError("STRAVA_API_TOKEN is not set")
+    make_app(api_token, workers).listen(port, address=address)
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve dashboard aggregates")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--address", default=API_ADDRESS, help="interface to listen on")
+    parser.add_argument("--workers", type=int, default=API_WORKERS)
+    args = parser.parse_args()
+
+    silence_streamlit_warnings()
+    print(f"Serving on http://{args.address}:{args.port}")
+    asyncio.run(serve(args.port, args.workers, args.address))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+
+from services.storage import athlete_dir, load_pickle, save_pickle
+from services.streams import StreamStore
+
+BEST_EFFORT_DISTANCES = {
+    "400 m": 400,
+    "1 km": 1000,
+    "1 mile": 1609.34,
+    "5 km": 5000,
+    "10 km": 10000,
+    "Half Marathon": 21097.5,
+    "Marathon": 42195,
+    "100 km": 100000,
+}
+
+BEST_EFFORT_DURATIONS = {
+    "5 s": 5,
+    "30 s": 30,
+    "1 min": 60,
+    "5 min": 300,
+    "20 min": 1200,
+    "1 h": 3600,
+}
+
+# longer gaps between samples are pauses (auto-pause, stopped recording)
+PAUSE_GAP_S = 10
+
+
+def fastest_times(distance, time, targets) -> np.ndarray:
+    """
+    Fastest time (s) to cover each target distance (m) within one activity.
+
+    For every sample taken as the end of a window, the latest possible start
+    is found with one vectorized binary search over the cumulative distance,
+    which replaces the quadratic scan over all (start, end) pairs.
+    NaN where the activity is shorter than the target.
+    """
+    distance = np.maximum.accumulate(np.nan_to_num(np.asarray(distance, float)))
+    time = np.asarray(time, dtype=float)
+
+    result = np.full(len(targets), np.nan)
+    for i, target in enumerate(targets):
+        if len(distance) == 0 or distance[-1] - distance[0] < target:
+            continue
+        starts = np.searchsorted(distance, distance - target, side="right") - 1
+        valid = starts >= 0
+        result[i] = np.min(time[valid] - time[starts[valid]])
+    return result
+
+
+def best_averages(values, time, durations) -> np.ndarray:
+    """
+    Best average of a stream (e.g. watts) over each duration (s).
+
+    The stream is resampled to 1 s, after which every window average is a
+    difference of two cumulative sums. Windows spanning a pause (a gap of
+    more than `PAUSE_GAP_S` between samples) are skipped rather than filled
+    in. NaN where no pause-free stretch lasts the duration.
+    """
+    values = np.asarray(values, dtype=float)
+    time = np.asarray(time, dtype=float)
+
+    result = np.full(len(durations), np.nan)
+    if len(time) < 2:
+        return result
+
+    grid = np.arange(time[0], time[-1] + 1)
+    resampled = np.interp(grid, time, np.nan_to_num(values))
+    cumulative = np.concatenate([[0.0], np.cumsum(resampled)])
+
+    # 1 s points strictly inside a pause, and how many precede each window
+    after = np.clip(np.searchsorted(time, grid, side="right"), 1, len(time) - 1)
+    gap = time[after] - time[after - 1] > PAUSE_GAP_S
+    paused = gap & (grid > time[after - 1]) & (grid < time[after])
+    pauses = np.concatenate([[0], np.cumsum(paused)])
+
+    for i, duration in enumerate(durations):
+        if duration <= len(resampled):
+            windows = cumulative[duration:] - cumulative[:-duration]
+            windows[pauses[duration:] - pauses[:-duration] > 0] = np.nan
+            if not np.isnan(windows).all():
+                result[i] = np.nanmax(windows) / duration
+    return result
+
+
+def compute_best_efforts(streams: dict) -> dict:
+    """Best efforts of one activity, keyed by column name."""
+    efforts = {}
+    time = streams.get("time")
+    if time is None or len(time) < 2:
+        return efforts
+
+    if "distance" in streams:
+        times = fastest_times(
+            streams["distance"], time, list(BEST_EFFORT_DISTANCES.values())
+        )
+        efforts.update(zip(BEST_EFFORT_DISTANCES, times))
+
+    if "watts" in streams:
+        watts = best_averages(
+            streams["watts"], time, list(BEST_EFFORT_DURATIONS.values())
+        )
+        efforts.update(zip(BEST_EFFORT_DURATIONS, watts))
+
+    return efforts
+
+
+def update_best_efforts(athlete_id: int, activities: pd.DataFrame) -> pd.DataFrame:
+    """
+    Best efforts of every activity with stored streams.
+
+    Results are cached per activity in the athlete's folder, only activities
+    not computed yet are read from the stream store.
+
+    Args:
+        athlete_id (int): athlete whose streams are used.
+        activities (pd.DataFrame): processed activities to compute.
+
+    Returns:
+        pd.DataFrame: one row per activity (all years) with its year, sport
+        category and best effort per distance (s) and duration (W).
+    """
+    path = athlete_dir(athlete_id) / "best_efforts.pkl"
+    efforts = load_pickle(path)
+    known = set() if efforts is None else set(efforts.index)
+
+    store = StreamStore(athlete_id)
+    todo = activities[
+        ~activities["id"].isin(known) & activities["id"].isin(store.ids())
+    ]
+    if todo.empty:
+        return efforts if efforts is not None else pd.DataFrame()
+
+    rows = {
+        activity_id: compute_best_efforts(
+            store.read(activity_id, ["time", "distance", "watts"])
+        )
+        for activity_id in todo["id"]
+    }
+    # activities without streams have no efforts but must keep their row
+    new = pd.DataFrame.from_dict(rows, orient="index", dtype=float).reindex(
+        index=todo["id"].to_numpy(),
+        columns=[*BEST_EFFORT_DISTANCES, *BEST_EFFORT_DURATIONS],
+    )
+    new["year"] = todo["year"].to_numpy()
+    new["sport_category"] = todo["sport_category"].astype(str).to_numpy()
+    new["start_date"] = todo["start_date"].to_numpy()
+
+    efforts = new if efforts is None else pd.concat([efforts, new])
+    efforts.index.name = "id"
+    save_pickle(efforts, path)
+    return efforts
+
+
+def best_effort_curves(efforts: pd.DataFrame, kind: str) -> pd.DataFrame:
+    """
+    Merge per-activity efforts into per-year and all-time curves per sport.
+
+    A ride never sets a running record: curves are kept per sport category.
+
+    Args:
+        efforts (pd.DataFrame): result of `update_best_efforts`.
+        kind (str): "distance" (fastest time) or "duration" (best power).
+
+    Returns:
+        pd.DataFrame: columns sport_category, period, effort, value, id,
+        start_date.
+    """
+    labels = BEST_EFFORT_DISTANCES if kind == "distance" else BEST_EFFORT_DURATIONS
+    columns = ["sport_category", "period", "effort", "value", "id", "start_date"]
+    if efforts.empty:
+        return pd.DataFrame(columns=columns)
+
+    long = efforts.reset_index().melt(
+        id_vars=["id", "year", "sport_category", "start_date"],
+        value_vars=list(labels),
+        var_name="effort",
+    )
+    long = long.dropna(subset=["value"])
+    long = long.sort_values("value", ascending=(kind == "distance"))
+
+    per_year = long.drop_duplicates(["sport_category", "year", "effort"]).assign(
+        period=lambda x: x["year"].astype(str)
+    )
+    all_time = long.drop_duplicates(["sport_category", "effort"]).assign(
+        period="All time"
+    )
+
+    curves = pd.concat([per_year, all_time], ignore_index=True)
+    curves["effort"] = pd.Categorical(curves["effort"], categories=list(labels))
+    return curves.sort_values(
+        ["sport_category", "period", "effort"], ignore_index=True
+    )[columns]
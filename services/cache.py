@@ -0,0 +1,257 @@
+import hashlib
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Literal
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CACHE_MAX_BYTES = int(float(os.getenv("STRAVA_CACHE_MAX_MB", "512")) * 1024**2)
+CACHE_POLICY = os.getenv("STRAVA_CACHE_POLICY", "lru")
+
+_MISSING = object()
+
+
+def sizeof(value) -> int:
+    """Estimate memory used by a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """Stable content hash of a dataframe, used as a cache key."""
+    digest = hashlib.sha1(repr((df.shape, tuple(df.columns))).encode())
+    if not df.empty:
+        digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _hash_arg(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return frame_fingerprint(value.to_frame() if value.ndim == 1 else value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_hash_arg(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hash_arg(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_hash_arg(v) for v in value))
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class _Entry:
+    __slots__ = ("value", "size", "function", "athlete_id", "hits", "expires_at")
+
+    def __init__(self, value, size, function, athlete_id, expires_at):
+        self.value = value
+        self.size = size
+        self.function = function
+        self.athlete_id = athlete_id
+        self.hits = 0
+        self.expires_at = expires_at
+
+
+class MemoryBudgetCache:
+    """
+    In-process cache bounded by a global byte budget.
+
+    Every entry is measured when stored and attributed to the function that
+    produced it and to an athlete. When the budget is exceeded, entries are
+    evicted least recently used first ("lru") or least frequently used first
+    ("lfu").
+    """
+
+    def __init__(self, max_bytes: int, policy: Literal["lru", "lfu"] = "lru"):
+        if policy not in {"lru", "lfu"}:
+            raise ValueError("policy must be 'lru' or 'lfu'")
+
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.current_bytes = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+
+            if entry.expires_at is not None and entry.expires_at <= time.time():
+                self._remove(key)
+                return _MISSING
+
+            entry.hits += 1
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key, value, function: str, athlete_id=None, ttl=None):
+        size = sizeof(value)
+        if size > self.max_bytes:
+            # never let one oversized value flush the whole cache
+            return
+
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = _Entry(value, size, function, athlete_id, expires_at)
+            self.current_bytes += size
+            self._evict()
+
+    def invalidate(self, function: str | None = None, athlete_id=None):
+        """Drop entries matching function and/or athlete (all if both None)."""
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if function is not None and entry.function != function:
+                    continue
+                if athlete_id is not None and entry.athlete_id != athlete_id:
+                    continue
+                self._remove(key)
+
+    def usage(self) -> pd.DataFrame:
+        """Memory usage per (function, athlete)."""
+        with self._lock:
+            rows = [
+                {
+                    "function": entry.function,
+                    "athlete_id": (
+                        "shared" if entry.athlete_id is None else entry.athlete_id
+                    ),
+                    "bytes": entry.size,
+                    "hits": entry.hits,
+                }
+                for entry in self._entries.values()
+            ]
+
+        if not rows:
+            return pd.DataFrame(
+                columns=["function", "athlete_id", "entries", "bytes", "hits"]
+            )
+
+        usage = pd.DataFrame(rows).astype({"athlete_id": str})
+        return (
+            usage.groupby(["function", "athlete_id"])
+            .agg(
+                entries=("bytes", "size"), bytes=("bytes", "sum"), hits=("hits", "sum")
+            )
+            .reset_index()
+            .sort_values("bytes", ascending=False, ignore_index=True)
+        )
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry.size
+
+    def _evict(self):
+        while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+            if self.policy == "lru":
+                victim = next(iter(self._entries))
+            else:
+                # ties broken by recency: OrderedDict keeps oldest first
+                victim = min(self._entries, key=lambda k: self._entries[k].hits)
+            self._remove(victim)
+            self.evictions += 1
+
+
+@st.cache_resource(show_spinner=False)
+def get_cache() -> MemoryBudgetCache:
+    return MemoryBudgetCache(CACHE_MAX_BYTES, CACHE_POLICY)
+
+
+def silence_streamlit_warnings():
+    """Mute Streamlit's warnings about running without a script run (CLIs)."""
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def _current_athlete_id():
+    try:
+        return st.session_state.get("athlete_id")
+    except Exception:
+        # no script run context (background thread, CLI)
+        return None
+
+
+def memory_cache(name: str | None = None, ttl: int | None = None, athlete_arg=None):
+    """
+    Cache a function in the shared byte-bounded cache.
+
+    Works like `st.cache_data`: arguments are hashed into the key (dataframes
+    by content) and arguments whose name starts with "_" are not hashed.
+    Values are returned as stored, so callers must not mutate them.
+
+    Args:
+        name (str, optional): Function label used in usage reports.
+        ttl (int, optional): Entry lifetime in seconds.
+        athlete_arg (str, optional): Argument holding the athlete id; when
+            omitted the entry is attributed to the session's athlete.
+    """
+
+    def decorator(func):
+        function = name or func.__qualname__
+        signature = inspect.signature(func)
+
+        def make_key(bound):
+            return (function,) + tuple(
+                (arg, _hash_arg(value))
+                for arg, value in bound.arguments.items()
+                if not arg.startswith("_")
+            )
+
+        def cached(*args, **kwargs):
+            """Stored value for these arguments, None without computing it."""
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            value = get_cache().get(make_key(bound))
+            return None if value is _MISSING else value
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = make_key(bound)
+
+            cache = get_cache()
+            value = cache.get(key)
+            if value is not _MISSING:
+                return value
+
+            value = func(*args, **kwargs)
+            athlete_id = (
+                bound.arguments.get(athlete_arg)
+                if athlete_arg
+                else _current_athlete_id()
+            )
+            cache.put(key, value, function, athlete_id=athlete_id, ttl=ttl)
+            return value
+
+        wrapper.clear = lambda: get_cache().invalidate(function=function)
+        wrapper.cached = cached
+        return wrapper
+
+    return decorator
@@ -5,12 +5,21 @@ from itertools import product
 
 from services.constants import MONTHS_MAP, DAYS
 
-
-def process_heatmap_day_month(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    df["start_datetime_local"] = pd.to_datetime(df["start_datetime_local"])
-
-    heatmap_df = df.groupby(["month", "day_name"]).size().reset_index(name="count")
+# --- metrics configuration ---
+HISTOGRAM_METRICS = {
+    "elapsed_time": {"unit": "min", "scale": 1 / 60, "decimals": 0},
+    "distance_km": {"unit": "km", "scale": 1.0, "decimals": 0},
+    "elevation_gain_m": {"unit": "m", "scale": 1.0, "decimals": 0},
+}
+TIME_BINS = (0, 60, 120, 300, 600, float("inf"))  # minutes
+ELEVATION_BINS = (0, 100, 500, 1000, 2000, float("inf"))
+
+
+def process_heatmap_day_month(df: pd.DataFrame, aggregates=None) -> pd.DataFrame:
+    if aggregates is not None:
+        heatmap_df = aggregates.heatmap().reset_index(name="count")
+    else:
+        heatmap_df = df.groupby(["month", "day_name"]).size().reset_index(name="count")
 
     # --- months x days ---
     MONTHS = list(range(1, 13))  # 1..12
@@ -33,43 +42,50 @@ def process_heatmap_day_month(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def process_data_histogram(
-    df: pd.DataFrame, col: str, bins: tuple | int = 10
+    df: pd.DataFrame, col: str, bins: tuple | int = 10, aggregates=None
 ) -> pd.DataFrame:
     """
     Generate a DataFrame suitable for plotting a histogram.
     Returns columns: bin, label, count
-    """
-    df = df.copy()
-
-    # --- metrics configuration ---
-    METRICS = {
-        "elapsed_time": {"unit": "min", "scale": 1 / 60, "decimals": 0},
-        "distance_km": {"unit": "km", "scale": 1.0, "decimals": 0},
-        "elevation_gain_m": {"unit": "m", "scale": 1.0, "decimals": 0},
-    }
 
-    metric = METRICS.get(col)
+    With fixed bins, counts are summed from per-sport `aggregates` if given.
+    """
+    metric = HISTOGRAM_METRICS.get(col)
     if metric is None:
         raise ValueError(f"Unsupported metric: {col}")
 
-    # --- normalization ---
-    df[col] = df[col] * metric["scale"]
-
-    # --- bins ---
-    if isinstance(bins, int):
-        bins_edges = pd.interval_range(
-            start=df[col].min(), end=df[col].max(), periods=bins
+    if aggregates is not None and not isinstance(bins, int):
+        bins_edges = pd.IntervalIndex.from_breaks(bins, closed="left")
+        histogram = pd.DataFrame(
+            {
+                "bin": bins_edges,
+                "count": aggregates.histogram(col, metric["scale"], bins_edges),
+            }
         )
     else:
-        bins_edges = pd.IntervalIndex.from_breaks(bins, closed="left")
+        df = df.copy()
 
-    col_bins = pd.cut(df[col], bins=bins_edges)
+        # --- normalization ---
+        df[col] = df[col] * metric["scale"]
 
-    histogram = (
-        col_bins.value_counts().sort_index().rename("count").reset_index(name="count")
-    )
+        # --- bins ---
+        if isinstance(bins, int):
+            bins_edges = pd.interval_range(
+                start=df[col].min(), end=df[col].max(), periods=bins
+            )
+        else:
+            bins_edges = pd.IntervalIndex.from_breaks(bins, closed="left")
+
+        col_bins = pd.cut(df[col], bins=bins_edges)
+
+        histogram = (
+            col_bins.value_counts()
+            .sort_index()
+            .rename("count")
+            .reset_index(name="count")
+        )
 
-    histogram = histogram.rename(columns={histogram.columns[0]: "bin"})
+        histogram = histogram.rename(columns={histogram.columns[0]: "bin"})
 
     def format_label(interval: pd.Interval) -> str:
         left = interval.left
@@ -112,10 +128,14 @@ def process_time_data(
     col: Optional[str] = None,
     agg: Literal["sum", "count", "nunique"] = "count",
     result_name: Optional[str] = None,
+    aggregates=None,
 ) -> pd.DataFrame:
-    df = df.copy()
-    df["month_str"] = df["month"].apply(lambda x: MONTHS_MAP.get(x, "Unknown"))
+    """
+    Aggregate activities per time bucket.
 
+    Sums and counts are composed from per-sport `aggregates` if given,
+    other aggregations are computed from the dataframe.
+    """
     # --- define grouping ---
     if freq == "day_name":
         group_col = "day_name"
@@ -160,8 +180,24 @@ def process_time_data(
     else:
         raise ValueError(f"Unsupported freq: {freq}")
 
+    if freq == "month" and aggregates is None:
+        df = df.copy()
+        df["month_str"] = df["month"].apply(lambda x: MONTHS_MAP.get(x, "Unknown"))
+
     # --- aggregation ---
-    if agg == "sum":
+    if aggregates is not None and agg in ("sum", "count"):
+        totals = aggregates.totals(freq)
+        if freq == "month":
+            totals.index = totals.index.map(lambda x: MONTHS_MAP.get(x, "Unknown"))
+        totals.index.name = group_col
+
+        if agg == "sum":
+            if col is None:
+                raise ValueError("Column must be specified for sum aggregation")
+            aggregated = totals[col].reset_index()
+        else:
+            aggregated = totals["count"].reset_index(name=result_name or "count")
+    elif agg == "sum":
         if col is None:
             raise ValueError("Column must be specified for sum aggregation")
         aggregated = df.groupby(group_col)[col].sum().reset_index()
@@ -87,3 +87,5 @@ MONTHS_MAP = {
 }
 
 DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+DAYPARTS = ["Morning", "Afternoon", "Evening", "Night"]
@@ -18,7 +18,7 @@ def process_activities_data(df: pd.DataFrame) -> pd.DataFrame:
         pd.DataFrame: processed dataframe with additional columns:
             - sport_category (categorical)
             - distance_km
-            - average_speed_kmh
+            - average_speed_kmh, pace_min_per_km
             - year, month, day, day_name, weekday, start_hour
             - is_weekend, daypart
     """
@@ -27,6 +27,7 @@ def process_activities_data(df: pd.DataFrame) -> pd.DataFrame:
         return df
 
     cols_to_keep = [
+        "id",
         "distance",
         "moving_time",
         "elapsed_time",
@@ -36,8 +37,13 @@ def process_activities_data(df: pd.DataFrame) -> pd.DataFrame:
         "kudos_count",
         "comment_count",
         "athlete_count",
+        "average_heartrate",
+        "average_watts",
+        "summary_polyline",
     ]
 
+    if "map" in df:
+        df["summary_polyline"] = df["map"].str.get("summary_polyline")
     df = df.reindex(columns=cols_to_keep)
 
     # Data cleaning
@@ -67,6 +73,12 @@ def process_activities_data(df: pd.DataFrame) -> pd.DataFrame:
     df["elapsed_time_h"] = (df["elapsed_time"] + 1800) // 3600  # 5h 40min -> 6h
     df["moving_time_h"] = (df["moving_time"] + 1800) // 3600
 
+    # no speed or pace without distance or moving time (e.g. weight training)
+    moving_h = df["moving_time"].where(df["moving_time"] > 0) / 3600
+    distance_km = df["distance_km"].where(df["distance_km"] > 0)
+    df["average_speed_kmh"] = df["distance_km"] / moving_h
+    df["pace_min_per_km"] = moving_h * 60 / distance_km
+
     conditions = [
         (df["start_hour"] >= 5) & (df["start_hour"] < 12),
         (df["start_hour"] >= 12) & (df["start_hour"] < 17),
@@ -0,0 +1,131 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# what to do with the same session uploaded twice (e.g. watch and bike computer):
+# "merge" keeps one activity completed with the other's data, "suppress" keeps
+# one activity as is, "off" keeps both
+DEDUP_POLICY = os.getenv("STRAVA_DEDUP_POLICY", "merge")
+
+MIN_OVERLAP = 0.5  # share of the shorter activity that must overlap
+SUMMED_ON_MERGE = ["kudos_count", "comment_count"]
+
+
+def find_duplicates(df: pd.DataFrame) -> pd.Series:
+    """
+    Activity kept for every duplicate, found with a sort-and-sweep join.
+
+    Activities are sorted by sport category and start time, and an activity
+    joins the current cluster when it starts before the latest end seen so far
+    in its category. The sweep is a sort plus cumulative max, O(n log n), with
+    no pairwise join. In a cluster the activity with the most data is kept,
+    other members overlapping it by at least `MIN_OVERLAP` are duplicates.
+
+    Returns:
+        pd.Series: id of the kept activity for duplicates, NA otherwise,
+        aligned with `df`.
+    """
+    duplicate_of = pd.Series(pd.NA, index=df.index, dtype="Int64")
+    if len(df) < 2:
+        return duplicate_of
+
+    start = df["start_datetime_local"]
+    sweep = pd.DataFrame(
+        {
+            "id": df["id"],
+            "category": df["sport_category"].astype(str),
+            "start": start,
+            "end": start + pd.to_timedelta(df["elapsed_time"], unit="s"),
+            "data": df.reindex(
+                columns=["average_heartrate", "average_watts", "summary_polyline"]
+            )
+            .notna()
+            .sum(axis=1),
+            "distance": df["distance_km"],
+        }
+    ).sort_values(["category", "start"])
+
+    latest_end = sweep.groupby("category")["end"].cummax()
+    previous_end = latest_end.groupby(sweep["category"]).shift()
+    starts_cluster = previous_end.isna() | (sweep["start"] >= previous_end)
+    sweep["cluster"] = starts_cluster.cumsum()
+
+    clusters = sweep[sweep.groupby("cluster")["id"].transform("size") > 1]
+    if clusters.empty:
+        return duplicate_of
+
+    clusters = clusters.sort_values(
+        ["cluster", "data", "distance", "id"], ascending=[True, False, False, True]
+    )
+    kept = clusters.groupby("cluster").head(1).set_index("cluster")
+    kept = kept.loc[clusters["cluster"]].set_axis(clusters.index)
+
+    overlap = (
+        np.minimum(clusters["end"], kept["end"])
+        - np.maximum(clusters["start"], kept["start"])
+    ).dt.total_seconds()
+    shorter = np.minimum(
+        (clusters["end"] - clusters["start"]).dt.total_seconds(),
+        (kept["end"] - kept["start"]).dt.total_seconds(),
+    )
+    is_duplicate = (clusters["id"] != kept["id"]) & (
+        overlap >= MIN_OVERLAP * shorter.clip(lower=1)
+    )
+
+    duplicated = is_duplicate[is_duplicate].index
+    duplicate_of[duplicated] = kept.loc[duplicated, "id"].to_numpy()
+    return duplicate_of
+
+
+def _merge(df: pd.DataFrame, duplicate_of: pd.Series) -> pd.DataFrame:
+    """Kept activities completed with data of their duplicates."""
+    group = duplicate_of.fillna(df["id"])
+    in_cluster = group.isin(duplicate_of.dropna())
+    clusters = df[in_cluster].assign(_kept=duplicate_of[in_cluster].isna())
+    clusters = clusters.sort_values("_kept", ascending=False, kind="stable")
+
+    # first non-missing value of each column, the kept activity's first
+    grouped = clusters.groupby(group[in_cluster], sort=False, observed=True)
+    merged = grouped.first()
+    merged[SUMMED_ON_MERGE] = grouped[SUMMED_ON_MERGE].sum()
+    merged = merged.drop(columns="_kept").reset_index(drop=True)
+    return merged.astype(df.dtypes[merged.columns].to_dict())
+
+
+def _apply_policy(df, duplicate_of, policy):
+    kept = df[duplicate_of.isna()]
+    if policy == "merge":
+        merged = _merge(df, duplicate_of)
+        kept = pd.concat([kept[~kept["id"].isin(merged["id"])], merged])
+    return kept.sort_values("start_datetime_local", ignore_index=True)
+
+
+def deduplicate(df: pd.DataFrame, policy: str = DEDUP_POLICY) -> pd.DataFrame:
+    """Apply the dedup `policy` ("merge", "suppress" or "off") to activities."""
+    if policy == "off" or df.empty:
+        return df
+
+    duplicate_of = find_duplicates(df)
+    if duplicate_of.isna().all():
+        return df
+    return _apply_policy(df, duplicate_of, policy)
+
+
+def dedup_delta(df: pd.DataFrame, policy: str = DEDUP_POLICY):
+    """
+    Rollup delta turning totals of `df` into totals of its deduplicated rows.
+
+    Returns:
+        tuple: (added, removed) activities, both None if nothing changes.
+    """
+    if policy == "off" or df is None or df.empty:
+        return None, None
+
+    duplicate_of = find_duplicates(df)
+    if duplicate_of.isna().all():
+        return None, None
+
+    removed = df[df["id"].isin(duplicate_of.dropna()) | duplicate_of.notna()]
+    deduplicated = _apply_policy(removed, duplicate_of[removed.index], policy)
+    return deduplicated, removed
@@ -1,7 +1,17 @@
-def get_distance_bins(selected_sport_categories: list[str]) -> tuple:
+from services.sketches import quantile_bins
+
+
+def get_distance_bins(selected_sport_categories: list[str], sketch=None) -> tuple:
     """
     Returns distance histogram bins depending on selected sport categories.
+
+    With a distance quantile `sketch` of the selection, bins are placed at its
+    quintiles instead.
     """
+    bins = quantile_bins(sketch)
+    if bins is not None:
+        return bins
+
     if selected_sport_categories == ["Foot sports"]:
         return (0, 5, 10, 21.097, 42.195, float("inf"))
 
@@ -1,10 +1,21 @@
-from services.constants import SPORT_CATEGORY_MAP
+import numpy as np
+import pandas as pd
+
+from services.cache import memory_cache
+from services.constants import DAYPARTS, SPORT_CATEGORY_MAP
+from services.frame_store import dataset_id
+
+
+def _categorical_mask(values: pd.Series, selected) -> np.ndarray:
+    """Boolean row mask via a lookup table on categorical codes."""
+    lookup = np.append(values.cat.categories.isin(selected), False)  # code -1
+    return lookup[values.cat.codes.to_numpy()]
 
 
 def filter_by_category(df, selected_categories):
     if not selected_categories:
         return df.iloc[0:0]
-    return df[df["sport_category"].isin(selected_categories)]
+    return df[_categorical_mask(df["sport_category"], selected_categories)]
 
 
 def get_subcategories(category):
@@ -14,4 +25,125 @@ def get_subcategories(category):
 def filter_by_subcategory(df, selected_subcategories):
     if not selected_subcategories:
         return df.iloc[0:0]
-    return df[df["sport_type"].isin(selected_subcategories)]
+    return df[_categorical_mask(df["sport_type"], selected_subcategories)]
+
+
+class FilterIndex:
+    """
+    Filter engine precomputed once per dataset.
+
+    Categorical columns are reduced to integer codes and dates to a sorted day
+    array, so any filter selection becomes a few lookups and boolean mask
+    intersections instead of string comparisons on the whole frame.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+
+        self._category_codes = df["sport_category"].cat.codes.to_numpy()
+        self._categories = df["sport_category"].cat.categories
+        self._sport_codes = df["sport_type"].cat.codes.to_numpy()
+        self._sports = df["sport_type"].cat.categories
+
+        start = df["start_datetime_local"]
+        if start.dt.tz is not None:
+            start = start.dt.tz_localize(None)  # already local wall time
+        self._days = start.to_numpy().astype("datetime64[D]")  # sorted by date
+
+        self._weekdays = df["weekday"].to_numpy(dtype=np.int8)
+        self._dayparts = pd.Categorical(df["daypart"], categories=DAYPARTS).codes
+        self._distance = df["distance_km"].to_numpy(dtype=float)
+
+    def __sizeof__(self) -> int:
+        return sum(
+            arr.nbytes
+            for arr in (
+                self._category_codes,
+                self._sport_codes,
+                self._days,
+                self._weekdays,
+                self._dayparts,
+                self._distance,
+            )
+        )
+
+    @property
+    def date_bounds(self) -> tuple:
+        """First and last activity day."""
+        if not self.size:
+            return None, None
+        return self._days[0].item(), self._days[-1].item()
+
+    @property
+    def max_distance_km(self) -> float:
+        return float(np.nanmax(self._distance)) if self.size else 0.0
+
+    def mask(
+        self,
+        categories=None,
+        sports=None,
+        date_range=None,
+        weekdays=None,
+        dayparts=None,
+        distance_range=None,
+    ) -> np.ndarray:
+        """
+        Boolean row mask for a filter selection.
+
+        Every dimension left as None is not filtered on.
+
+        Args:
+            categories (list[str], optional): sport categories.
+            sports (list[str], optional): sport types.
+            date_range (tuple[date, date], optional): inclusive day range.
+            weekdays (list[int], optional): weekdays (0 = Monday).
+            dayparts (list[str], optional): Morning, Afternoon, Evening, Night.
+            distance_range (tuple[float, float], optional): inclusive km range.
+        """
+        mask = np.ones(self.size, dtype=bool)
+
+        if categories is not None:
+            mask &= self._code_lookup(self._categories, categories)[
+                self._category_codes
+            ]
+
+        if sports is not None:
+            mask &= self._code_lookup(self._sports, sports)[self._sport_codes]
+
+        if date_range is not None:
+            start, end = (np.datetime64(day, "D") for day in date_range)
+            first = np.searchsorted(self._days, start, side="left")
+            last = np.searchsorted(self._days, end, side="right")
+            mask[:first] = False
+            mask[last:] = False
+
+        if weekdays is not None:
+            mask &= np.isin(self._weekdays, weekdays)
+
+        if dayparts is not None:
+            selected = pd.Index(DAYPARTS).get_indexer(dayparts)
+            mask &= np.isin(self._dayparts, selected)
+
+        if distance_range is not None:
+            low, high = distance_range
+            mask &= (self._distance >= low) & (self._distance <= high)
+
+        return mask
+
+    def positions(self, **filters) -> np.ndarray:
+        """Row positions matching a filter selection (see `mask`)."""
+        return np.flatnonzero(self.mask(**filters))
+
+    @staticmethod
+    def _code_lookup(categories: pd.Index, selected) -> np.ndarray:
+        return np.append(categories.isin(selected), False)  # code -1 (missing)
+
+
+@memory_cache("filter_index")
+def get_filter_index(key: str, _df: pd.DataFrame) -> FilterIndex:
+    return FilterIndex(_df)
+
+
+def build_filter_index(df: pd.DataFrame) -> FilterIndex:
+    """Filter index of a dataset, built once and cached."""
+    return get_filter_index(dataset_id(df), df)
@@ -1,10 +1,12 @@
 import streamlit as st
 
+from services.aggregates import build_sport_aggregates
+from services.constants import DAYPARTS, DAYS
 from services.filters.logic import (
-    filter_by_category,
-    filter_by_subcategory,
+    build_filter_index,
     get_subcategories,
 )
+from services.frame_store import dataset_id
 
 SPORT_CATEGORIES = [
     "Foot sports",
@@ -15,11 +17,13 @@ SPORT_CATEGORIES = [
 ]
 
 
-def apply_activity_filters(df):
+def apply_activity_filters(df, rollups=None):
     """
     Renders filter UI and returns:
     - filtered dataframe
     - selected sport categories
+    - per-sport aggregates of the selection, or None when filtered by
+      anything else than sport category and type
     """
     col_category, col_subcategory = st.columns([4, 6])
 
@@ -31,7 +35,7 @@ def apply_activity_filters(df):
             default=SPORT_CATEGORIES,
         )
 
-    df = filter_by_category(df, selected_categories)
+    filters = {"categories": selected_categories}
 
     # --- SUBCATEGORY ---
     with col_subcategory:
@@ -39,12 +43,65 @@ def apply_activity_filters(df):
             category = selected_categories[0]
             subcategories = get_subcategories(category)
 
-            selected_sub = st.multiselect(
+            filters["sports"] = st.multiselect(
                 f"Filter by {category} type:",
                 options=subcategories,
                 default=subcategories,
             )
 
-            df = filter_by_subcategory(df, selected_sub)
+    if df.empty:
+        return df, selected_categories, None
 
-    return df, selected_categories
+    index = build_filter_index(df)
+
+    # --- DATE, TIME AND DISTANCE ---
+    with st.expander("More filters"):
+        col_date, col_weekday, col_daypart, col_distance = st.columns(4)
+
+        with col_date:
+            first_day, last_day = index.date_bounds
+            date_range = st.date_input(
+                "Date range:",
+                value=(first_day, last_day),
+                min_value=first_day,
+                max_value=last_day,
+            )
+            if len(date_range) == 2 and tuple(date_range) != (first_day, last_day):
+                filters["date_range"] = date_range
+
+        with col_weekday:
+            weekdays = st.multiselect("Weekdays:", options=DAYS, default=DAYS)
+            if len(weekdays) != len(DAYS):
+                filters["weekdays"] = [DAYS.index(day) for day in weekdays]
+
+        with col_daypart:
+            dayparts = st.multiselect(
+                "Time of day:", options=DAYPARTS, default=DAYPARTS
+            )
+            if len(dayparts) != len(DAYPARTS):
+                filters["dayparts"] = dayparts
+
+        with col_distance:
+            max_distance = float(int(index.max_distance_km) + 1)
+            distance_range = st.slider(
+                "Distance (km):",
+                min_value=0.0,
+                max_value=max_distance,
+                value=(0.0, max_distance),
+            )
+            if distance_range != (0.0, max_distance):
+                filters["distance_range"] = distance_range
+
+    aggregates = None
+    if set(filters) <= {"categories", "sports"}:
+        aggregates = build_sport_aggregates(df, rollups).select(**filters)
+
+    selection = df.iloc[index.positions(**filters)]
+    # attrs are copied from the dataset: per-dataset caches must not mistake
+    # the selection for it
+    selection.attrs = {
+        **df.attrs,
+        "dataset_id": f"{dataset_id(df)}:{sorted(filters.items())}",
+    }
+
+    return selection, selected_categories, aggregates
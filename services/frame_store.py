@@ -0,0 +1,28 @@
+import pandas as pd
+
+from services.cache import frame_fingerprint
+
+# Copy-on-write makes every derived frame a lazy view: sessions can filter,
+# add columns or normalise values without ever touching the shared base data.
+pd.set_option("mode.copy_on_write", True)
+
+
+def share_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return a zero-copy view of a shared activity frame.
+
+    The frame kept in the resource cache is the single in-process copy of an
+    athlete's activities. Sessions receive shallow views of it, so a cache hit
+    costs neither unpickling nor duplicated memory.
+    """
+    return df.copy(deep=False)
+
+
+def dataset_id(df: pd.DataFrame) -> str:
+    """
+    Identifier of the dataset a frame was loaded as.
+
+    Set once when activities are loaded, so per-dataset structures (filter
+    indices, aggregates) can be looked up without re-hashing the frame.
+    """
+    return df.attrs.get("dataset_id") or frame_fingerprint(df)
@@ -0,0 +1,125 @@
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from services.polyline import decode_polylines
+from services.storage import athlete_dir, load_pickle, save_pickle
+
+# cells are Web Mercator tiles of this zoom level (~150 m at the equator),
+# encoded as y * 2**zoom + x
+CELL_ZOOM = 18
+MAX_STEPS_PER_SEGMENT = 256  # longer gaps in a polyline are not filled in
+
+
+def mercator_tiles(lat, lng, zoom: int = CELL_ZOOM):
+    """Fractional Web Mercator tile coordinates (x, y) at `zoom`."""
+    n = 2.0**zoom
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    x = (np.asarray(lng) + 180.0) / 360.0 * n
+    y = (1.0 - np.arcsinh(np.tan(lat)) / np.pi) / 2.0 * n
+    return x, y
+
+
+def tile_centers(x, y, zoom: int):
+    """Latitude and longitude of the centers of tiles (x, y) at `zoom`."""
+    n = 2.0**zoom
+    lng = (np.asarray(x) + 0.5) / n * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (np.asarray(y) + 0.5) / n))))
+    return lat, lng
+
+
+def _unique_counts(values: np.ndarray):
+    """Sorted unique values and their counts, faster than `np.unique` on ints."""
+    values = np.sort(values)
+    starts = np.flatnonzero(np.diff(values, prepend=values[:1] - 1))
+    return values[starts], np.diff(np.append(starts, len(values)))
+
+
+def rasterise(polylines) -> list[np.ndarray]:
+    """
+    Cells crossed by each polyline, as sorted unique cell ids.
+
+    Segments between consecutive points are densified to one sample per cell,
+    all polylines at once: samples are generated with `np.repeat`, and cells
+    are deduplicated per polyline with a single sort of (polyline, cell)
+    keys.
+    """
+    lat, lng, owners = decode_polylines(polylines)
+    if not len(lat):
+        return [np.empty(0, dtype=np.int64) for _ in polylines]
+    x, y = mercator_tiles(lat, lng)
+
+    same = owners[1:] == owners[:-1]
+    steps = np.ones(len(x), dtype=np.int64)  # the last point of a polyline
+    if len(x) > 1:
+        span = np.maximum(np.abs(np.diff(x)), np.abs(np.diff(y)))
+        segment_steps = np.clip(np.ceil(span), 1, MAX_STEPS_PER_SEGMENT)
+        steps[:-1] = np.where(same, segment_steps, 1)
+
+    starts = np.repeat(np.arange(len(x)), steps)
+    t = np.arange(len(starts)) - np.repeat(np.cumsum(steps) - steps, steps)
+    t = t / steps[starts]
+    ends = np.minimum(starts + 1, len(x) - 1)
+    ends = np.where(t > 0, ends, starts)
+
+    n = 2**CELL_ZOOM
+    cell_x = np.floor(x[starts] + t * (x[ends] - x[starts])).astype(np.int64)
+    cell_y = np.floor(y[starts] + t * (y[ends] - y[starts])).astype(np.int64)
+    cells = np.clip(cell_y, 0, n - 1) * n + np.clip(cell_x, 0, n - 1)
+
+    keys, _ = _unique_counts(owners[starts] * n * n + cells)
+    key_owners, key_cells = keys // (n * n), keys % (n * n)
+    bounds = np.searchsorted(key_owners, np.arange(len(polylines) + 1))
+    return [key_cells[bounds[i] : bounds[i + 1]] for i in range(len(polylines))]
+
+
+def _checksum(polyline) -> int:
+    return zlib.crc32(polyline.encode()) if isinstance(polyline, str) else 0
+
+
+def update_activity_cells(athlete_id: int, activities: pd.DataFrame) -> dict:
+    """
+    Cells of every activity, rasterised once and cached per activity.
+
+    Only activities that are new, or whose polyline changed, are decoded.
+
+    Returns:
+        dict: activity id -> sorted cell ids.
+    """
+    path = athlete_dir(athlete_id) / "route_cells.pkl"
+    cached = load_pickle(path) or {}
+
+    polylines = activities.reindex(columns=["id", "summary_polyline"])
+    polylines = polylines.set_index("id")["summary_polyline"]
+    checksums = {i: _checksum(p) for i, p in polylines.items()}
+    todo = [i for i, c in checksums.items() if cached.get(i, (None,))[0] != c]
+
+    if todo:
+        for activity_id, cells in zip(todo, rasterise(polylines[todo].tolist())):
+            cached[activity_id] = (checksums[activity_id], cells)
+        save_pickle(cached, path)
+
+    return {i: cached[i][1] for i in checksums}
+
+
+def heatmap_grid(cells: list[np.ndarray], zoom: int) -> pd.DataFrame:
+    """
+    Number of activities per tile at a coarser `zoom`.
+
+    Returns:
+        pd.DataFrame: columns lat, lng (tile center) and count.
+    """
+    if not cells:
+        return pd.DataFrame(columns=["lat", "lng", "count"])
+
+    n, shift = 2**CELL_ZOOM, CELL_ZOOM - zoom
+    owners = np.repeat(np.arange(len(cells)), [len(c) for c in cells])
+    cells = np.concatenate(cells)
+    x, y = (cells % n) >> shift, (cells // n) >> shift
+
+    # an activity counts once per tile, however many of its cells it covers
+    tiles, _ = _unique_counts(owners * (1 << 2 * zoom) + (y << zoom) + x)
+    tiles, counts = _unique_counts(tiles % (1 << 2 * zoom))
+    lat, lng = tile_centers(tiles % (1 << zoom), tiles >> zoom, zoom)
+    return pd.DataFrame({"lat": lat, "lng": lng, "count": counts})
@@ -0,0 +1,180 @@
+"""
+Import a Strava account export (the ZIP from Settings > My Account).
+
+Usage:
+    python -m services.importers.strava_export export.zip [--athlete-id ID]
+"""
+
+import argparse
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from services.activity_store import ActivityStore
+from services.data_processing import process_activities_data
+from services.importers.tracks import read_track
+from services.streams import StreamStore
+
+CSV_CHUNK_SIZE = 1000
+TRACKS_FLUSH_EVERY = 100
+TRACK_SUFFIXES = (".gpx", ".gpx.gz", ".tcx", ".tcx.gz")
+
+# activities.csv column -> activities API field
+EXPORT_COLUMNS = {
+    "Activity ID": "id",
+    "Activity Type": "sport_type",
+    "Elapsed Time": "elapsed_time",
+    "Moving Time": "moving_time",
+    "Elevation Gain": "total_elevation_gain",
+    "Average Heart Rate": "average_heartrate",
+    "Average Watts": "average_watts",
+    "Filename": "filename",
+}
+
+
+def _to_number(values: pd.Series) -> pd.Series:
+    """
+    Numbers as the export's locale writes them: "1,234.5", "1.234,5", "5,2".
+
+    A single "," followed by digits only is the decimal separator, any other
+    "," groups thousands. A lone "1,234" is thus read as 1.234.
+    """
+    text = values.astype(str).str.strip()
+    decimal_comma = text.str.contains(r",\d*$") & ~text.str.contains(r",.*,")
+    text = text.where(
+        ~decimal_comma,
+        text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+    )
+    text = text.where(decimal_comma, text.str.replace(",", "", regex=False))
+    return pd.to_numeric(text, errors="coerce")
+
+
+def map_export_activities(chunk: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map a chunk of activities.csv to the raw activities API schema.
+
+    The export has no local start time, kudos or companions: start times are
+    UTC, social counts are zero.
+    """
+    df = chunk.rename(columns=EXPORT_COLUMNS)
+
+    # duplicated headers: the second "Distance" column is in meters
+    if "Distance.1" in chunk:
+        df["distance"] = _to_number(chunk["Distance.1"])
+    else:
+        df["distance"] = _to_number(chunk["Distance"]) * 1000
+
+    try:
+        start = pd.to_datetime(chunk["Activity Date"], format="%b %d, %Y, %I:%M:%S %p")
+    except ValueError:
+        start = pd.to_datetime(chunk["Activity Date"], format="mixed")
+    df["start_date_local"] = start.dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    # "Virtual Ride", "E-Bike Ride" -> "VirtualRide", "EBikeRide"
+    df["sport_type"] = df["sport_type"].str.replace(r"[\s-]", "", regex=True)
+
+    for col in ("elapsed_time", "moving_time", "total_elevation_gain"):
+        df[col] = _to_number(df[col])
+    df["moving_time"] = df["moving_time"].fillna(df["elapsed_time"])
+    df["total_elevation_gain"] = df["total_elevation_gain"].fillna(0)
+
+    df["kudos_count"] = 0
+    df["comment_count"] = 0
+    df["athlete_count"] = 1
+
+    return df
+
+
+def _read_athlete_id(archive: zipfile.ZipFile) -> int | None:
+    if "profile.csv" not in archive.namelist():
+        return None
+    with archive.open("profile.csv") as fileobj:
+        profile = pd.read_csv(fileobj)
+    return int(profile["Athlete ID"].iloc[0])
+
+
+def import_export(archive_path: str, athlete_id: int | None = None, workers=None):
+    """
+    Import activities and GPX/TCX tracks of a Strava export archive.
+
+    Activities are read in chunks and each chunk's new activities inserted
+    into the athlete's store. Activities already stored came from the API,
+    which has their local start times and social counts, and are kept as
+    they are. Track files are parsed in parallel by a process pool and saved
+    to the athlete's stream store. FIT files are skipped.
+
+    Returns:
+        dict: number of imported and already stored activities, imported
+        tracks and skipped track files.
+    """
+    with zipfile.ZipFile(archive_path) as archive:
+        athlete_id = athlete_id or _read_athlete_id(archive)
+        if athlete_id is None:
+            raise ValueError("Athlete id not found in export, pass it explicitly")
+        store = ActivityStore(athlete_id)
+        stored_ids = store.ids()
+
+        imported, known, tracks = 0, 0, {}
+        with archive.open("activities.csv") as fileobj:
+            for chunk in pd.read_csv(fileobj, chunksize=CSV_CHUNK_SIZE):
+                raw = map_export_activities(chunk)
+                for activity_id, filename in raw[["id", "filename"]].dropna().values:
+                    tracks[int(activity_id)] = filename
+                is_new = ~raw["id"].isin(stored_ids)
+                known += int((~is_new).sum())
+                if not is_new.any():
+                    continue
+                activities = process_activities_data(raw[is_new])
+                for year, year_df in activities.groupby("year"):
+                    store.insert_new(int(year), year_df.reset_index(drop=True))
+                stored_ids.update(activities["id"].tolist())
+                imported += len(activities)
+
+    # open dashboards serve cached copies until they see a push
+    store.mark_pushed()
+
+    stream_store = StreamStore(athlete_id)
+    parsable = {k: v for k, v in tracks.items() if v.endswith(TRACK_SUFFIXES)}
+    imported_tracks = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(read_track, archive_path, member): activity_id
+            for activity_id, member in parsable.items()
+        }
+        batch = {}
+        for future in as_completed(futures):
+            streams = future.result()
+            if streams:
+                batch[futures[future]] = streams
+                imported_tracks += 1
+            if len(batch) >= TRACKS_FLUSH_EVERY:
+                stream_store.append_many(batch)
+                batch = {}
+        stream_store.append_many(batch)
+
+    return {
+        "activities": imported,
+        "known_activities": known,
+        "tracks": imported_tracks,
+        "skipped_tracks": len(tracks) - len(parsable),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a Strava export archive")
+    parser.add_argument("archive", help="path to the export ZIP")
+    parser.add_argument("--athlete-id", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    summary = import_export(args.archive, args.athlete_id, args.workers)
+    print(
+        f"Imported {summary['activities']} activities "
+        f"({summary['known_activities']} already stored) and {summary['tracks']} "
+        f"tracks ({summary['skipped_tracks']} unsupported track files skipped)"
+    )
+
+
+if __name__ == "__main__":
+    main()
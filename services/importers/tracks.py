@@ -0,0 +1,109 @@
+import gzip
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_M = 6371008.8
+
+# point element -> {child element: stream}
+TRACK_FORMATS = {
+    "trkpt": {  # GPX
+        "time": "time",
+        "ele": "altitude",
+        "hr": "heartrate",
+        "power": "watts",
+    },
+    "Trackpoint": {  # TCX
+        "Time": "time",
+        "LatitudeDegrees": "lat",
+        "LongitudeDegrees": "lng",
+        "AltitudeMeters": "altitude",
+        "DistanceMeters": "distance",
+        "Value": "heartrate",
+        "Watts": "watts",
+    },
+}
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _haversine_distance(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """Cumulative distance along a track, in meters."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    a = (
+        np.sin(np.diff(lat) / 2) ** 2
+        + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2
+    )
+    step = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    return np.concatenate([[0.0], np.nancumsum(step)])
+
+
+def parse_track(fileobj) -> dict[str, np.ndarray]:
+    """
+    Parse a GPX or TCX track into Strava-like streams.
+
+    Returns arrays keyed like the streams API: time (s from start), latlng,
+    distance (m), altitude, heartrate and watts; streams missing from the file
+    are omitted.
+    """
+    points = []
+    for _, elem in ET.iterparse(fileobj, events=("end",)):
+        fields = TRACK_FORMATS.get(_local_name(elem.tag))
+        if fields is None:
+            continue
+
+        point = {}
+        if "lat" in elem.attrib:
+            point["lat"] = elem.attrib["lat"]
+            point["lng"] = elem.attrib["lon"]
+        for child in elem.iter():
+            stream = fields.get(_local_name(child.tag))
+            if stream is not None and child.text and child.text.strip():
+                point[stream] = child.text.strip()
+
+        points.append(point)
+        elem.clear()
+
+    if not points:
+        return {}
+
+    track = pd.DataFrame(points)
+    streams = {}
+
+    if "time" in track:
+        time = pd.to_datetime(track["time"], utc=True, format="ISO8601")
+        streams["time"] = (time - time.iloc[0]).dt.total_seconds().to_numpy()
+
+    for col in ("lat", "lng", "altitude", "distance", "heartrate", "watts"):
+        if col in track:
+            track[col] = pd.to_numeric(track[col], errors="coerce")
+
+    if {"lat", "lng"} <= set(track.columns):
+        track = track.assign(
+            lat=track["lat"].interpolate(limit_area="inside"),
+            lng=track["lng"].interpolate(limit_area="inside"),
+        )
+        streams["latlng"] = track[["lat", "lng"]].to_numpy()
+        if "distance" not in track:
+            streams["distance"] = _haversine_distance(
+                track["lat"].to_numpy(), track["lng"].to_numpy()
+            )
+
+    for col in ("distance", "altitude", "heartrate", "watts"):
+        if col in track and track[col].notna().any():
+            streams[col] = track[col].to_numpy(dtype=float)
+
+    return streams
+
+
+def read_track(archive_path: str, member: str) -> dict[str, np.ndarray]:
+    """Open a (possibly gzipped) track file inside a Strava export archive."""
+    with zipfile.ZipFile(archive_path) as archive:
+        with archive.open(member) as fileobj:
+            if member.endswith(".gz"):
+                fileobj = gzip.open(fileobj)
+            return parse_track(fileobj)
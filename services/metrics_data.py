@@ -1,7 +1,8 @@
 import pandas as pd
-import streamlit as st
 from typing import Literal
 
+from services.cache import memory_cache
+
 
 def format_seconds(seconds: float, format: Literal["hms", "hm", "h"]) -> str:
     """Convert seconds to hours, minutes, seconds format.
@@ -41,7 +42,7 @@ def format_metric_data(metric_data: float | int, format: Literal["m", "km"]) ->
         raise ValueError("Invalid format. Expected one of: 'm', 'km'.")
 
 
-@st.cache_data(show_spinner=False, ttl=3600)
+@memory_cache(ttl=3600)
 def process_metrics_data(df: pd.DataFrame) -> dict:
     """Process metrics data for streamlit app.
 
@@ -170,3 +171,30 @@ def process_metrics_data(df: pd.DataFrame) -> dict:
     metrics_data["percent_around_world"] = round(percent_around_world, 2)
 
     return metrics_data
+
+
+STATS_SPORTS = ("run", "ride", "swim")  # the sports of Strava's athlete stats
+
+
+def process_athlete_stats(stats: dict, period: Literal["ytd", "all"] = "ytd") -> dict:
+    """Headline totals from Strava's athlete stats, formatted as the Overview's.
+
+    Args:
+        stats (dict): response of the /athletes/{id}/stats endpoint.
+        period (Literal['ytd', 'all']): year to date or all time totals.
+
+    Returns:
+        dict: total_activities, total_distance_km, total_time_hms and
+            total_elevation_gain_m of runs, rides and swims.
+    """
+    totals = [stats.get(f"{period}_{sport}_totals") or {} for sport in STATS_SPORTS]
+
+    def total(key: str) -> float:
+        return sum(sport_totals.get(key, 0) for sport_totals in totals)
+
+    return {
+        "total_activities": int(total("count")),
+        "total_distance_km": format_metric_data(total("distance") / 1000, "km"),
+        "total_time_hms": format_seconds(total("elapsed_time"), "h"),
+        "total_elevation_gain_m": format_metric_data(total("elevation_gain"), "m"),
+    }
@@ -0,0 +1,62 @@
+import pandas as pd
+
+from services.cache import memory_cache
+from services.frame_store import dataset_id
+
+PACE_WINDOWS = {"28 days": "28D", "90 days": "90D"}
+PACE_PERCENTILES = {"25th percentile": 0.25, "75th percentile": 0.75}
+MIN_PERIODS = 3  # activities in a window before a trend point is drawn
+
+# sport category -> (column, label, scale): runners and swimmers think in
+# pace, everyone else in speed
+PACE_METRICS = {
+    "Foot sports": ("pace_min_per_km", "Pace (min/km)", 1.0),
+    "Water sports": ("pace_min_per_km", "Pace (min/100 m)", 0.1),
+}
+SPEED_METRIC = ("average_speed_kmh", "Speed (km/h)", 1.0)
+
+
+def pace_metric(sport_category: str) -> tuple[str, str, float]:
+    """Column, axis label and scale used for a sport category."""
+    return PACE_METRICS.get(sport_category, SPEED_METRIC)
+
+
+def rolling_trends(values: pd.Series, window: str) -> pd.DataFrame:
+    """
+    Rolling median and percentiles of a series indexed by start time.
+
+    Uses pandas' time-based rolling windows, so every statistic is one
+    vectorized pass regardless of how activities are spread over time.
+    """
+    rolling = values.sort_index().rolling(window, min_periods=MIN_PERIODS)
+    trends = {"Median": rolling.median()}
+    for name, q in PACE_PERCENTILES.items():
+        trends[name] = rolling.quantile(q)
+    return pd.DataFrame(trends)
+
+
+@memory_cache("pace_trends")
+def get_sport_trends(key: str, sport_type: str, window: str, _df: pd.DataFrame):
+    return sport_trends(_df, sport_type, window)
+
+
+def sport_trends(df: pd.DataFrame, sport_type: str, window: str) -> pd.DataFrame:
+    """
+    Pace or speed of one sport with its rolling trends.
+
+    Returns:
+        pd.DataFrame: columns start_datetime_local, value (the activity) and
+        one column per trend line.
+    """
+    sport = df[df["sport_type"] == sport_type]
+    col, _, scale = pace_metric(str(sport["sport_category"].iloc[0]))
+
+    values = (sport.set_index("start_datetime_local")[col] * scale).dropna()
+    trends = rolling_trends(values, window)
+    trends.insert(0, "value", values.sort_index())
+    return trends.reset_index()
+
+
+def build_sport_trends(df: pd.DataFrame, sport_type: str, window: str):
+    """Trends of one sport, cached per dataset so filters only pick sports."""
+    return get_sport_trends(dataset_id(df), sport_type, window, df)
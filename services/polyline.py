@@ -0,0 +1,57 @@
+import numpy as np
+
+POLYLINE_PRECISION = 1e5
+
+
+def decode_polylines(polylines) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Decode many Google encoded polylines at once.
+
+    All strings are concatenated into one byte array and decoded with array
+    operations only: 5-bit chunks are shifted into place and summed per value
+    with `np.add.reduceat`, and coordinates are restored from their deltas by a
+    cumulative sum restarted at the first point of every polyline.
+    Empty or missing polylines yield no points.
+
+    Returns:
+        tuple: lat, lng (degrees) and the position in `polylines` of every point.
+    """
+    polylines = [p if isinstance(p, str) else "" for p in polylines]
+    empty = (np.empty(0), np.empty(0), np.empty(0, dtype=np.int64))
+    lengths = np.fromiter(map(len, polylines), dtype=np.int64, count=len(polylines))
+    if not lengths.sum():
+        return empty
+
+    chunks = np.frombuffer("".join(polylines).encode("ascii"), np.uint8) - 63
+    chunks = chunks.astype(np.int64)
+    owner_of_char = np.repeat(np.arange(len(polylines)), lengths)
+
+    # a value ends with the first chunk that has the continuation bit unset,
+    # a truncated polyline must not run into the next one
+    is_last = chunks < 0x20
+    is_last[np.cumsum(lengths)[lengths > 0] - 1] = True
+    value_starts = np.flatnonzero(np.concatenate([[True], is_last[:-1]]))
+    value_lengths = np.diff(np.append(value_starts, len(chunks)))
+    position = np.arange(len(chunks)) - np.repeat(value_starts, value_lengths)
+    shifted = (chunks & 0x1F) << (5 * np.minimum(position, 11))
+    values = np.add.reduceat(shifted, value_starts)
+    values = np.where(values & 1, ~(values >> 1), values >> 1)
+    owners = owner_of_char[value_starts]
+
+    # values alternate lat, lng within each polyline
+    first_value = np.searchsorted(owners, np.arange(len(polylines)))
+    lat_idx = np.flatnonzero((np.arange(len(values)) - first_value[owners]) % 2 == 0)
+    lat_idx = lat_idx[lat_idx + 1 < len(values)]
+    lat_idx = lat_idx[owners[lat_idx + 1] == owners[lat_idx]]
+    lat_deltas, lng_deltas = values[lat_idx], values[lat_idx + 1]
+    point_owners = owners[lat_idx]
+
+    # coordinates are deltas: cumulative sum restarted for every polyline
+    lat, lng = np.cumsum(lat_deltas), np.cumsum(lng_deltas)
+    starts = np.flatnonzero(np.diff(point_owners, prepend=-1))
+    run_lengths = np.diff(np.append(starts, len(point_owners)))
+    for coords, deltas in ((lat, lat_deltas), (lng, lng_deltas)):
+        offset = coords[starts] - deltas[starts]
+        coords -= np.repeat(offset, run_lengths)
+
+    return lat / POLYLINE_PRECISION, lng / POLYLINE_PRECISION, point_owners
@@ -0,0 +1,196 @@
+"""
+Year in review reports for many athletes at once, without Streamlit.
+
+Usage:
+    python -m services.reports.batch --all --years 2024
+    python -m services.reports.batch --athletes 123 456 --years 2020-2024
+    python -m services.reports.batch --tokens tokens.json --format parquet
+
+Athletes are read from the token store (`--athletes`, `--all`: everyone
+who logged in to the dashboard) or from a JSON list of token records
+(`--tokens`) with access_token, refresh_token, expires_at and optionally
+athlete_id. Each report is written to OUT/<athlete_id>/<year>/ as
+metrics.json plus the chart data, in one charts.json or one Parquet file
+per chart.
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+import requests
+
+from services.cache import silence_streamlit_warnings
+from services.reports.year_review import build_year_review, serializable
+from services.storage import DATA_DIR
+from services.strava_api.client import sync_activities
+from services.strava_api.constants import BASE_URL, REQUEST_TIMEOUT_S
+from services.strava_api.rate_limit import (
+    RateLimiter,
+    set_rate_limiter,
+    wait_for_rate_limit,
+)
+from services.strava_api.token_manager import (
+    drop_token_manager,
+    get_token_manager,
+    request_tokens,
+)
+from services.token_store import TokenStore
+
+OUTPUT_FORMATS = ("json", "parquet")
+EXPIRY_MARGIN_S = 300  # the token looking up the athlete is refreshed this early
+
+
+def load_token_records(athletes=None, tokens_path=None, all_athletes=False):
+    """Token records of the athletes to report on."""
+    records = []
+    if tokens_path:
+        records.extend(json.loads(Path(tokens_path).read_text()))
+
+    athlete_ids = list(athletes or [])
+    if all_athletes:
+        athlete_ids.extend(int(p.parent.name) for p in DATA_DIR.glob("*/tokens.json"))
+    for athlete_id in dict.fromkeys(athlete_ids):
+        tokens = TokenStore(athlete_id).get()
+        if tokens is None:
+            raise ValueError(f"No stored tokens for athlete {athlete_id}")
+        records.append({**tokens, "athlete_id": athlete_id})
+    return records
+
+
+def parse_years(value: str) -> list[int]:
+    """Years of a single year ("2024") or an inclusive range ("2020-2024")."""
+    first, _, last = value.partition("-")
+    return list(range(int(first), int(last or first) + 1))
+
+
+def _init_worker(workers: int):
+    # the app's rate limits are shared by the whole pool
+    set_rate_limiter(RateLimiter().share(workers))
+    silence_streamlit_warnings()
+
+
+def _valid_tokens(record: dict) -> dict:
+    expires_at = record.get("expires_at")
+    if expires_at is None or expires_at - time.time() > EXPIRY_MARGIN_S:
+        return record
+
+    tokens = {**record, **request_tokens(record["refresh_token"])}
+    if record.get("athlete_id"):
+        TokenStore(record["athlete_id"]).save(tokens)
+    return tokens
+
+
+def _athlete_id(access_token: str) -> int:
+    wait_for_rate_limit()
+    response = requests.get(
+        f"{BASE_URL}/athlete",
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=REQUEST_TIMEOUT_S,
+    )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+def write_report(report: dict, path: Path, output_format: str):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "metrics.json").write_text(json.dumps(report["metrics"], default=str))
+
+    charts = {name: serializable(df) for name, df in report["charts"].items()}
+    if output_format == "parquet":
+        for name, df in charts.items():
+            df.to_parquet(path / f"{name}.parquet", index=False)
+    else:
+        records = {name: df.to_dict(orient="records") for name, df in charts.items()}
+        (path / "charts.json").write_text(json.dumps(records, default=str))
+
+
+def run_athlete(record: dict, years, out_dir: str, output_format: str) -> dict:
+    """
+    Download, process and write the reports of one athlete.
+
+    Returns:
+        dict: athlete_id, activities per year written, and the error if any.
+    """
+    summary = {"athlete_id": record.get("athlete_id"), "years": {}, "error": None}
+    try:
+        tokens = _valid_tokens(record)
+        athlete_id = tokens.get("athlete_id") or _athlete_id(tokens["access_token"])
+        summary["athlete_id"] = athlete_id
+
+        # refreshed ahead of expiry and on 401 while the years download
+        manager = get_token_manager(athlete_id)
+        stored = manager.store.get()
+        if stored is None or (stored.get("expires_at") or 0) < (
+            tokens.get("expires_at") or 0
+        ):
+            manager.update(tokens)
+
+        try:
+            for year in years:
+                df = sync_activities(
+                    year, athlete_id, tokens["access_token"], token_manager=manager
+                )
+                if df.empty:
+                    continue
+                path = Path(out_dir) / str(athlete_id) / str(year)
+                write_report(build_year_review(df), path, output_format)
+                summary["years"][year] = len(df)
+        finally:
+            drop_token_manager(athlete_id)
+    except Exception as error:  # one athlete must not stop the batch
+        summary["error"] = f"{type(error).__name__}: {error}"
+    return summary
+
+
+def run_batch(records, years, out_dir, output_format="json", workers=None):
+    """Reports of all `records`, one athlete per task across a process pool."""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(workers,)
+    ) as pool:
+        futures = [
+            pool.submit(run_athlete, record, years, out_dir, output_format)
+            for record in records
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate year in review reports")
+    parser.add_argument("--athletes", type=int, nargs="*", default=[])
+    parser.add_argument("--all", action="store_true", help="every stored athlete")
+    parser.add_argument("--tokens", default=None, help="JSON list of token records")
+    parser.add_argument(
+        "--years", type=parse_years, default=[datetime.now().year], help="2020-2024"
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="json")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    records = load_token_records(args.athletes, args.tokens, args.all)
+    if not records:
+        parser.error("no athletes, use --athletes, --all or --tokens")
+
+    failed = 0
+    for summary in run_batch(records, args.years, args.out, args.format, args.workers):
+        if summary["error"]:
+            failed += 1
+            print(f"Athlete {summary['athlete_id']}: failed, {summary['error']}")
+        else:
+            written = ", ".join(f"{y} ({n})" for y, n in summary["years"].items())
+            print(f"Athlete {summary['athlete_id']}: {written or 'no activities'}")
+
+    print(f"{len(records) - failed} of {len(records)} athletes done")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
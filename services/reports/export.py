@@ -0,0 +1,289 @@
+import html
+import io
+import threading
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import (
+    Image,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from services.cache import frame_fingerprint, memory_cache
+from services.reports.year_review import build_year_review
+
+EXPORT_FORMATS = {"PDF": "pdf", "HTML": "html"}
+EXPORT_MIME_TYPES = {"pdf": "application/pdf", "html": "text/html"}
+EXPORT_WORKERS = 1  # matplotlib figures are rendered one at a time
+CHART_COLOR = "#FC4C02"
+
+# section -> (label, metrics key, format) as in the Overview tab
+METRIC_SECTIONS = {
+    "Summary": [
+        ("Total Activities", "total_activities", "{}"),
+        ("Total Active Days", "total_active_days", "{}"),
+        ("Favorite Sport", "favorite_sport", "{}"),
+        ("Favorite Workout Day", "favorite_day", "{}"),
+        ("Longest Daily Streak", "best_daily_streak", "{}"),
+        ("Longest Weekly Streak", "best_weekly_streak", "{}"),
+    ],
+    "Time": [
+        ("Total Time", "total_time_hms", "{}"),
+        ("Best Activity", "max_time_hms", "{}"),
+        ("Best Week", "best_weekly_time_hms", "{}"),
+    ],
+    "Distance": [
+        ("Total Distance", "total_distance_km", "{}"),
+        ("Best Activity", "max_distance_km", "{}"),
+        ("Best Week", "best_weekly_distance_km", "{}"),
+        ("Around the World", "percent_around_world", "{:.2f}%"),
+    ],
+    "Climbing": [
+        ("Total Elevation Gain", "total_elevation_gain_m", "{}"),
+        ("Best Activity", "max_elevation_gain_m", "{}"),
+        ("Best Week", "best_weekly_elevation_gain_m", "{}"),
+        ("Mount Everest Climbed", "x_everest", "{:.2f}× up"),
+    ],
+    "Social": [
+        ("Total Strava Kudos", "total_kudos", "{}"),
+        ("Total Activity Companions", "total_athletes", "{}"),
+        ("Total Comments", "total_comments", "{}"),
+    ],
+}
+
+# chart name (see `build_year_review`) -> (title, x column, y columns), in
+# the order of the dashboard tabs
+CHART_SPECS = {
+    "weekday_month_heatmap": ("Training patterns: days vs months", None, None),
+    "activities_per_month": ("Activities per month", "month_str", ["count"]),
+    "activities_per_weekday": ("Activities per weekday", "day_name", ["count"]),
+    "weekend_vs_weekday": ("Weekend vs weekday activities", "is_weekend", ["count"]),
+    "monthly_time": (
+        "Monthly time (h)",
+        "month_str",
+        ["moving_time_h", "elapsed_time_h"],
+    ),
+    "monthly_distance": ("Monthly distance (km)", "month_str", ["total_distance_km"]),
+    "monthly_elevation": (
+        "Monthly elevation gain (m)",
+        "month_str",
+        ["total_elevation_gain_m"],
+    ),
+    "weekly_time": ("Weekly time (h)", "week", ["moving_time_h", "elapsed_time_h"]),
+    "weekly_distance": ("Weekly distance (km)", "week", ["total_distance_km"]),
+    "weekly_elevation": (
+        "Weekly elevation gain (m)",
+        "week",
+        ["total_elevation_gain_m"],
+    ),
+    "time_histogram": ("Activities by time", "label", ["count"]),
+    "distance_histogram": ("Activities by distance", "label", ["count"]),
+    "elevation_histogram": ("Activities by elevation gain", "label", ["count"]),
+}
+
+
+def metric_rows(metrics: dict) -> list[tuple[str, str, str]]:
+    """(section, label, formatted value) of the Overview metrics."""
+    return [
+        (section, label, fmt.format(metrics[key]))
+        for section, items in METRIC_SECTIONS.items()
+        for label, key, fmt in items
+    ]
+
+
+def render_chart(name: str, df: pd.DataFrame) -> bytes:
+    """One chart of the report as a PNG image."""
+    title, x_col, y_cols = CHART_SPECS[name]
+    # the object API, unlike pyplot, is safe outside the main thread
+    fig = Figure(figsize=(8, 3), dpi=120)
+    ax = fig.subplots()
+
+    if x_col is None:
+        heatmap = df.pivot(index="day_name", columns="month", values="count")
+        ax.imshow(heatmap.to_numpy(), cmap="Blues", aspect="auto")
+        ax.set_yticks(range(len(heatmap.index)), heatmap.index)
+        ax.set_xticks(range(12), df.drop_duplicates("month")["month_str"].str[:3])
+    else:
+        x = df[x_col].astype(str)
+        width = 0.8 / len(y_cols)
+        for i, col in enumerate(y_cols):
+            offset = (i - (len(y_cols) - 1) / 2) * width
+            ax.bar(
+                [p + offset for p in range(len(x))],
+                df[col],
+                width=width,
+                color=CHART_COLOR,
+                alpha=1 - 0.45 * i,
+                label=col.replace("_h", "").replace("_", " ").capitalize(),
+            )
+        step = max(1, len(x) // 26)  # keep week labels readable
+        ax.set_xticks(range(0, len(x), step), x[::step], rotation=45, ha="right")
+        if len(y_cols) > 1:
+            ax.legend(frameon=False)
+        ax.spines[["top", "right"]].set_visible(False)
+
+    ax.set_title(title, loc="left")
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def render_html(title: str, metrics: dict, images: dict[str, bytes]) -> bytes:
+    """Self-contained HTML page, charts are embedded as data URIs."""
+    sections = {}
+    for section, label, value in metric_rows(metrics):
+        sections.setdefault(section, []).append(
+            f"<tr><td>{html.escape(label)}</td><td>{html.escape(value)}</td></tr>"
+        )
+    tables = "".join(
+        f"<h2>{section}</h2><table>{''.join(rows)}</table>"
+        for section, rows in sections.items()
+    )
+    charts = "".join(
+        f'<img alt="{html.escape(CHART_SPECS[name][0])}" '
+        f'src="data:image/png;base64,{b64encode(png).decode()}">'
+        for name, png in images.items()
+    )
+    page = f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; max-width: 960px; margin: 2em auto; }}
+table {{ border-collapse: collapse; }}
+td {{ padding: 2px 16px 2px 0; }}
+img {{ display: block; max-width: 100%; margin: 1em 0; }}
+</style></head>
+<body><h1>{html.escape(title)}</h1>{tables}<h2>Charts</h2>{charts}</body></html>
+"""
+    return page.encode()
+
+
+def render_pdf(title: str, metrics: dict, images: dict[str, bytes]) -> bytes:
+    """A4 PDF with the metrics table followed by one chart per row."""
+    styles = getSampleStyleSheet()
+    rows, previous = [], None
+    for section, label, value in metric_rows(metrics):
+        rows.append([section if section != previous else "", label, value])
+        previous = section
+
+    table = Table(rows, colWidths=[3 * cm, 6 * cm, 6 * cm])
+    table.setStyle(
+        TableStyle(
+            [
+                ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+                ("TEXTCOLOR", (0, 0), (0, -1), colors.HexColor(CHART_COLOR)),
+                ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ]
+        )
+    )
+
+    story = [Paragraph(html.escape(title), styles["Title"]), table, Spacer(1, cm)]
+    for png in images.values():
+        width, height = ImageReader(io.BytesIO(png)).getSize()
+        story.append(
+            Image(io.BytesIO(png), width=17 * cm, height=17 * cm * height / width)
+        )
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title=title).build(story)
+    return buffer.getvalue()
+
+
+class ExportJob:
+    """Progress and result of one export, polled by the UI."""
+
+    def __init__(self, output_format: str, total: int = len(CHART_SPECS) + 2):
+        self.output_format = output_format
+        self.done = 0
+        self.total = total
+        self.result: bytes | None = None
+        self.error: Exception | None = None
+        self.finished = threading.Event()
+
+    @property
+    def progress(self) -> float:
+        return min(self.done / self.total, 1.0)
+
+    def step(self):
+        self.done += 1
+
+
+@memory_cache("report_exports", athlete_arg="athlete_id")
+def _render_export(
+    fingerprint: str,
+    output_format: str,
+    title: str,
+    athlete_id,
+    _df: pd.DataFrame,
+    _job: ExportJob,
+) -> bytes:
+    report = build_year_review(_df)
+    _job.step()
+
+    images = {}
+    for name in CHART_SPECS:
+        images[name] = render_chart(name, report["charts"][name])
+        _job.step()
+
+    render = render_pdf if output_format == "pdf" else render_html
+    return render(title, report["metrics"], images)
+
+
+class ExportQueue:
+    """
+    Renders report exports on background threads.
+
+    Results are cached per data fingerprint and format in the shared memory
+    cache: exporting unchanged data again returns a finished job at once,
+    and an export already being rendered is joined instead of repeated.
+    """
+
+    def __init__(self, workers: int = EXPORT_WORKERS):
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="export")
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def submit(self, df, output_format: str, title: str, athlete_id=None):
+        # the content: a filtered selection keeps its dataset's attrs
+        key = (frame_fingerprint(df), output_format, title, athlete_id)
+        with self._lock:
+            if key in self._running:
+                return self._running[key]
+
+            job = ExportJob(output_format)
+            cached = _render_export.cached(*key)
+            if cached is not None:
+                job.done, job.result = job.total, cached
+                job.finished.set()
+                return job
+
+            self._running[key] = job
+            # the selection may be a view of a shared frame, render a copy
+            self._executor.submit(self._run, key, job, df.copy())
+            return job
+
+    def _run(self, key, job: ExportJob, df: pd.DataFrame):
+        try:
+            job.result = _render_export(*key, _df=df, _job=job)
+        except Exception as error:
+            job.error = error
+        finally:
+            with self._lock:
+                del self._running[key]
+            job.finished.set()
+
+
+@st.cache_resource(show_spinner=False)
+def get_export_queue() -> ExportQueue:
+    return ExportQueue()
@@ -0,0 +1,98 @@
+import pandas as pd
+
+from services.charts_data import (
+    ELEVATION_BINS,
+    TIME_BINS,
+    process_data_histogram,
+    process_heatmap_day_month,
+    process_time_data,
+)
+from services.distance_bins import get_distance_bins
+from services.metrics_data import process_metrics_data
+from services.sketches import selection_sketches
+
+# chart name -> `process_time_data` arguments, as drawn by the dashboard tabs
+TIME_CHARTS = {
+    "monthly_time": {
+        "freq": "month",
+        "col": ["moving_time_h", "elapsed_time_h"],
+        "agg": "sum",
+    },
+    "monthly_distance": {
+        "freq": "month",
+        "col": "distance_km",
+        "agg": "sum",
+        "result_name": "total_distance_km",
+    },
+    "monthly_elevation": {
+        "freq": "month",
+        "col": "elevation_gain_m",
+        "agg": "sum",
+        "result_name": "total_elevation_gain_m",
+    },
+    "weekly_time": {
+        "freq": "week",
+        "col": ["moving_time_h", "elapsed_time_h"],
+        "agg": "sum",
+    },
+    "weekly_distance": {
+        "freq": "week",
+        "col": "distance_km",
+        "agg": "sum",
+        "result_name": "total_distance_km",
+    },
+    "weekly_elevation": {
+        "freq": "week",
+        "col": "elevation_gain_m",
+        "agg": "sum",
+        "result_name": "total_elevation_gain_m",
+    },
+    "activities_per_month": {"freq": "month", "agg": "count"},
+    "activities_per_weekday": {"freq": "day_name", "agg": "count"},
+    "weekend_vs_weekday": {"freq": "weekend", "agg": "count"},
+}
+
+
+def build_year_review(df: pd.DataFrame) -> dict:
+    """
+    Headline metrics and chart data of one athlete's year, without Streamlit.
+
+    Args:
+        df (pd.DataFrame): processed activities of one year.
+
+    Returns:
+        dict: "metrics" (as shown in the Overview tab) and "charts", chart
+        name -> pd.DataFrame.
+    """
+    categories = sorted(df["sport_category"].astype(str).unique())
+    distance_sketch = selection_sketches(df)["distance_km"]
+
+    charts = {
+        name: process_time_data(df, **kwargs) for name, kwargs in TIME_CHARTS.items()
+    }
+    charts["weekday_month_heatmap"] = process_heatmap_day_month(df)
+    charts["time_histogram"] = process_data_histogram(df, "elapsed_time", TIME_BINS)
+    charts["distance_histogram"] = process_data_histogram(
+        df, "distance_km", get_distance_bins(categories, distance_sketch)
+    )
+    charts["elevation_histogram"] = process_data_histogram(
+        df, "elevation_gain_m", ELEVATION_BINS
+    )
+
+    return {
+        # process_metrics_data adds ISO week columns to its input
+        "metrics": process_metrics_data(df.copy()),
+        "charts": charts,
+    }
+
+
+def serializable(df: pd.DataFrame) -> pd.DataFrame:
+    """Chart data with plain labels, for JSON or Parquet outputs."""
+    # histogram bins are intervals, months and days are categories
+    return df.astype(
+        {
+            col: str
+            for col, dtype in df.dtypes.items()
+            if isinstance(dtype, (pd.IntervalDtype, pd.CategoricalDtype))
+        }
+    )
@@ -0,0 +1,69 @@
+import pandas as pd
+
+from services.aggregates import SUM_COLUMNS
+
+ROLLUP_PERIODS = {
+    "daily": ["start_date"],
+    "weekly": ["year", "week"],
+    "monthly": ["year", "month"],
+}
+
+
+def _rollup(df: pd.DataFrame, period: str, sign: int = 1) -> pd.DataFrame:
+    # plain labels, so tables built from frames with different categories align
+    df = df.assign(sport_type=df["sport_type"].astype(object))
+    grouped = df.groupby(["sport_type", *ROLLUP_PERIODS[period]])
+    table = grouped[SUM_COLUMNS].sum().astype(float)
+    table["count"] = grouped.size()
+    return table * sign
+
+
+class ActivityRollups:
+    """
+    Daily, weekly and monthly totals per sport type.
+
+    Tables are maintained with deltas: inserting activities adds their totals,
+    deleting subtracts them and an edit is a delete plus an insert. The cost of
+    an update depends on the number of changed activities, not on the size of
+    the history. `version` is the store's `rollups_version` they were read at.
+    """
+
+    def __init__(self, tables: dict[str, pd.DataFrame] | None = None, version=0):
+        self.tables = tables or {}
+        self.version = version
+
+    def __sizeof__(self) -> int:
+        return sum(int(t.memory_usage(deep=True).sum()) for t in self.tables.values())
+
+    def apply(self, added: pd.DataFrame | None = None, removed=None):
+        """Apply inserted (`added`) and deleted (`removed`) activities."""
+        for period in ROLLUP_PERIODS:
+            deltas = [
+                _rollup(df, period, sign)
+                for df, sign in ((added, 1), (removed, -1))
+                if df is not None and not df.empty
+            ]
+            if not deltas:
+                continue
+
+            table = self.tables.get(period)
+            for delta in deltas:
+                table = delta if table is None else table.add(delta, fill_value=0)
+
+            table["count"] = table["count"].round().astype(int)
+            self.tables[period] = table[table["count"] > 0].sort_index()
+
+    def totals(self, period: str, year: int | None = None) -> pd.DataFrame:
+        """Rollup table of a period, optionally restricted to one year."""
+        table = self.tables.get(period)
+        if table is None:
+            index = pd.MultiIndex.from_arrays(
+                [[] for _ in range(len(ROLLUP_PERIODS[period]) + 1)],
+                names=["sport_type", *ROLLUP_PERIODS[period]],
+            )
+            return pd.DataFrame(columns=[*SUM_COLUMNS, "count"], index=index)
+
+        if year is not None and period != "daily":
+            in_year = table.index.get_level_values("year") == year
+            table = table[in_year].droplevel("year")
+        return table
@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+from services.heatmap import CELL_ZOOM, update_activity_cells
+from services.storage import athlete_dir, load_pickle, save_pickle
+
+# routes are compared as sets of cells one zoom level coarser than the heatmap
+# cells (~300 m), which absorbs GPS noise and small detours
+ROUTE_CELL_SHIFT = 1
+MIN_ROUTE_CELLS = 5  # shorter routes (treadmill, pool) are not grouped
+
+# MinHash signature of NUM_BANDS * ROWS_PER_BAND values: two routes with Jaccard
+# similarity s share at least one band with probability 1 - (1 - s**4)**16,
+# ~0.98 for s = 0.7 and ~0.05 for s = 0.3
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+ROUTE_SIMILARITY = 0.6  # exact Jaccard similarity of routes grouped together
+SIGNATURE_CHUNK_SIZE = 500
+
+_rng = np.random.default_rng(20240601)
+_HASH_A = _rng.integers(1, 2**63, NUM_BANDS * ROWS_PER_BAND, dtype=np.uint64) | 1
+_HASH_B = _rng.integers(0, 2**63, NUM_BANDS * ROWS_PER_BAND, dtype=np.uint64)
+
+
+def route_cells(cells: np.ndarray) -> np.ndarray:
+    """Coarsen heatmap cells of one activity to route cells."""
+    n = 2**CELL_ZOOM
+    x, y = (cells % n) >> ROUTE_CELL_SHIFT, (cells // n) >> ROUTE_CELL_SHIFT
+    return np.unique((y << (CELL_ZOOM - ROUTE_CELL_SHIFT)) + x)
+
+
+def minhash_signatures(cell_sets: list[np.ndarray]) -> np.ndarray:
+    """
+    MinHash signature of every cell set, one row per set.
+
+    Cells of a chunk of sets are hashed together (multiply-shift hashing on
+    uint64) and reduced per set with `np.minimum.reduceat`.
+    """
+    signatures = np.empty((len(cell_sets), len(_HASH_A)), dtype=np.uint64)
+    for start in range(0, len(cell_sets), SIGNATURE_CHUNK_SIZE):
+        chunk = cell_sets[start : start + SIGNATURE_CHUNK_SIZE]
+        cells = np.concatenate(chunk).astype(np.uint64)
+        hashes = (cells[:, None] * _HASH_A + _HASH_B) >> np.uint64(32)
+        offsets = np.cumsum([0] + [len(c) for c in chunk[:-1]])
+        signatures[start : start + len(chunk)] = np.minimum.reduceat(hashes, offsets)
+    return signatures
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted unique cell arrays."""
+    shared = len(np.intersect1d(a, b, assume_unique=True))
+    return shared / (len(a) + len(b) - shared)
+
+
+class RouteIndex:
+    """
+    Groups of activities that follow the same route.
+
+    Signatures are split into bands and every band is hashed into a bucket,
+    activities sharing a bucket with the same sport category are candidates,
+    and only candidates are compared exactly. Matches are merged with
+    union-find, so adding activities only probes the buckets of the new ones.
+    """
+
+    def __init__(self):
+        self.cells = {}  # activity id -> route cells
+        self.sports = {}  # activity id -> sport category
+        self.buckets = {}  # (band, band hash) -> activity ids
+        self.parent = {}  # union-find forest over activity ids
+
+    def __contains__(self, activity_id) -> bool:
+        return activity_id in self.sports
+
+    def _find(self, activity_id):
+        root = activity_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[activity_id] != root:  # path compression
+            self.parent[activity_id], activity_id = root, self.parent[activity_id]
+        return root
+
+    def _union(self, a, b):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    def add(self, activities: dict[int, tuple[str, np.ndarray]]):
+        """
+        Index new activities.
+
+        Args:
+            activities (dict): activity id -> (sport category, route cells).
+        """
+        new = {
+            i: value
+            for i, value in activities.items()
+            if i not in self and len(value[1]) >= MIN_ROUTE_CELLS
+        }
+        for i in activities:
+            self.sports.setdefault(i, activities[i][0])
+            self.parent.setdefault(i, i)
+        if not new:
+            return
+
+        ids = list(new)
+        signatures = minhash_signatures([new[i][1] for i in ids])
+        bands = signatures.reshape(len(ids), NUM_BANDS, ROWS_PER_BAND)
+        band_hashes = np.bitwise_xor.reduce(bands * _HASH_A[:ROWS_PER_BAND], axis=2)
+
+        for i, hashes in zip(ids, band_hashes.tolist()):
+            sport, cells = new[i]
+            self.cells[i] = cells
+            candidates = set()
+            for band, band_hash in enumerate(hashes):
+                bucket = self.buckets.setdefault((band, band_hash), [])
+                candidates.update(bucket)
+                bucket.append(i)
+
+            for other in candidates:
+                if self.sports[other] != sport or self._find(other) == self._find(i):
+                    continue
+                if jaccard(cells, self.cells[other]) >= ROUTE_SIMILARITY:
+                    self._union(i, other)
+
+    def groups(self, activity_ids) -> pd.Series:
+        """Route group (smallest activity id of the group) of each activity."""
+        return pd.Series(
+            [self._find(i) if i in self else i for i in activity_ids],
+            index=pd.Index(activity_ids, name="id"),
+            name="route",
+        )
+
+
+def update_route_index(athlete_id: int, activities: pd.DataFrame) -> RouteIndex:
+    """Route index of the athlete, with activities not indexed yet added."""
+    path = athlete_dir(athlete_id) / "route_index.pkl"
+    index = load_pickle(path) or RouteIndex()
+
+    todo = activities[~activities["id"].isin(list(index.sports))]
+    if not todo.empty:
+        cells = update_activity_cells(athlete_id, todo)
+        sports = todo.set_index("id")["sport_category"].astype(str)
+        index.add({i: (sports[i], route_cells(cells[i])) for i in todo["id"]})
+        save_pickle(index, path)
+
+    return index
+
+
+def process_routes_data(
+    df: pd.DataFrame, index: RouteIndex, min_repeats: int = 3
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Repeated routes of the selected activities.
+
+    Returns:
+        tuple:
+            - summary (pd.DataFrame): one row per route repeated at least
+              `min_repeats` times, with its name, sport, count, median
+              distance, moving time and speed.
+            - activities (pd.DataFrame): activities of those routes with
+              route name, start date, moving time (min) and speed (km/h).
+    """
+    routes = df.assign(route=index.groups(df["id"].tolist()).to_numpy())
+    routes["moving_time_min"] = routes["moving_time"] / 60
+    routes["speed_kmh"] = (
+        routes["distance_km"] / (routes["moving_time"] / 3600)
+    ).replace(np.inf, np.nan)
+
+    counts = routes["route"].value_counts()
+    routes = routes[routes["route"].isin(counts[counts >= min_repeats].index)]
+    if routes.empty:
+        return pd.DataFrame(), pd.DataFrame()
+
+    summary = (
+        routes.groupby("route")
+        .agg(
+            sport=("sport_type", lambda s: s.astype(str).mode().iloc[0]),
+            count=("id", "size"),
+            distance_km=("distance_km", "median"),
+            moving_time_min=("moving_time_min", "median"),
+            speed_kmh=("speed_kmh", "median"),
+            last=("start_date", "max"),
+        )
+        .sort_values("count", ascending=False)
+    )
+    summary["name"] = [
+        f"Route {n} – {sport}, {distance:.1f} km"
+        for n, (sport, distance) in enumerate(
+            zip(summary["sport"], summary["distance_km"]), start=1
+        )
+    ]
+
+    routes["name"] = routes["route"].map(summary["name"])
+    activities = routes[
+        ["name", "start_datetime_local", "moving_time_min", "speed_kmh"]
+    ].sort_values("start_datetime_local", ignore_index=True)
+    return summary.reset_index(drop=True), activities
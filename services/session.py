@@ -9,7 +9,9 @@ def init_session_state():
         "access_token": None,
         "refresh_token": None,
         "expires_at": None,
+        "athlete_id": None,
         "dashboard_ready": False,
+        "export_job": None,
         "selected_year": current_year,
     }
 
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+# raw columns summarised per sport and month
+SKETCH_METRICS = [
+    "distance_km",
+    "elapsed_time",
+    "elevation_gain_m",
+    "pace_min_per_km",
+    "average_speed_kmh",
+]
+SKETCH_K = 200  # accuracy: quantiles are within ~1-2% of the true rank
+SKETCH_KEYS = ["sport_type", "year", "month"]
+
+
+class KLLSketch:
+    """
+    Mergeable quantile sketch (KLL).
+
+    Values are kept in levels, an item on level h stands for 2**h values.
+    When the sketch is over budget, the lowest level over its capacity is
+    sorted and every other item is promoted to the next level. Memory stays
+    around 3 * k items however many values are added, and two sketches merge
+    by concatenating their levels.
+    """
+
+    def __init__(self, k: int = SKETCH_K):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __sizeof__(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        # compact the lowest level over capacity while the sketch is over budget
+        while True:
+            capacities = [self._capacity(h) for h in range(len(self.levels))]
+            if sum(map(len, self.levels)) <= sum(capacities):
+                return
+
+            h = next(
+                h for h, level in enumerate(self.levels) if len(level) > capacities[h]
+            )
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+
+            level = np.sort(self.levels[h])
+            odd = len(level) % 2
+            promoted = level[: len(level) - odd][self._offset :: 2]
+            self._offset ^= 1  # alternate, so promotion is unbiased on average
+
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+            self.levels[h] = level[len(level) - odd :]
+
+    def update(self, values) -> "KLLSketch":
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.n += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """New sketch summarising the values of both sketches."""
+        merged = KLLSketch(max(self.k, other.k))
+        height = max(len(self.levels), len(other.levels))
+        merged.levels = [
+            np.concatenate([s.levels[h] for s in (self, other) if h < len(s.levels)])
+            for h in range(height)
+        ]
+        merged.n = self.n + other.n
+        merged._compress()
+        return merged
+
+    def quantiles(self, qs) -> np.ndarray:
+        """Approximate quantiles (0-1), NaN for an empty sketch."""
+        qs = np.asarray(qs, dtype=float)
+        if not self.n:
+            return np.full(qs.shape, np.nan)
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2**h) for h, level in enumerate(self.levels)]
+        )
+        order = np.argsort(items)
+        ranks = np.cumsum(weights[order])
+        positions = np.searchsorted(ranks, qs * ranks[-1], side="left")
+        return items[order][np.clip(positions, 0, len(items) - 1)]
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+
+def build_sketches(df: pd.DataFrame) -> dict:
+    """
+    One sketch per metric for every (sport_type, year, month) of `df`.
+
+    Returns:
+        dict: (sport_type, year, month) -> {metric: KLLSketch}.
+    """
+    table = {}
+    if df.empty:
+        return table
+
+    keys = df[SKETCH_KEYS].astype({"sport_type": str})
+    metrics = df.reindex(columns=SKETCH_METRICS)
+    for key, rows in keys.groupby(SKETCH_KEYS).groups.items():
+        group = metrics.loc[rows]
+        table[key] = {m: KLLSketch().update(group[m]) for m in SKETCH_METRICS}
+    return table
+
+
+def merge_sketches(table: dict, sports=None, years=None) -> dict:
+    """Merge sketches of the selected sport types and years, per metric."""
+    merged = {metric: KLLSketch() for metric in SKETCH_METRICS}
+    for (sport, year, _), sketches in table.items():
+        if sports is not None and sport not in sports:
+            continue
+        if years is not None and year not in years:
+            continue
+        for metric, sketch in sketches.items():
+            merged[metric] = merged[metric].merge(sketch)
+    return merged
+
+
+def selection_sketches(df: pd.DataFrame, table: dict | None = None) -> dict:
+    """
+    Sketches of the selected activities, per metric.
+
+    Merged from the stored per-sport, per-month `table` when the selection is
+    a set of whole sports of one year, otherwise built from `df` directly.
+    """
+    if table is None:
+        return {
+            m: KLLSketch().update(df.reindex(columns=[m])[m]) for m in SKETCH_METRICS
+        }
+
+    sports = set(df["sport_type"].astype(str).unique())
+    years = set(df["year"].unique())
+    return merge_sketches(table, sports=sports, years=years)
+
+
+def quantile_bins(sketch: KLLSketch | None, n_bins: int = 5, min_count: int = 20):
+    """
+    Histogram edges at rounded quantiles, so bins hold similar counts.
+
+    Returns:
+        tuple | None: edges from 0 to infinity, None without enough data.
+    """
+    if sketch is None or len(sketch) < min_count:
+        return None
+
+    edges = []
+    for value in sketch.quantiles(np.arange(1, n_bins) / n_bins):
+        if not value > 0:
+            continue
+        step = max(1.0, 10 ** np.floor(np.log10(value)) / 2)  # 7.3->7, 23->25
+        edge = float(np.round(value / step) * step)
+        if edge > 0 and edge not in edges:
+            edges.append(edge)
+
+    if len(edges) < 2:
+        return None
+    return (0, *edges, float("inf"))
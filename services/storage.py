@@ -0,0 +1,94 @@
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: locks only hold within one process
+    fcntl = None
+
+DATA_DIR = Path(os.getenv("STRAVA_DATA_DIR", ".strava_data"))
+
+
+def athlete_dir(athlete_id: int) -> Path:
+    """Local directory holding everything stored for one athlete."""
+    path = DATA_DIR / str(athlete_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def athlete_exists(athlete_id: int) -> bool:
+    """Whether anything was stored for the athlete, without creating it."""
+    return (DATA_DIR / str(athlete_id)).is_dir()
+
+
+def delete_athlete_data(athlete_id: int):
+    """Remove everything stored for one athlete."""
+    shutil.rmtree(DATA_DIR / str(athlete_id), ignore_errors=True)
+
+
+def load_pickle(path: Path):
+    """Load a stored frame or object, None if it was never written."""
+    if not path.exists():
+        return None
+    with open(path, "rb") as fileobj:
+        return pickle.load(fileobj)
+
+
+def temp_path(path: Path) -> Path:
+    """Sibling of `path` to write before replacing it, unique per writer."""
+    # sessions of one athlete may write the same file at once
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def save_pickle(obj, path: Path):
+    """Write a frame or object atomically, readers never see a partial file."""
+    tmp_path = temp_path(path)
+    # plain pickle, so the token store can use this module without pandas
+    with open(tmp_path, "wb") as fileobj:
+        pickle.dump(obj, fileobj, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+class FileLock:
+    """
+    Exclusive lock on a file, across the threads of this process and across
+    processes (the dashboard, webhook receiver, API and batch workers).
+
+    Reentrant within a thread. Get instances through `file_lock`, so every
+    thread of the process shares one per path.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            self._file.close()  # releases the flock
+            self._file = None
+        self._lock.release()
+
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def file_lock(path: Path) -> FileLock:
+    """The process-wide `FileLock` of `path`."""
+    with _file_locks_guard:
+        return _file_locks.setdefault(str(path), FileLock(path))
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime
+from urllib.parse import urlencode
+
+import pandas as pd
+from tornado.httpclient import AsyncHTTPClient, HTTPRequest
+
+from services.data_processing import process_activities_data
+from services.streams import STREAM_KEYS, StreamStore
+from services.strava_api.constants import (
+    AUTH_URL,
+    BASE_URL,
+    PER_PAGE,
+    REQUEST_TIMEOUT_S,
+    TOKEN_URL,
+)
+from services.strava_api.rate_limit import wait_for_rate_limit, wait_for_reset
+
+ASYNC_CONCURRENCY = int(os.getenv("STRAVA_ASYNC_CONCURRENCY", "32"))
+PAGES_FAN_OUT = 4  # activity pages requested at once, the total is unknown
+STREAMS_FLUSH_EVERY = 100
+
+
+class AsyncStravaClient:
+    """
+    Strava API client on Tornado's non-blocking HTTP client.
+
+    Mirrors `StravaClient` but holds its own tokens instead of reading the
+    Streamlit session, so it can run on a background event loop. All requests
+    share one semaphore: fan-outs over pages, years and activities keep at
+    most `max_concurrency` calls in flight. Sync code uses it via `run_sync`.
+
+    With a `token_manager` (see `services.strava_api.token_manager`), tokens
+    are taken from it before every request, so downloads outliving the access
+    token go on with the refreshed one, shared with the athlete's sessions.
+    """
+
+    def __init__(
+        self,
+        access_token: str | None = None,
+        refresh_token: str | None = None,
+        expires_at: float | None = None,
+        max_concurrency: int = ASYNC_CONCURRENCY,
+        base_url: str = BASE_URL,
+        token_manager=None,
+    ):
+        self.client_id = os.getenv("STRAVA_CLIENT_ID")
+        self.client_secret = os.getenv("STRAVA_CLIENT_SECRET")
+        self.redirect_uri = os.getenv("STRAVA_REDIRECT_URI")
+
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        self.base_url = base_url
+        self.token_manager = token_manager
+
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+        self._http = None
+        self._loop = None
+
+    @property
+    def http(self) -> AsyncHTTPClient:
+        # created lazily, on the event loop that runs the requests
+        if self._http is None:
+            self._loop = asyncio.get_running_loop()
+            self._http = AsyncHTTPClient(
+                force_instance=True, max_clients=self.max_concurrency
+            )
+        return self._http
+
+    def close(self):
+        """Close the HTTP client, on its event loop whichever thread calls."""
+        http, self._http = self._http, None
+        if http is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop or self._loop.is_closed():
+            http.close()
+        else:
+            self._loop.call_soon_threadsafe(http.close)
+
+    # ---------- AUTH ----------
+
+    def get_auth_url(self) -> str:
+        return (
+            f"{AUTH_URL}"
+            f"?client_id={self.client_id}"
+            f"&response_type=code"
+            f"&redirect_uri={self.redirect_uri}"
+            f"&approval_prompt=force"
+            f"&scope=read,activity:read_all"
+        )
+
+    async def exchange_code(self, code: str) -> dict:
+        return await self._token_request(
+            {"code": code, "grant_type": "authorization_code"}
+        )
+
+    async def refresh_access_token(self) -> dict:
+        return await self._token_request(
+            {"refresh_token": self.refresh_token, "grant_type": "refresh_token"}
+        )
+
+    # ---------- TOKEN HANDLING ----------
+
+    async def _token_request(self, fields: dict) -> dict:
+        body = urlencode(
+            {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                **fields,
+            }
+        )
+        response = await self.http.fetch(
+            HTTPRequest(
+                TOKEN_URL, method="POST", body=body, request_timeout=REQUEST_TIMEOUT_S
+            )
+        )
+        data = json.loads(response.body)
+        self.access_token = data["access_token"]
+        self.refresh_token = data["refresh_token"]
+        self.expires_at = data["expires_at"]
+        return data
+
+    async def _get_valid_access_token(self) -> str:
+        if self.token_manager is not None:
+            # refreshes with a blocking request when due: off the event loop
+            tokens = await asyncio.get_running_loop().run_in_executor(
+                None, self.token_manager.tokens
+            )
+            if tokens is None:
+                raise RuntimeError("User not authenticated")
+            self.access_token = tokens["access_token"]
+            self.refresh_token = tokens["refresh_token"]
+            self.expires_at = tokens["expires_at"]
+            return self.access_token
+
+        if not self.access_token:
+            raise RuntimeError("User not authenticated")
+
+        if self.expires_at and time.time() >= self.expires_at:
+            # single flight: concurrent requests wait for one refresh
+            async with self._refresh_lock:
+                if time.time() >= self.expires_at:
+                    await self.refresh_access_token()
+
+        return self.access_token
+
+    # ---------- API ----------
+
+    async def _get(self, path: str, params: dict | None = None, allow_404=False):
+        """
+        GET an API path, None for an allowed 404.
+
+        Requests take their turn from the process's rate limiter, and a 429 is
+        retried once Strava's window resets, like `_get_page` of the sync client.
+
+        Raises:
+            RateLimitExceeded: the window resets in more than `MAX_RESET_WAIT_S`.
+        """
+        loop = asyncio.get_running_loop()
+        url = f"{self.base_url}{path}"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        while True:
+            async with self._semaphore:
+                token = await self._get_valid_access_token()
+                # blocks while the limiter is exhausted: off the event loop
+                await loop.run_in_executor(None, wait_for_rate_limit)
+                # errors are checked here, not raised into a future that may
+                # have been cancelled meanwhile
+                response = await self.http.fetch(
+                    HTTPRequest(
+                        url,
+                        headers={"Authorization": f"Bearer {token}"},
+                        request_timeout=REQUEST_TIMEOUT_S,
+                    ),
+                    raise_error=False,
+                )
+            if response.code != 429:
+                break
+            await asyncio.sleep(wait_for_reset(response.headers))
+        if allow_404 and response.code == 404:
+            return None
+        response.rethrow()
+        return json.loads(response.body)
+
+    async def get_athlete(self) -> dict:
+        return await self._get("/athlete")
+
+    # ---------- ACTIVITIES ----------
+
+    async def fetch_activities(self, after: int, before: int) -> list[dict]:
+        """
+        Download all activities started between `after` and `before` (epoch).
+
+        The number of pages is unknown, so pages are requested in rounds of
+        `PAGES_FAN_OUT` until one comes back empty.
+        """
+        activities, page = [], 1
+        while True:
+            pages = await asyncio.gather(
+                *(
+                    self._get(
+                        "/athlete/activities",
+                        {
+                            "after": after,
+                            "before": before,
+                            "per_page": PER_PAGE,
+                            "page": page + i,
+                        },
+                    )
+                    for i in range(PAGES_FAN_OUT)
+                )
+            )
+            for data in pages:
+                if not data:
+                    return activities
+                activities.extend(data)
+            page += PAGES_FAN_OUT
+
+    async def get_activities(self, year: int) -> pd.DataFrame:
+        after = int(datetime(year, 1, 1).timestamp())
+        before = int(datetime(year + 1, 1, 1).timestamp())
+        activities = await self.fetch_activities(after, before)
+        return process_activities_data(pd.DataFrame(activities))
+
+    async def get_activities_by_year(self, years) -> dict[int, pd.DataFrame]:
+        """Activities of several years, partitions downloaded concurrently."""
+        frames = await asyncio.gather(*(self.get_activities(y) for y in years))
+        return dict(zip(years, frames))
+
+    async def get_activity(self, activity_id: int) -> dict | None:
+        """One activity, None if it no longer exists or is not visible."""
+        return await self._get(f"/activities/{activity_id}", allow_404=True)
+
+    async def get_activity_streams(self, activity_id: int) -> dict[str, list]:
+        """Streams of one activity keyed by type, empty for manual activities."""
+        data = await self._get(
+            f"/activities/{activity_id}/streams",
+            {"keys": ",".join(STREAM_KEYS), "key_by_type": "true"},
+            allow_404=True,
+        )
+        return {key: stream["data"] for key, stream in (data or {}).items()}
+
+    async def fetch_streams(
+        self, activity_ids, store: StreamStore, progress: dict | None = None
+    ) -> int:
+        """
+        Fetch streams missing from `store`, all requests in flight at once
+        up to the concurrency limit.
+
+        Downloaded streams are flushed to the store in batches, so a failure,
+        a cancellation or `RateLimitExceeded` keeps everything fetched before
+        it. `progress` is
+        updated in place with "done" and "total".
+
+        Returns:
+            int: number of activities fetched.
+        """
+        missing = [i for i in activity_ids if i not in store]
+        progress = progress if progress is not None else {}
+        progress.update(done=0, total=len(missing))
+
+        async def fetch(activity_id):
+            return activity_id, await self.get_activity_streams(activity_id)
+
+        tasks = [asyncio.ensure_future(fetch(i)) for i in missing]
+        fetched = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                activity_id, streams = await next_done
+                fetched[activity_id] = streams
+                progress["done"] += 1
+                if len(fetched) >= STREAMS_FLUSH_EVERY:
+                    store.append_many(fetched)
+                    fetched = {}
+        finally:
+            for task in tasks:
+                task.cancel()
+            store.append_many(fetched)
+
+        return progress["done"]
+
+
+class _EventLoopThread:
+    """Event loop running forever in a daemon thread, shared by sync callers."""
+
+    _lock = threading.Lock()
+    _loop = None
+
+    @classmethod
+    def loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._lock:
+            if cls._loop is None:
+                cls._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=cls._loop.run_forever, name="strava-async", daemon=True
+                ).start()
+        return cls._loop
+
+
+def run_sync(coro, timeout: float | None = None, poll=None, poll_interval=0.1):
+    """
+    Run a coroutine on the background event loop and wait for its result.
+
+    `poll` is called from the calling thread while waiting (e.g. to draw a
+    progress bar). If the caller is interrupted, for example by a Streamlit
+    rerun raised from `poll`, or the timeout expires, the coroutine is
+    cancelled, which cancels every request it has in flight.
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, _EventLoopThread.loop())
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                return future.result(timeout=poll_interval)
+            except FutureTimeoutError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError("Strava request timed out") from None
+                if poll:
+                    poll()
+    finally:
+        future.cancel()
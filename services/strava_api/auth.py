@@ -0,0 +1,149 @@
+import os
+import time
+
+import requests
+import streamlit as st
+
+from services.strava_api.constants import AUTH_URL, BASE_URL, TOKEN_URL
+from services.strava_api.token_manager import (
+    drop_token_manager,
+    get_token_manager,
+    request_tokens,
+)
+from services.token_store import (
+    TOKEN_FIELDS,
+    TokenStore,
+    create_session,
+    end_session,
+    resume_session,
+)
+
+
+class StravaAuth:
+    """
+    Login, sessions and tokens of the current Streamlit session.
+
+    Kept apart from `StravaClient` so the login and settings screens render
+    without importing the data stack (pandas, the activity store, charts).
+    """
+
+    def __init__(self):
+        self.client_id = os.getenv("STRAVA_CLIENT_ID")
+        self.client_secret = os.getenv("STRAVA_CLIENT_SECRET")
+        self.redirect_uri = os.getenv("STRAVA_REDIRECT_URI")
+
+    # ---------- AUTH ----------
+
+    def get_auth_url(self) -> str:
+        return (
+            f"{AUTH_URL}"
+            f"?client_id={self.client_id}"
+            f"&response_type=code"
+            f"&redirect_uri={self.redirect_uri}"
+            f"&approval_prompt=force"
+            f"&scope=read,activity:read_all"
+        )
+
+    def exchange_code(self, code: str):
+        response = requests.post(
+            TOKEN_URL,
+            data={
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "code": code,
+                "grant_type": "authorization_code",
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        st.session_state.athlete_id = data["athlete"]["id"]
+        get_token_manager(st.session_state.athlete_id).update(data)
+        self._store_tokens(data)
+
+    def refresh_token(self):
+        athlete_id = st.session_state.get("athlete_id")
+        if athlete_id:
+            tokens = get_token_manager(athlete_id).refresh(force=True)
+        else:
+            tokens = request_tokens(st.session_state.refresh_token)
+        self._store_tokens(tokens)
+
+    def logout(self):
+        if "access_token" in st.session_state:
+            requests.post(
+                f"{BASE_URL}/oauth/deauthorize",
+                headers={"Authorization": f"Bearer {st.session_state.access_token}"},
+            )
+
+        for key in ("access_token", "refresh_token", "expires_at", "dashboard_ready"):
+            st.session_state[key] = None
+        st.cache_data.clear()
+        if "session" in st.query_params:
+            end_session(st.query_params["session"])
+            st.query_params.clear()
+        if st.session_state.get("athlete_id"):
+            # the shared cache imports the data stack, which is loaded anyway
+            # once the athlete has opened a dashboard
+            from services.cache import get_cache
+
+            drop_token_manager(st.session_state.athlete_id)
+            TokenStore(st.session_state.athlete_id).delete()
+            get_cache().invalidate(athlete_id=st.session_state.athlete_id)
+            st.session_state.athlete_id = None
+
+    # ---------- SESSIONS ----------
+
+    def start_session(self) -> str:
+        """Key to put in the page URL, see `restore_session`."""
+        return create_session(st.session_state.athlete_id)
+
+    def restore_session(self, key: str) -> str | None:
+        """
+        Log in again from the token store after the session state was reset
+        (e.g. a page reload). Returns the key replacing the used one, None if
+        the key or the tokens are gone.
+        """
+        athlete_id = resume_session(key)
+        tokens = get_token_manager(athlete_id).tokens() if athlete_id else None
+        if tokens is None:
+            return None
+
+        st.session_state.athlete_id = athlete_id
+        self._store_tokens(tokens)
+        return self.start_session()
+
+    # ---------- TOKEN HANDLING ----------
+
+    def _store_tokens(self, data: dict):
+        st.session_state.access_token = data["access_token"]
+        st.session_state.refresh_token = data["refresh_token"]
+        st.session_state.expires_at = data["expires_at"]
+
+    def _get_valid_access_token(self):
+        if not st.session_state.access_token:
+            raise RuntimeError("User not authenticated")
+
+        athlete_id = st.session_state.get("athlete_id")
+        if athlete_id:
+            # refreshed ahead of expiry on a background thread, shared by
+            # all sessions of the athlete
+            manager = get_token_manager(athlete_id)
+            if manager.tokens() is None:  # logged in before tokens were stored
+                manager.update({key: st.session_state[key] for key in TOKEN_FIELDS})
+            self._store_tokens(manager.tokens())
+        elif st.session_state.expires_at and time.time() >= st.session_state.expires_at:
+            self.refresh_token()
+
+        return st.session_state.access_token
+
+    # ---------- API ----------
+
+    def get_athlete(self) -> dict:
+        token = self._get_valid_access_token()
+
+        response = requests.get(
+            f"{BASE_URL}/athlete",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        response.raise_for_status()
+        return response.json()
@@ -1,146 +1,311 @@
 import os
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
 import requests
 import streamlit as st
 import pandas as pd
 from datetime import datetime
 
+from services.activity_store import ActivityStore
+from services.cache import frame_fingerprint, memory_cache
 from services.data_processing import process_activities_data
+from services.dedup import dedup_delta, deduplicate
+from services.frame_store import share_frame
+from services.rollups import ActivityRollups
+from services.streams import StreamStore
+from services.strava_api.async_client import AsyncStravaClient, run_sync
+from services.strava_api.auth import StravaAuth
+from services.strava_api.constants import BASE_URL, PER_PAGE, REQUEST_TIMEOUT_S
+from services.strava_api.journal import PageJournal, journal_lock
+from services.strava_api.rate_limit import (
+    RateLimitExceeded,
+    rate_limit_reset,
+    wait_for_rate_limit,
+    wait_for_reset,
+)
+from services.strava_api.token_manager import get_token_manager
 
-AUTH_URL = "https://www.strava.com/oauth/authorize"
-TOKEN_URL = "https://www.strava.com/oauth/token"
-BASE_URL = "https://www.strava.com/api/v3"
+# with push events the cache is invalidated as activities change, the TTL is
+# only a fallback for missed events
+ACTIVITIES_TTL_S = 86400 if os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN") else 3600
 
+# tail syncs miss edits and deletions of older activities: download the
+# whole year again this often, and apply what changed
+RECONCILE_INTERVAL_S = (
+    7 * 86400 if os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN") else 6 * 3600
+)
 
-class StravaClient:
-    def __init__(self):
-        self.client_id = os.getenv("STRAVA_CLIENT_ID")
-        self.client_secret = os.getenv("STRAVA_CLIENT_SECRET")
-        self.redirect_uri = os.getenv("STRAVA_REDIRECT_URI")
+PAGE_RETRIES = 3
+RETRY_BACKOFF_S = 1.0  # doubled after every failed attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+STATS_TIMEOUT_S = 3  # the stats only stand in for a download
+# downloads and stats requests the dashboard waits on together
+BACKGROUND_WORKERS = 32
 
-    # ---------- AUTH ----------
 
-    def get_auth_url(self) -> str:
-        return (
-            f"{AUTH_URL}"
-            f"?client_id={self.client_id}"
-            f"&response_type=code"
-            f"&redirect_uri={self.redirect_uri}"
-            f"&approval_prompt=force"
-            f"&scope=read,activity:read_all"
-        )
+class StravaClient(StravaAuth):
+    """Activities, streams and stored aggregates of the logged in athlete."""
 
-    def exchange_code(self, code: str):
-        response = requests.post(
-            TOKEN_URL,
-            data={
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "code": code,
-                "grant_type": "authorization_code",
-            },
-        )
-        response.raise_for_status()
-        self._store_tokens(response.json())
-
-    def refresh_token(self):
-        response = requests.post(
-            TOKEN_URL,
-            data={
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "grant_type": "refresh_token",
-                "refresh_token": st.session_state.refresh_token,
-            },
-        )
-        response.raise_for_status()
-        self._store_tokens(response.json())
+    # ---------- ACTIVITIES ----------
 
-    def logout(self):
-        if "access_token" in st.session_state:
-            requests.post(
-                f"{BASE_URL}/oauth/deauthorize",
-                headers={"Authorization": f"Bearer {st.session_state.access_token}"},
-            )
+    def get_activities(self, year: int) -> pd.DataFrame:
+        return self._activities_call(year)()
 
-        for key in ("access_token", "refresh_token", "expires_at", "dashboard_ready"):
-            st.session_state[key] = None
-        st.cache_data.clear()
+    def start_activities(self, year: int) -> Future:
+        """`get_activities` on a worker thread, to wait on with other requests."""
+        return _background.submit(self._activities_call(year))
 
-    # ---------- TOKEN HANDLING ----------
+    def _activities_call(self, year: int):
+        # session state is only readable on the script thread, resolve it here
+        token = self._get_valid_access_token()
+        athlete_id = self.get_athlete()["id"]
+        st.session_state.athlete_id = athlete_id
+        store = ActivityStore(athlete_id)
+        cached = partial(
+            self._get_activities_cached, year, athlete_id, store.pushed_version, token
+        )
+        return lambda: share_frame(cached())
 
-    def _store_tokens(self, data: dict):
-        st.session_state.access_token = data["access_token"]
-        st.session_state.refresh_token = data["refresh_token"]
-        st.session_state.expires_at = data["expires_at"]
+    def activities_cached(self, year: int) -> bool:
+        """Whether `get_activities(year)` returns without downloading."""
+        athlete_id = st.session_state.athlete_id
+        if not athlete_id:
+            return False
+        store = ActivityStore(athlete_id)
+        cached = self._get_activities_cached.cached(
+            year, athlete_id, store.pushed_version
+        )
+        return cached is not None
 
-    def _get_valid_access_token(self):
-        if not st.session_state.access_token:
-            raise RuntimeError("User not authenticated")
+    def start_athlete_stats(self) -> Future:
+        """
+        Year to date and all time run, ride and swim totals, in one request
+        on a worker thread, so it runs alongside the download it stands in for.
 
-        if not st.session_state.expires_at:
-            return st.session_state.access_token
+        Only shown while activities download, so a failed request resolves to
+        None instead of raising.
+        """
+        token = self._get_valid_access_token()
+        athlete_id = st.session_state.athlete_id or self.get_athlete()["id"]
+        return _background.submit(fetch_athlete_stats, athlete_id, token)
 
-        if time.time() >= st.session_state.expires_at:
-            self._refresh_token()
+    def sync_streams(self, activity_ids, on_progress=None) -> StreamStore:
+        """
+        Download streams of activities that are not stored yet.
 
-        return st.session_state.access_token
+        Requests run concurrently on the async client, this call blocks until
+        they are done and is cancelled with the script run.
 
-    # ---------- API ----------
+        Args:
+            activity_ids (list[int]): activities to sync.
+            on_progress (callable, optional): called with (done, total).
+        """
+        athlete_id = st.session_state.athlete_id
+        store = StreamStore(athlete_id)
+        self._get_valid_access_token()  # the manager holds the session's tokens
+        client = AsyncStravaClient(token_manager=get_token_manager(athlete_id))
+        progress = {}
 
-    def get_athlete(self) -> dict:
-        token = self._get_valid_access_token()
+        def poll():
+            if on_progress and progress.get("total"):
+                on_progress(progress["done"], progress["total"])
 
-        response = requests.get(
-            f"{BASE_URL}/athlete",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        response.raise_for_status()
-        return response.json()
+        try:
+            run_sync(client.fetch_streams(activity_ids, store, progress), poll=poll)
+        finally:
+            client.close()
+        return store
 
-    # ---------- ACTIVITIES ----------
+    def get_rollups(self) -> ActivityRollups:
+        """Stored rollups of the athlete loaded by `get_activities`."""
+        return load_rollups(st.session_state.athlete_id)
 
-    def get_activities(self, year: int) -> pd.DataFrame:
-        token = self._get_valid_access_token()
-        athlete_id = self.get_athlete()["id"]
-        return self._get_activities_cached(year, athlete_id, token)
+    def get_sketches(self) -> dict:
+        """Stored quantile sketches of the athlete loaded by `get_activities`."""
+        return load_sketches(st.session_state.athlete_id)
 
     @staticmethod
-    @st.cache_data(ttl=3600)
+    @memory_cache("activities", ttl=ACTIVITIES_TTL_S, athlete_arg="athlete_id")
     def _get_activities_cached(
         year: int,
         athlete_id: int,
-        token: str,
+        pushed_version: int,
+        _token: str,
     ) -> pd.DataFrame:
         """
-        Cache per (athlete_id, year)
+        Cache per (athlete_id, year), refreshed when pushed changes are applied
+
+        Kept in the shared in-process cache (not pickled per hit), callers must
+        only work on views returned by `share_frame`.
         """
-        after = int(datetime(year, 1, 1).timestamp())
-        before = int(datetime(year + 1, 1, 1).timestamp())
+        df = sync_activities(year, athlete_id, _token)
+        df.attrs["dataset_id"] = frame_fingerprint(df)
+        return df
+
 
-        activities = []
-        page = 1
+_background = ThreadPoolExecutor(BACKGROUND_WORKERS, thread_name_prefix="strava")
 
-        while True:
+
+def fetch_athlete_stats(athlete_id: int, token: str) -> dict | None:
+    """The athlete's Strava totals, None if the request or its body fails."""
+    try:
+        response = requests.get(
+            f"{BASE_URL}/athletes/{athlete_id}/stats",
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=STATS_TIMEOUT_S,
+        )
+        response.raise_for_status()
+        return response.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def load_rollups(athlete_id: int) -> ActivityRollups:
+    """Stored rollups of an athlete, cached until the store changes."""
+    store = ActivityStore(athlete_id)
+    return _load_rollups(store.athlete_id, store.rollups_version)
+
+
+def load_sketches(athlete_id: int) -> dict:
+    """Stored quantile sketches of an athlete, cached until the store changes."""
+    store = ActivityStore(athlete_id)
+    return _load_sketches(store.athlete_id, store.sketches_version)
+
+
+@memory_cache("rollups", athlete_arg="athlete_id")
+def _load_rollups(athlete_id: int, version: int) -> ActivityRollups:
+    """Stored rollups, without the duplicates `deduplicate` drops or merges."""
+    store = ActivityStore(athlete_id)
+    rollups = store.rollups()
+    for year in store.years():
+        added, removed = _dedup_delta(athlete_id, year, store.year_version(year))
+        if removed is not None:
+            rollups.apply(added=added, removed=removed)
+    return rollups
+
+
+@memory_cache("dedup_deltas", athlete_arg="athlete_id")
+def _dedup_delta(athlete_id: int, year: int, version: int) -> tuple:
+    """`dedup_delta` of a stored year, only recomputed when the year changes."""
+    return dedup_delta(ActivityStore(athlete_id).load(year))
+
+
+@memory_cache("sketches", athlete_arg="athlete_id")
+def _load_sketches(athlete_id: int, version: int) -> dict:
+    return ActivityStore(athlete_id).sketches()
+
+
+def _get_page(token: str, params: dict, token_manager=None) -> list[dict]:
+    """
+    One page of activities, transient failures are retried with backoff.
+
+    On 429 the retry waits for Strava's window to reset, read from the rate
+    limit headers. If that is more than `MAX_RESET_WAIT_S` away (e.g. the
+    daily limit), `RateLimitExceeded` is raised: saved pages of the download
+    are resumed from its journal once the limit resets.
+
+    With a `token_manager`, its current token is used for every request and
+    a rejected one (401) is refreshed and retried once.
+    """
+    refreshed = False
+    for attempt in range(PAGE_RETRIES + 1):
+        delay = RETRY_BACKOFF_S * 2**attempt
+        if token_manager is not None:
+            token = token_manager.tokens()["access_token"]
+        wait_for_rate_limit()
+        try:
             response = requests.get(
                 f"{BASE_URL}/athlete/activities",
                 headers={"Authorization": f"Bearer {token}"},
-                params={
-                    "after": after,
-                    "before": before,
-                    "per_page": 200,
-                    "page": page,
-                },
-                timeout=10,
+                params=params,
+                timeout=REQUEST_TIMEOUT_S,
             )
-            response.raise_for_status()
+            if response.status_code == 401 and token_manager and not refreshed:
+                token_manager.refresh(force=True)
+                refreshed = True
+                continue
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response.json()
+            if response.status_code == 429:
+                delay = wait_for_reset(response.headers)
+                if attempt == PAGE_RETRIES:
+                    raise RateLimitExceeded(rate_limit_reset(response.headers))
+            elif attempt == PAGE_RETRIES:
+                response.raise_for_status()
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == PAGE_RETRIES:
+                raise
+        time.sleep(delay)
 
-            data = response.json()
-            if not data:
-                break
 
+def fetch_activities(
+    token: str,
+    after: int,
+    before: int,
+    journal: PageJournal | None = None,
+    token_manager=None,
+) -> list[dict]:
+    """
+    Download all activities started between `after` and `before` (epoch).
+
+    With a `journal`, every page is saved as it arrives and the download
+    resumes after the last saved page, so a failure does not lose the pages
+    downloaded before it. See `_get_page` for `token_manager`.
+    """
+    activities = []
+    page = len(journal) + 1 if journal is not None else 1
+
+    while True:
+        data = _get_page(
+            token,
+            {"after": after, "before": before, "per_page": PER_PAGE, "page": page},
+            token_manager,
+        )
+        if not data:
+            break
+
+        if journal is not None:
+            journal.append(page, data)
+        else:
             activities.extend(data)
-            page += 1
+        page += 1
+
+    return journal.activities() if journal is not None else activities
+
+
+def sync_activities(
+    year: int, athlete_id: int, token: str, token_manager=None
+) -> pd.DataFrame:
+    """
+    Bring the athlete's stored year up to date and return it deduplicated.
+
+    Activities already in the athlete's store are not downloaded again, only
+    the tail of the year is, and pages of a failed download are resumed from
+    its journal. Every `RECONCILE_INTERVAL_S` the whole year is downloaded
+    instead, to pick up edited and deleted activities. Needs no Streamlit
+    session (see `services.reports.batch`), long downloads pass a
+    `token_manager` to refresh the token as they go.
+    """
+    store = ActivityStore(athlete_id)
+    # a second session of the athlete waits, then downloads only what the
+    # first one did not store
+    with journal_lock(athlete_id, year):
+        stored = store.load(year)
+
+        after = int(datetime(year, 1, 1).timestamp())
+        before = int(datetime(year + 1, 1, 1).timestamp())
+        reconcile = time.time() - store.reconciled_at(year) >= RECONCILE_INTERVAL_S
+        if stored is not None and not stored.empty and not reconcile:
+            # local start times, a day of margin covers any time zone offset
+            last_start = stored["start_datetime_local"].max().timestamp()
+            after = max(after, int(last_start) - 86400)
 
-        df = pd.DataFrame(activities)
-        return process_activities_data(df)
+        journal = PageJournal(athlete_id, year, after, before)
+        activities = fetch_activities(token, after, before, journal, token_manager)
+        df = process_activities_data(pd.DataFrame(activities))
+        df = store.replace(year, df) if reconcile else store.upsert(year, df)
+        journal.clear()
+    return deduplicate(df)  # the store keeps every upload, totals must not
@@ -0,0 +1,11 @@
+import os
+
+# overridable to point the app at a local Strava stand-in, see benchmarks/
+STRAVA_URL = os.getenv("STRAVA_URL", "https://www.strava.com").rstrip("/")
+
+AUTH_URL = f"{STRAVA_URL}/oauth/authorize"
+TOKEN_URL = f"{STRAVA_URL}/oauth/token"
+BASE_URL = f"{STRAVA_URL}/api/v3"
+
+PER_PAGE = 200
+REQUEST_TIMEOUT_S = 10
@@ -0,0 +1,57 @@
+import shutil
+
+from services.storage import athlete_dir, file_lock, load_pickle, save_pickle
+
+
+class PageJournal:
+    """
+    Activity pages of one download, persisted as they arrive.
+
+    A download is identified by the athlete, year and its (after, before)
+    window, which only moves once the download is stored. If a page fails,
+    the next attempt at the same window resumes after the last saved page
+    instead of page 1. Pages are one file each, so appending stays cheap
+    for long histories.
+
+    Sessions of one athlete share the journals: open, download and clear one
+    while holding `journal_lock`, so no session removes pages another reads.
+    """
+
+    def __init__(self, athlete_id: int, year: int, after: int, before: int):
+        self.root = athlete_dir(athlete_id) / "downloads"
+        self.path = self.root / f"{year}_{after}_{before}"
+        # a journal of another window for this year is stale
+        for path in self.root.glob(f"{year}_*"):
+            if path != self.path:
+                shutil.rmtree(path, ignore_errors=True)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _page_path(self, page: int):
+        return self.path / f"page_{page:05d}.pkl"
+
+    def __len__(self) -> int:
+        """Number of pages saved, the download resumes at the next one."""
+        pages = 0
+        while self._page_path(pages + 1).exists():
+            pages += 1
+        return pages
+
+    def append(self, page: int, activities: list[dict]):
+        save_pickle(activities, self._page_path(page))
+
+    def activities(self) -> list[dict]:
+        return [
+            activity
+            for page in range(1, len(self) + 1)
+            for activity in load_pickle(self._page_path(page))
+        ]
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def journal_lock(athlete_id: int, year: int):
+    """Held around a download of the athlete's year, from journal to store."""
+    root = athlete_dir(athlete_id) / "downloads"
+    root.mkdir(exist_ok=True)
+    return file_lock(root / f"{year}.lock")
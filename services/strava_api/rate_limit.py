@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import deque
+
+# Strava's default application limits, shared by every process using the app
+API_LIMITS = (
+    (int(os.getenv("STRAVA_RATE_LIMIT_15MIN", "200")), 900),
+    (int(os.getenv("STRAVA_RATE_LIMIT_DAILY", "2000")), 86400),
+)
+# Strava's windows reset at every quarter hour and at midnight UTC, in the
+# order of the values of its X-RateLimit-Limit and X-RateLimit-Usage headers
+STRAVA_WINDOWS_S = (900, 86400)
+RATE_LIMIT_HEADERS = ("X-RateLimit", "X-ReadRateLimit")
+# longer waits for a window to reset raise instead, to be resumed later
+MAX_RESET_WAIT_S = int(os.getenv("STRAVA_RATE_LIMIT_MAX_WAIT_S", "60"))
+
+
+class RateLimitExceeded(Exception):
+    """Strava refuses requests until `reset_at` (epoch)."""
+
+    def __init__(self, reset_at: float):
+        super().__init__(f"Strava rate limit exceeded until {reset_at:.0f}")
+        self.reset_at = reset_at
+
+
+def rate_limit_reset(headers, now: float | None = None) -> float:
+    """
+    When Strava's exhausted rate limit windows reset (epoch), from the
+    headers of a 429 response. Without usage headers the 15 minute window
+    is assumed.
+    """
+    now = time.time() if now is None else now
+    reset_at = None
+    for prefix in RATE_LIMIT_HEADERS:
+        usage = headers.get(f"{prefix}-Usage")
+        limit = headers.get(f"{prefix}-Limit")
+        if not usage or not limit:
+            continue
+        for used, allowed, period in zip(
+            usage.split(","), limit.split(","), STRAVA_WINDOWS_S
+        ):
+            if int(used) >= int(allowed):
+                window_end = (now // period + 1) * period
+                reset_at = max(reset_at or now, window_end)
+    if reset_at is None:
+        reset_at = (now // STRAVA_WINDOWS_S[0] + 1) * STRAVA_WINDOWS_S[0]
+    return reset_at
+
+
+def wait_for_reset(headers) -> float:
+    """
+    Seconds to wait before retrying a 429 response.
+
+    Raises:
+        RateLimitExceeded: the window resets in more than `MAX_RESET_WAIT_S`.
+    """
+    reset_at = rate_limit_reset(headers)
+    wait = reset_at - time.time()
+    if wait > MAX_RESET_WAIT_S:
+        raise RateLimitExceeded(reset_at)
+    return max(wait, 0.0)
+
+
+class RateLimiter:
+    """
+    Blocks callers so at most `calls` requests start in any `period` seconds,
+    for each (calls, period) limit.
+
+    Sliding windows of request start times: exact, and cheap at Strava's
+    limits of a few thousand calls.
+    """
+
+    def __init__(self, limits=API_LIMITS):
+        self.limits = [(max(1, int(calls)), period) for calls, period in limits]
+        self._starts = [deque() for _ in self.limits]
+        self._lock = threading.Lock()
+
+    def share(self, workers: int) -> "RateLimiter":
+        """Limiter allowing one of `workers` equal shares of these limits."""
+        return RateLimiter([(calls / workers, period) for calls, period in self.limits])
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = 0.0
+                for (calls, period), starts in zip(self.limits, self._starts):
+                    while starts and starts[0] <= now - period:
+                        starts.popleft()
+                    if len(starts) >= calls:
+                        wait = max(wait, starts[0] + period - now)
+                if not wait:
+                    for starts in self._starts:
+                        starts.append(now)
+                    return
+            time.sleep(wait)
+
+
+_limiter = None
+
+
+def set_rate_limiter(limiter: RateLimiter | None):
+    """Limit API calls of this process, e.g. to a batch worker's share."""
+    global _limiter
+    _limiter = limiter
+
+
+def wait_for_rate_limit():
+    """Called before every API request, a no-op unless a limiter is set."""
+    if _limiter is not None:
+        _limiter.acquire()
@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+
+from services.strava_api.constants import REQUEST_TIMEOUT_S, TOKEN_URL
+from services.token_store import TokenStore
+
+logger = logging.getLogger(__name__)
+
+# Strava hands out a new access token only when less than an hour is left
+REFRESH_AHEAD_S = 1800
+EXPIRY_MARGIN_S = 60  # a token this close to expiry is refreshed before use
+CHECK_INTERVAL_S = (30, 300)  # bounds of the background thread's sleep
+
+
+def request_tokens(refresh_token: str) -> dict:
+    """New tokens for a refresh token, straight from Strava."""
+    response = requests.post(
+        TOKEN_URL,
+        data={
+            "client_id": os.getenv("STRAVA_CLIENT_ID"),
+            "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        },
+        timeout=REQUEST_TIMEOUT_S,
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+class TokenManager:
+    """
+    Tokens of one athlete, refreshed ahead of expiry on a background thread.
+
+    There is one manager per athlete and process, shared by all Streamlit
+    sessions, and backed by the athlete's `TokenStore`, so tokens survive
+    session resets and are shared with the webhook worker. Refreshes are
+    single flight: callers racing on an expired token wait for one request.
+    A refresh that fails with a client error (revoked access) stops the
+    thread, other failures are retried.
+    """
+
+    def __init__(self, athlete_id: int):
+        self.store = TokenStore(athlete_id)
+        self._tokens = self.store.get()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def tokens(self) -> dict | None:
+        """Current tokens, refreshed first if the thread fell behind."""
+        if self._tokens is None:
+            return None
+        if self._thread is None:  # tokens stored by an earlier process
+            self.start()
+        if self._expires_in() < EXPIRY_MARGIN_S:
+            self.refresh(ahead=EXPIRY_MARGIN_S)
+        return self._tokens
+
+    def update(self, tokens: dict):
+        """Take tokens from a login, persist them and keep them fresh."""
+        with self._lock:
+            self._tokens = tokens
+            self.store.save(tokens)
+        self.start()
+
+    def refresh(self, ahead: float = REFRESH_AHEAD_S, force: bool = False) -> dict:
+        """
+        Refresh unless the tokens are valid for `ahead` seconds more.
+
+        `force` refreshes whatever the expiry, e.g. after Strava rejected the
+        access token, unless another process refreshed it meanwhile.
+        """
+        with self._lock:
+            current = self._tokens
+            stored = self.store.get()
+            if stored and (
+                current is None
+                or (stored.get("expires_at") or 0) > (current.get("expires_at") or 0)
+            ):
+                self._tokens = stored  # refreshed by another process
+            if self._tokens is None:
+                raise RuntimeError("User not authenticated")
+            if force and self._tokens is not current:
+                return self._tokens  # not the tokens that were rejected
+            if not force and self._expires_in() >= ahead:
+                return self._tokens
+
+            tokens = request_tokens(self._tokens["refresh_token"])
+            self._tokens = tokens
+            self.store.save(tokens)
+            return tokens
+
+    def _expires_in(self) -> float:
+        expires_at = (self._tokens or {}).get("expires_at")
+        return float("inf") if expires_at is None else expires_at - time.time()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="strava-tokens", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        low, high = CHECK_INTERVAL_S
+        delay = 0
+        while not self._stop.wait(delay):
+            try:
+                self.refresh()
+            except requests.HTTPError as error:
+                if error.response.status_code in (400, 401, 403):
+                    logger.warning("Token refresh rejected, stopping: %s", error)
+                    return
+                logger.warning("Token refresh failed, retrying: %s", error)
+            except requests.RequestException as error:
+                logger.warning("Token refresh failed, retrying: %s", error)
+            except RuntimeError as error:  # tokens deleted, e.g. on logout
+                logger.warning("Token refresh stopped: %s", error)
+                return
+            delay = min(max(self._expires_in() - REFRESH_AHEAD_S, low), high)
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(athlete_id: int) -> TokenManager:
+    """The process-wide manager of an athlete's tokens."""
+    with _managers_lock:
+        if athlete_id not in _managers:
+            _managers[athlete_id] = TokenManager(athlete_id)
+        return _managers[athlete_id]
+
+
+def drop_token_manager(athlete_id: int):
+    """Stop refreshing an athlete's tokens, e.g. after logout."""
+    with _managers_lock:
+        manager = _managers.pop(athlete_id, None)
+    if manager is not None:
+        manager.stop()
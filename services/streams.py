@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+from services.storage import athlete_dir, file_lock, load_pickle, save_pickle
+
+STREAM_KEYS = ["time", "distance", "altitude", "heartrate", "watts", "latlng"]
+
+# one file per column, latlng is split into lat and lng
+STREAM_COLUMNS = {
+    "time": np.float64,
+    "distance": np.float64,
+    "altitude": np.float32,
+    "heartrate": np.float32,
+    "watts": np.float32,
+    "lat": np.float64,
+    "lng": np.float64,
+}
+
+
+def _split_latlng(streams: dict) -> dict[str, np.ndarray]:
+    columns = {key: value for key, value in streams.items() if key != "latlng"}
+    latlng = streams.get("latlng")
+    if latlng is not None and len(latlng):
+        latlng = np.asarray(latlng, dtype=np.float64).reshape(-1, 2)
+        columns["lat"], columns["lng"] = latlng[:, 0], latlng[:, 1]
+    return columns
+
+
+class StreamStore:
+    """
+    Per-activity streams stored column by column.
+
+    Each column (time, distance, heartrate, ...) of all activities is appended
+    to one flat binary file, and an index keeps the offset and length of every
+    activity in every column. Reads memory-map the column files, so scanning
+    thousands of activities only pages in the samples that are touched.
+
+    Appends hold the athlete's streams file lock, shared by every instance
+    and process, and merge into the index as stored, not as loaded.
+    """
+
+    def __init__(self, athlete_id: int):
+        self.path = athlete_dir(athlete_id) / "streams"
+        self.path.mkdir(exist_ok=True)
+        self._maps = {}
+        self.index = self._load_index()
+
+    def _load_index(self) -> pd.DataFrame:
+        index = load_pickle(self._index_path)
+        if index is None:
+            columns = [
+                f"{col}_{field}"
+                for col in STREAM_COLUMNS
+                for field in ("offset", "length")
+            ]
+            index = pd.DataFrame(columns=columns, dtype=np.int64)
+            index.index.name = "id"
+        return index
+
+    @property
+    def _index_path(self):
+        return self.path / "index.pkl"
+
+    def _column_path(self, col: str):
+        return self.path / f"{col}.bin"
+
+    def __contains__(self, activity_id) -> bool:
+        return activity_id in self.index.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def ids(self) -> list[int]:
+        return self.index.index.tolist()
+
+    def append(self, activity_id: int, streams: dict):
+        self.append_many({activity_id: streams})
+
+    def append_many(self, items: dict[int, dict]):
+        """
+        Store streams of many activities, keyed by activity id.
+
+        An activity without streams (e.g. a manual entry) is stored with empty
+        columns, so it is not fetched again.
+        """
+        if not items:
+            return
+
+        with file_lock(self.path / "streams.lock"):
+            # other writers may have appended since this instance loaded
+            self.index = self._load_index()
+            rows = {}
+            handles = {
+                col: open(self._column_path(col), "ab") for col in STREAM_COLUMNS
+            }
+            try:
+                for activity_id, streams in items.items():
+                    columns = _split_latlng(streams)
+                    row = {}
+                    for col, dtype in STREAM_COLUMNS.items():
+                        values = np.asarray(columns.get(col, []), dtype=dtype)
+                        handle = handles[col]  # at the end, no one else appends
+                        row[f"{col}_offset"] = handle.tell() // np.dtype(dtype).itemsize
+                        row[f"{col}_length"] = len(values)
+                        handle.write(values.tobytes())
+                    rows[activity_id] = row
+            finally:
+                for handle in handles.values():
+                    handle.close()
+
+            new_rows = pd.DataFrame.from_dict(rows, orient="index", dtype=np.int64)
+            index = self.index.drop(index=new_rows.index, errors="ignore")
+            self.index = pd.concat([index, new_rows]).rename_axis("id")
+            save_pickle(self.index, self._index_path)
+            self._maps.clear()  # files grew, memory maps must be reopened
+
+    def _column(self, col: str) -> np.ndarray:
+        column = self._maps.get(col)
+        if column is None:
+            path = self._column_path(col)
+            if not path.exists() or path.stat().st_size == 0:
+                return np.empty(0, dtype=STREAM_COLUMNS[col])
+            column = np.memmap(path, dtype=STREAM_COLUMNS[col], mode="r")
+            self._maps[col] = column
+        return column
+
+    def read(self, activity_id: int, columns=None) -> dict[str, np.ndarray]:
+        """
+        Streams of one activity as read-only memory-mapped views.
+
+        Columns the activity has no samples for are omitted.
+        """
+        row = self.index.loc[activity_id]
+        streams = {}
+        for col in columns or STREAM_COLUMNS:
+            length = row[f"{col}_length"]
+            if length:
+                offset = row[f"{col}_offset"]
+                streams[col] = self._column(col)[offset : offset + length]
+        return streams
+
+    def iter_streams(self, activity_ids=None, columns=None):
+        """Yield (activity_id, streams) for stored activities."""
+        for activity_id in self.ids() if activity_ids is None else activity_ids:
+            if activity_id in self:
+                yield activity_id, self.read(activity_id, columns)
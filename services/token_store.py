@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import secrets
+import time
+
+from services.storage import DATA_DIR, athlete_dir, temp_path
+
+TOKEN_FIELDS = ("access_token", "refresh_token", "expires_at")
+# session keys sit in the page URL (history, shared links, Referer): each
+# one logs in once, and only shortly after it was issued
+SESSION_TTL_S = int(os.getenv("STRAVA_SESSION_TTL_S", "3600"))
+
+
+class TokenStore:
+    """
+    OAuth tokens of one athlete, persisted next to their activities.
+
+    The dashboard saves tokens on every login and refresh, so processes
+    without a Streamlit session (e.g. the webhook worker) can call the API
+    on the athlete's behalf. The file is only readable by its owner.
+    """
+
+    def __init__(self, athlete_id: int):
+        self.athlete_id = athlete_id
+        self.path = athlete_dir(athlete_id) / "tokens.json"
+
+    def get(self) -> dict | None:
+        if not self.path.exists():
+            return None
+        return json.loads(self.path.read_text())
+
+    def save(self, tokens: dict):
+        tmp_path = temp_path(self.path)
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as fileobj:
+            json.dump({key: tokens[key] for key in TOKEN_FIELDS}, fileobj)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        self.path.unlink(missing_ok=True)
+
+
+def _session_path(key: str):
+    # only a hash of the key is stored, the folder does not reveal live keys
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return DATA_DIR / "sessions" / digest
+
+
+def create_session(athlete_id: int) -> str:
+    """
+    Opaque key that resumes the athlete's login in a new Streamlit session.
+
+    The key is kept in the page URL, so a reload (which resets the session
+    state) finds the tokens again without another OAuth round trip. Keys are
+    single use, see `resume_session`, and expire `SESSION_TTL_S` after their
+    creation.
+    """
+    prune_sessions()
+    key = secrets.token_urlsafe(24)
+    path = _session_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"athlete_id": athlete_id, "created_at": time.time()}))
+    return key
+
+
+def resume_session(key: str) -> int | None:
+    """
+    Athlete logged in with `key`, None if it is unknown, expired, ended or
+    already used. The key is consumed: the caller issues a new one.
+    """
+    path = _session_path(key)
+    claimed = temp_path(path)
+    try:
+        # only one of concurrent resumes of the key can move the file
+        os.replace(path, claimed)
+    except FileNotFoundError:
+        return None
+    try:
+        session = json.loads(claimed.read_text())
+        created_at = claimed.stat().st_mtime
+    finally:
+        claimed.unlink(missing_ok=True)
+    if not isinstance(session, dict):  # written before keys expired
+        session = {"athlete_id": session, "created_at": created_at}
+    if time.time() - session["created_at"] > SESSION_TTL_S:
+        return None
+    return session["athlete_id"]
+
+
+def end_session(key: str):
+    _session_path(key).unlink(missing_ok=True)
+
+
+def prune_sessions():
+    """Delete expired session keys, files are never rewritten after creation."""
+    expired = time.time() - SESSION_TTL_S
+    for path in (DATA_DIR / "sessions").glob("*"):
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink()
+        except FileNotFoundError:  # pruned by another session meanwhile
+            pass
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from services.activity_store import ActivityStore
+from services.cache import memory_cache
+from services.dedup import deduplicate
+from services.storage import athlete_dir, load_pickle, save_pickle
+
+FITNESS_DAYS = 42  # chronic training load (CTL)
+FATIGUE_DAYS = 7  # acute training load (ATL)
+
+# load of one hour at moderate effort, used without heart rate or power data
+LOAD_PER_HOUR = {
+    "Foot sports": 60,
+    "Cycle sports": 50,
+    "Water sports": 60,
+    "Winter sports": 50,
+    "Other": 40,
+}
+
+LTHR_SHARE_OF_MAX_HR = 0.9
+
+
+def activity_load(
+    df: pd.DataFrame, ftp: float | None = None, max_hr: float | None = None
+) -> pd.Series:
+    """
+    Training load score of every activity.
+
+    Uses power relative to FTP when available, then heart rate relative to the
+    threshold heart rate, and falls back to moving time weighted by sport.
+    A one hour effort at threshold scores 100.
+    """
+    hours = df["moving_time"] / 3600
+    load = hours * df["sport_category"].astype(str).map(LOAD_PER_HOUR).fillna(40)
+
+    if max_hr:
+        intensity = df["average_heartrate"] / (max_hr * LTHR_SHARE_OF_MAX_HR)
+        load = (hours * intensity**2 * 100).fillna(load)
+
+    if ftp:
+        intensity = df["average_watts"] / ftp
+        load = (hours * intensity**2 * 100).fillna(load)
+
+    return load
+
+
+def daily_load(df: pd.DataFrame, load: pd.Series, end=None) -> pd.Series:
+    """Load per day, gap-filled with zeros from the first activity to `end`."""
+    return _fill_days(
+        load.groupby(pd.to_datetime(df["start_date"]).to_numpy()).sum(), end
+    )
+
+
+def _fill_days(daily: pd.Series, end=None) -> pd.Series:
+    end = max(pd.Timestamp(end or daily.index.max()), daily.index.max())
+    days = pd.date_range(daily.index.min(), end, freq="D")
+    return daily.reindex(days, fill_value=0.0).rename("load")
+
+
+def _smooth(loads: pd.Series, days: int, seed: float | None = None) -> pd.Series:
+    """Exponentially weighted average, continuing from `seed` if given."""
+    alpha = 1 / days
+    if seed is None:
+        return loads.ewm(alpha=alpha, adjust=False).mean()
+
+    # with adjust=False the first value is taken as is: prepend the state
+    seeded = pd.concat([pd.Series([seed]), loads], ignore_index=True)
+    smoothed = seeded.ewm(alpha=alpha, adjust=False).mean().iloc[1:]
+    return smoothed.set_axis(loads.index)
+
+
+def _training_load(loads: pd.Series, state: pd.Series | None = None) -> pd.DataFrame:
+    result = loads.to_frame("load")
+    result["fitness"] = _smooth(
+        loads, FITNESS_DAYS, None if state is None else state["fitness"]
+    )
+    result["fatigue"] = _smooth(
+        loads, FATIGUE_DAYS, None if state is None else state["fatigue"]
+    )
+    result["form"] = result["fitness"] - result["fatigue"]
+    result["acwr"] = (result["fatigue"] / result["fitness"]).replace(np.inf, np.nan)
+    return result
+
+
+def update_training_load(
+    loads: pd.Series, previous: pd.DataFrame | None = None
+) -> pd.DataFrame:
+    """
+    Fitness (CTL), fatigue (ATL), form (TSB) and acute:chronic workload ratio.
+
+    When a previous result is given, only the days from the first changed
+    daily load onwards are recomputed, starting from the stored state of the
+    day before. Appending activities therefore only updates the tail.
+    """
+    if previous is None or previous.empty or loads.index[0] != previous.index[0]:
+        return _training_load(loads)
+
+    known = previous["load"].reindex(loads.index)
+    changed = loads.index[known.isna() | ~np.isclose(known, loads)]
+    if changed.empty:
+        return previous.loc[loads.index]
+
+    first = changed[0]
+    if first == loads.index[0]:
+        return _training_load(loads)
+
+    state = previous.loc[first - pd.Timedelta(days=1)]
+    tail = _training_load(loads[first:], state)
+    return pd.concat([previous.loc[: first - pd.Timedelta(days=1)], tail])
+
+
+def _year_loads(store: ActivityStore, year: int, ftp, max_hr) -> pd.Series:
+    """Load per day of one stored year, days without activities omitted."""
+    df = store.load(year)
+    if df is None or df.empty:
+        return pd.Series(dtype=float)
+    df = deduplicate(df)
+    load = activity_load(df, ftp=ftp, max_hr=max_hr)
+    return load.groupby(pd.to_datetime(df["start_date"]).to_numpy()).sum()
+
+
+def get_training_load(athlete_id: int, version: int, ftp=None, max_hr=None):
+    """
+    Training load over the athlete's whole stored history, up to today.
+
+    Daily loads are persisted per year with the version of the year's file,
+    so only years whose activities changed are loaded and scored again, and
+    only the days from the first changed one are recomputed (see
+    `update_training_load`). `version` changes whenever stored activities do.
+    """
+    end = pd.Timestamp.today().normalize()
+    return _get_training_load(athlete_id, version, ftp, max_hr, end)
+
+
+@memory_cache("training_load", athlete_arg="athlete_id")
+def _get_training_load(athlete_id: int, version: int, ftp, max_hr, end):
+    store = ActivityStore(athlete_id)
+    # one file per athlete, for the FTP and max heart rate last used
+    path = athlete_dir(athlete_id) / "training_load.pkl"
+    stored = load_pickle(path)
+    if stored is None or stored["settings"] != (ftp, max_hr):
+        stored = {"settings": (ftp, max_hr), "years": {}, "result": None}
+
+    years = {}
+    for year in store.years():
+        year_version = store.year_version(year)
+        known = stored["years"].get(year)
+        if known is not None and known[0] == year_version:
+            years[year] = known
+        else:
+            years[year] = (year_version, _year_loads(store, year, ftp, max_hr))
+
+    daily = [loads for _, loads in years.values() if not loads.empty]
+    if not daily:
+        return pd.DataFrame()
+
+    loads = _fill_days(pd.concat(daily).sort_index(), end=end)
+    result = update_training_load(loads, stored["result"])
+    save_pickle({"settings": (ftp, max_hr), "years": years, "result": result}, path)
+    # earlier versions wrote one file per FTP and max heart rate
+    for old_path in athlete_dir(athlete_id).glob("training_load_*.pkl"):
+        old_path.unlink(missing_ok=True)
+    return result
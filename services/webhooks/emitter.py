@@ -0,0 +1,103 @@
+"""
+Local stand-in for Strava's push service, to try the webhook receiver.
+
+Usage:
+    python -m services.webhooks.emitter handshake
+    python -m services.webhooks.emitter create --owner 123 --id 456
+    python -m services.webhooks.emitter update --owner 123 --id 456 --title Ride
+    python -m services.webhooks.emitter delete --owner 123 --id 456
+    python -m services.webhooks.emitter deauthorize --owner 123
+"""
+
+import argparse
+import os
+import secrets
+import time
+
+import requests
+
+from services.webhooks.server import WEBHOOK_PORT
+
+# the receiver only accepts events of its subscription
+SUBSCRIPTION_ID = int(os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID", "1"))
+
+
+def activity_event(aspect_type: str, owner_id: int, activity_id: int, **updates):
+    """Event posted by Strava when an activity changes."""
+    return {
+        "aspect_type": aspect_type,
+        "event_time": int(time.time()),
+        "object_id": activity_id,
+        "object_type": "activity",
+        "owner_id": owner_id,
+        "subscription_id": SUBSCRIPTION_ID,
+        "updates": updates,
+    }
+
+
+def deauthorize_event(owner_id: int):
+    """Event posted by Strava when an athlete revokes access to the app."""
+    return {
+        "aspect_type": "update",
+        "event_time": int(time.time()),
+        "object_id": owner_id,
+        "object_type": "athlete",
+        "owner_id": owner_id,
+        "subscription_id": SUBSCRIPTION_ID,
+        "updates": {"authorized": "false"},
+    }
+
+
+def handshake(url: str, verify_token: str) -> bool:
+    """Validate the callback like Strava does when a subscription is created."""
+    challenge = secrets.token_hex(8)
+    response = requests.get(
+        url,
+        params={
+            "hub.mode": "subscribe",
+            "hub.verify_token": verify_token,
+            "hub.challenge": challenge,
+        },
+        timeout=2,
+    )
+    return response.ok and response.json().get("hub.challenge") == challenge
+
+
+def emit(url: str, event: dict):
+    # Strava gives up on a callback that does not answer within 2 seconds
+    response = requests.post(url, json=event, timeout=2)
+    response.raise_for_status()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emit Strava-like push events")
+    parser.add_argument(
+        "event", choices=["handshake", "create", "update", "delete", "deauthorize"]
+    )
+    parser.add_argument("--url", default=f"http://localhost:{WEBHOOK_PORT}/webhook")
+    parser.add_argument("--owner", type=int, help="athlete id")
+    parser.add_argument("--id", type=int, help="activity id")
+    parser.add_argument("--title", default=None, help="updated activity title")
+    args = parser.parse_args()
+
+    if args.event == "handshake":
+        verify_token = os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN", "")
+        print("ok" if handshake(args.url, verify_token) else "rejected")
+        return
+
+    if args.owner is None:
+        parser.error("--owner is required")
+    if args.event == "deauthorize":
+        event = deauthorize_event(args.owner)
+    else:
+        if args.id is None:
+            parser.error("--id is required")
+        updates = {"title": args.title} if args.title else {}
+        event = activity_event(args.event, args.owner, args.id, **updates)
+
+    emit(args.url, event)
+    print(f"Sent {args.event} event")
+
+
+if __name__ == "__main__":
+    main()
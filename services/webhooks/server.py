@@ -0,0 +1,348 @@
+"""
+Receiver for Strava push subscription events.
+
+Strava posts an event whenever an activity is created, edited or deleted, or
+an athlete revokes access. Events are answered at once and queued, workers
+then fetch only the changed activity and apply it to the athlete's store, so
+the dashboard stays fresh without re-downloading whole years.
+
+Usage:
+    python -m services.webhooks.server [--port 8090] [--callback-url URL]
+
+`STRAVA_WEBHOOK_VERIFY_TOKEN` must be set, it is echoed by Strava when the
+subscription is created. Try it locally with `services.webhooks.emitter`.
+
+The callback is public and events are not signed, so none is trusted as is:
+only events of the app's subscription are accepted (its id is saved when
+`--callback-url` creates it, or set in `STRAVA_WEBHOOK_SUBSCRIPTION_ID`),
+deletions are applied only once Strava answers 404 for the activity, and a
+deauthorization only once the athlete's token refresh is rejected.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import pandas as pd
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+
+from services.activity_store import ActivityStore
+from services.data_processing import process_activities_data
+from services.storage import DATA_DIR, delete_athlete_data
+from services.strava_api.async_client import AsyncStravaClient
+from services.strava_api.constants import BASE_URL, REQUEST_TIMEOUT_S
+from services.token_store import TokenStore
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_PORT = int(os.getenv("STRAVA_WEBHOOK_PORT", "8090"))
+WEBHOOK_WORKERS = 4
+COALESCE_DELAY_S = 2.0  # Strava sends edits in bursts, wait for the last one
+EVENT_FIELDS = (
+    "object_type",
+    "object_id",
+    "aspect_type",
+    "owner_id",
+    "subscription_id",
+)
+SUBSCRIPTION_PATH = DATA_DIR / "webhook_subscription.json"
+
+
+def subscription_id() -> int | None:
+    """Id of the app's push subscription, None if it is not known."""
+    if os.getenv("STRAVA_WEBHOOK_SUBSCRIPTION_ID"):
+        return int(os.environ["STRAVA_WEBHOOK_SUBSCRIPTION_ID"])
+    if SUBSCRIPTION_PATH.exists():
+        return json.loads(SUBSCRIPTION_PATH.read_text())["id"]
+    return None
+
+
+class EventQueue:
+    """
+    Pending events, at most one per object.
+
+    Strava often sends several updates for one activity in a row (title, then
+    gear, then privacy...). Events are coalesced by (object_type, owner_id,
+    object_id): an object is only handed out `delay` seconds after its first
+    event, then fetched once with the latest aspect. An object being processed
+    is not handed to a second worker, its new events wait until the first one
+    is done, so changes are applied in order.
+    """
+
+    def __init__(self, delay: float = COALESCE_DELAY_S):
+        self.delay = delay
+        self._queue = asyncio.Queue()
+        self._pending = {}
+        self._active = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def key(event: dict) -> tuple:
+        return event["object_type"], event["owner_id"], event["object_id"]
+
+    def put(self, event: dict):
+        key = self.key(event)
+        previous = self._pending.get(key)
+        if previous is not None:
+            updates = {**previous.get("updates", {}), **event.get("updates", {})}
+            event = {**event, "updates": updates}
+        elif key not in self._active:
+            self._schedule(key)
+        self._pending[key] = event
+
+    def _schedule(self, key: tuple):
+        asyncio.get_running_loop().call_later(self.delay, self._queue.put_nowait, key)
+
+    async def get(self) -> dict:
+        key = await self._queue.get()
+        self._active.add(key)
+        return self._pending.pop(key)
+
+    def done(self, event: dict):
+        key = self.key(event)
+        self._active.discard(key)
+        if key in self._pending:
+            self._schedule(key)
+        self._queue.task_done()
+
+
+class EventWorker:
+    """
+    Applies queued events to the stores, one API client per athlete.
+
+    Store and token files are read and written on a thread pool: the store
+    lock may be held by a dashboard session, and the event loop must stay
+    free to answer Strava within its 2 seconds.
+    """
+
+    def __init__(
+        self, queue: EventQueue, base_url: str = BASE_URL, workers=WEBHOOK_WORKERS
+    ):
+        self.queue = queue
+        self.base_url = base_url
+        self._clients = {}
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="webhook")
+
+    async def _blocking(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+    async def _client(self, athlete_id: int) -> AsyncStravaClient | None:
+        tokens = await self._blocking(TokenStore(athlete_id).get)
+        if tokens is None:
+            self._clients.pop(athlete_id, None)
+            return None
+
+        client = self._clients.get(athlete_id)
+        if client is None:
+            client = AsyncStravaClient(**tokens, base_url=self.base_url)
+            self._clients[athlete_id] = client
+        elif tokens["expires_at"] > (client.expires_at or 0):
+            # refreshed by the dashboard meanwhile
+            client.access_token = tokens["access_token"]
+            client.refresh_token = tokens["refresh_token"]
+            client.expires_at = tokens["expires_at"]
+        return client
+
+    def close(self):
+        for client in self._clients.values():
+            client.close()
+        self._executor.shutdown(wait=False)
+
+    async def run(self):
+        while True:
+            event = await self.queue.get()
+            try:
+                await self.apply(event)
+            except Exception:
+                logger.exception("Failed to apply event %s", event)
+            finally:
+                self.queue.done(event)
+
+    async def apply(self, event: dict):
+        athlete_id = event["owner_id"]
+        if event["object_type"] == "athlete":
+            if event.get("updates", {}).get("authorized") == "false":
+                await self._deauthorize(athlete_id)
+            return
+
+        client = await self._client(athlete_id)
+        if client is None:
+            logger.warning("No tokens for athlete %s, event skipped", athlete_id)
+            return
+
+        # deletions too: only Strava's answer is trusted, not the event
+        activity_id = event["object_id"]
+        expires_at = client.expires_at
+        activity = await client.get_activity(activity_id)
+        if client.expires_at != expires_at:
+            await self._save_tokens(athlete_id, client)
+
+        await self._blocking(self._store_activity, athlete_id, activity_id, activity)
+
+    async def _deauthorize(self, athlete_id: int):
+        """Delete the athlete's data once Strava rejects their refresh token."""
+        client = await self._client(athlete_id)
+        if client is None:
+            logger.warning("No tokens for athlete %s, event skipped", athlete_id)
+            return
+
+        try:
+            await client.refresh_access_token()
+        except HTTPClientError as error:
+            if error.code not in (400, 401, 403):
+                raise
+        else:
+            await self._save_tokens(athlete_id, client)
+            logger.warning("Athlete %s is still authorized, event ignored", athlete_id)
+            return
+
+        self._clients.pop(athlete_id, None)
+        await self._blocking(delete_athlete_data, athlete_id)
+        logger.info("Athlete %s deauthorized, data deleted", athlete_id)
+
+    async def _save_tokens(self, athlete_id: int, client: AsyncStravaClient):
+        tokens = {
+            "access_token": client.access_token,
+            "refresh_token": client.refresh_token,
+            "expires_at": client.expires_at,
+        }
+        await self._blocking(TokenStore(athlete_id).save, tokens)
+
+    @classmethod
+    def _store_activity(cls, athlete_id: int, activity_id: int, activity):
+        """Apply Strava's answer for one activity, None if it is gone."""
+        store = ActivityStore(athlete_id)
+        with store.lock:
+            if activity is None:  # deleted or made private
+                cls._delete(store, activity_id)
+            else:
+                df = process_activities_data(pd.DataFrame([activity]))
+                year = int(df["year"].iloc[0])
+                # an edited start date can move the activity to another year
+                cls._delete(store, activity_id, keep_year=year)
+                store.upsert(year, df)
+        store.mark_pushed()
+
+    @staticmethod
+    def _delete(store: ActivityStore, activity_id: int, keep_year=None):
+        for year in store.years():
+            if year != keep_year:
+                store.delete(year, [activity_id])
+
+
+class WebhookHandler(tornado.web.RequestHandler):
+    def initialize(self, queue: EventQueue, verify_token: str):
+        self.queue = queue
+        self.verify_token = verify_token
+
+    def get(self):
+        """Subscription validation: echo the challenge if the token matches."""
+        mode = self.get_query_argument("hub.mode", None)
+        token = self.get_query_argument("hub.verify_token", None)
+        if mode != "subscribe" or token != self.verify_token:
+            raise tornado.web.HTTPError(403)
+        self.write({"hub.challenge": self.get_query_argument("hub.challenge")})
+
+    def post(self):
+        # Strava expects an answer within 2 seconds, the work is queued
+        try:
+            event = json.loads(self.request.body)
+            if not all(field in event for field in EVENT_FIELDS):
+                raise ValueError("missing event fields")
+        except ValueError:
+            raise tornado.web.HTTPError(400)
+        expected = self.settings.get("subscription_id")
+        if expected is None or event["subscription_id"] != expected:
+            raise tornado.web.HTTPError(403)
+        self.queue.put(event)
+        self.set_status(200)
+
+
+def make_app(
+    queue: EventQueue, verify_token: str, subscription: int | None = None
+) -> tornado.web.Application:
+    """Receiver app, accepting events of the `subscription` id only."""
+    return tornado.web.Application(
+        [
+            (
+                r"/webhook",
+                WebhookHandler,
+                {"queue": queue, "verify_token": verify_token},
+            )
+        ],
+        subscription_id=subscription,
+    )
+
+
+async def create_subscription(callback_url: str, verify_token: str) -> dict:
+    """Register `callback_url` with Strava, the server must already listen."""
+    body = urlencode(
+        {
+            "client_id": os.getenv("STRAVA_CLIENT_ID"),
+            "client_secret": os.getenv("STRAVA_CLIENT_SECRET"),
+            "callback_url": callback_url,
+            "verify_token": verify_token,
+        }
+    )
+    response = await AsyncHTTPClient().fetch(
+        HTTPRequest(
+            f"{BASE_URL}/push_subscriptions",
+            method="POST",
+            body=body,
+            request_timeout=REQUEST_TIMEOUT_S,
+        )
+    )
+    subscription = json.loads(response.body)
+    SUBSCRIPTION_PATH.parent.mkdir(parents=True, exist_ok=True)
+    SUBSCRIPTION_PATH.write_text(json.dumps({"id": subscription["id"]}))
+    return subscription
+
+
+async def serve(port: int, workers: int, callback_url: str | None = None):
+    verify_token = os.getenv("STRAVA_WEBHOOK_VERIFY_TOKEN")
+    if not verify_token:
+        raise RuntimeError("STRAVA_WEBHOOK_VERIFY_TOKEN is not set")
+
+    queue = EventQueue()
+    app = make_app(queue, verify_token, subscription_id())
+    app.listen(port)
+    logger.info("Listening for Strava events on port %s", port)
+
+    if callback_url:
+        subscription = await create_subscription(callback_url, verify_token)
+        app.settings["subscription_id"] = subscription["id"]
+        logger.info("Subscribed, id %s", subscription["id"])
+    elif app.settings["subscription_id"] is None:
+        logger.warning("No subscription id known, all events are rejected")
+
+    worker = EventWorker(queue, workers=workers)
+    try:
+        await asyncio.gather(*(worker.run() for _ in range(workers)))
+    finally:
+        worker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive Strava push events")
+    parser.add_argument("--port", type=int, default=WEBHOOK_PORT)
+    parser.add_argument("--workers", type=int, default=WEBHOOK_WORKERS)
+    parser.add_argument(
+        "--callback-url", default=None, help="create the Strava subscription"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.port, args.workers, args.callback_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from services.storage import athlete_dir, load_pickle, save_pickle
+from services.streams import StreamStore
+
+# per-activity time histograms at fine resolution: any zone thresholds are
+# applied by re-binning these, without touching the streams again
+FINE_BINS = {
+    "heartrate": {"width": 1, "count": 251},  # 0-250 bpm
+    "watts": {"width": 5, "count": 501},  # 0-2500 W
+}
+
+HR_ZONES = {  # share of max heart rate
+    "Z1 Recovery": 0.0,
+    "Z2 Endurance": 0.6,
+    "Z3 Tempo": 0.7,
+    "Z4 Threshold": 0.8,
+    "Z5 Maximum": 0.9,
+}
+
+POWER_ZONES = {  # share of FTP
+    "Z1 Active Recovery": 0.0,
+    "Z2 Endurance": 0.55,
+    "Z3 Tempo": 0.75,
+    "Z4 Threshold": 0.9,
+    "Z5 VO2max": 1.05,
+    "Z6 Anaerobic": 1.2,
+}
+
+ZONES_CHUNK_SIZE = 200
+MAX_SAMPLE_GAP_S = 30  # longer gaps are pauses, not time spent in a zone
+
+
+def fine_histograms(stream_store: StreamStore, activity_ids, stream: str):
+    """
+    Seconds spent in each fine bin of a stream, one row per activity.
+
+    Activities are processed in chunks: samples of a chunk are concatenated
+    and counted with a single weighted `np.bincount`, so memory use is bounded
+    by the chunk size and not by the length of the history.
+    """
+    width, n_bins = FINE_BINS[stream]["width"], FINE_BINS[stream]["count"]
+    activity_ids = list(activity_ids)
+    histograms = np.zeros((len(activity_ids), n_bins), dtype=np.float32)
+
+    for start in range(0, len(activity_ids), ZONES_CHUNK_SIZE):
+        chunk = activity_ids[start : start + ZONES_CHUNK_SIZE]
+        rows, bins, weights = [], [], []
+        for row, activity_id in enumerate(chunk):
+            if activity_id not in stream_store:
+                continue
+            streams = stream_store.read(activity_id, ["time", stream])
+            if stream not in streams or "time" not in streams:
+                continue
+            dt = np.diff(streams["time"], append=streams["time"][-1])
+            dt = np.where(dt > MAX_SAMPLE_GAP_S, 0, dt)
+            # dropouts are no reading, not 0 bpm or 0 W
+            recorded = ~np.isnan(streams[stream])
+            values, dt = streams[stream][recorded], dt[recorded]
+
+            rows.append(np.full(len(values), row))
+            bins.append(np.clip(values // width, 0, n_bins - 1).astype(np.int64))
+            weights.append(dt)
+
+        if not rows:
+            continue
+
+        flat = np.concatenate(rows) * n_bins + np.concatenate(bins)
+        counts = np.bincount(
+            flat, weights=np.concatenate(weights), minlength=len(chunk) * n_bins
+        )
+        histograms[start : start + len(chunk)] = counts.reshape(len(chunk), n_bins)
+
+    return pd.DataFrame(histograms, index=pd.Index(activity_ids, name="id"))
+
+
+def update_zone_histograms(athlete_id: int, activity_ids, stream: str):
+    """
+    Fine histograms of activities with `stream` data, cached per activity.
+
+    Activities without it are cached as empty rows, so their streams are not
+    read again, but are left out of the result.
+    """
+    # v2: caches before it counted dropouts as Z1
+    path = athlete_dir(athlete_id) / f"zones_{stream}_v2.pkl"
+    cached = load_pickle(path)
+
+    stream_store = StreamStore(athlete_id)
+    stored = set(stream_store.ids())
+    known = set() if cached is None else set(cached.index)
+    todo = [i for i in activity_ids if i in stored and i not in known]
+
+    if todo:
+        new = fine_histograms(stream_store, todo, stream)
+        cached = new if cached is None else pd.concat([cached, new])
+        save_pickle(cached, path)
+
+    if cached is None:
+        return pd.DataFrame()
+    selected = cached[cached.index.isin(activity_ids)]
+    return selected[selected.sum(axis=1) > 0]
+
+
+def zone_thresholds(zones: dict, reference: float) -> dict[str, float]:
+    """Lower bound of each zone for a max heart rate or FTP."""
+    return {name: share * reference for name, share in zones.items()}
+
+
+def time_in_zones(histograms: pd.DataFrame, stream: str, thresholds: dict):
+    """
+    Re-bin fine histograms into zones.
+
+    Returns:
+        pd.DataFrame: seconds per zone (columns), one row per activity.
+    """
+    width = FINE_BINS[stream]["width"]
+    bin_edges = np.arange(histograms.shape[1]) * width
+    zone_of_bin = np.digitize(bin_edges, list(thresholds.values())[1:])
+
+    zones = np.zeros((histograms.shape[1], len(thresholds)), dtype=np.float32)
+    zones[np.arange(histograms.shape[1]), zone_of_bin] = 1
+
+    return pd.DataFrame(
+        histograms.to_numpy() @ zones,
+        index=histograms.index,
+        columns=list(thresholds),
+    )
+
+
+def process_zones_data(
+    df: pd.DataFrame, seconds_in_zones: pd.DataFrame, freq: str = "month"
+) -> pd.DataFrame:
+    """
+    Hours per zone and time bucket, in long format.
+
+    Args:
+        df (pd.DataFrame): processed activities.
+        seconds_in_zones (pd.DataFrame): result of `time_in_zones`.
+        freq (str): "week", "month" or "year".
+
+    Returns:
+        pd.DataFrame: columns period, zone, hours.
+    """
+    periods = df.set_index("id")[freq].rename("period")
+    hours = seconds_in_zones.join(periods, how="inner")
+    hours = hours.groupby("period").sum() / 3600
+
+    long = hours.reset_index().melt(
+        id_vars="period", var_name="zone", value_name="hours"
+    )
+    long["hours"] = long["hours"].round(1)
+    return long
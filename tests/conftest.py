@@ -0,0 +1,23 @@
+import pandas as pd
+import pytest
+
+from benchmarks.strava_stub import generate_activities
+from services import storage
+from services.cache import get_cache
+from services.data_processing import process_activities_data
+
+ATHLETE_ID = 4242
+YEAR = 2023
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Every test stores its athletes in a folder of its own."""
+    monkeypatch.setattr(storage, "DATA_DIR", tmp_path)
+    yield tmp_path
+    get_cache().invalidate(athlete_id=ATHLETE_ID)
+
+
+def activities(count: int, year: int = YEAR, seed: int = ATHLETE_ID) -> pd.DataFrame:
+    """Processed activities as `sync_activities` stores them."""
+    return process_activities_data(pd.DataFrame(generate_activities(seed, year, count)))
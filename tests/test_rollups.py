@@ -0,0 +1,152 @@
+"""
+Stored rollups against the raw rows they summarize.
+
+Rollups are maintained with deltas by every store change and corrected for
+duplicates at load. After each change, every chart built from them must
+equal the chart built from the deduplicated rows of the year.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.activity_store import ActivityStore
+from services.aggregates import SUM_COLUMNS, SportAggregates, build_sport_aggregates
+from services.charts_data import (
+    process_data_histogram,
+    process_heatmap_day_month,
+    process_time_data,
+)
+from services.dedup import deduplicate
+from services.strava_api.client import load_rollups
+from tests.conftest import ATHLETE_ID, YEAR, activities
+
+FREQS = ("month", "week", "day_name", "weekend", "daypart")
+HISTOGRAM_BINS = (0, 5, 10, 21, 42, 100, 1000)
+
+
+def assert_matches_rows(store: ActivityStore, year: int = YEAR):
+    df = deduplicate(store.load(year))
+    rollups = load_rollups(store.athlete_id)
+
+    # the tables themselves, before charts round them
+    for period, col in (("monthly", "month"), ("weekly", "week")):
+        grouped = df.assign(sport_type=df["sport_type"].astype(object)).groupby(
+            ["sport_type", col]
+        )
+        expected = grouped[SUM_COLUMNS].sum()
+        expected["count"] = grouped.size()
+        actual = rollups.totals(period, year)
+        actual = actual[actual["count"] > 0].sort_index()
+        pd.testing.assert_frame_equal(
+            actual, expected.sort_index(), check_dtype=False, check_names=False
+        )
+
+    aggregates = SportAggregates(df, rollups)
+    for freq in FREQS:
+        for col in (None, "distance_km", "moving_time_h", "elevation_gain_m"):
+            agg = "count" if col is None else "sum"
+            pd.testing.assert_frame_equal(
+                process_time_data(df, freq, col, agg, aggregates=aggregates),
+                process_time_data(df, freq, col, agg),
+                check_dtype=False,
+            )
+    pd.testing.assert_frame_equal(
+        process_heatmap_day_month(df, aggregates), process_heatmap_day_month(df)
+    )
+    # bins come back as intervals or as categories of them, compare counts
+    histogram = process_data_histogram(
+        df, "distance_km", HISTOGRAM_BINS, aggregates=aggregates
+    )
+    expected = process_data_histogram(df, "distance_km", HISTOGRAM_BINS)
+    assert histogram["label"].tolist() == expected["label"].tolist()
+    assert histogram["count"].tolist() == expected["count"].tolist()
+
+
+def edited(df: pd.DataFrame, ids) -> pd.DataFrame:
+    """Rows of `ids`, longer and moved to another day, as an edit would."""
+    rows = df[df["id"].isin(ids)].copy()
+    for col in ("distance_km", "moving_time", "moving_time_h"):
+        rows[col] = rows[col] * 1.5
+    rows["start_datetime_local"] += pd.Timedelta(days=3)
+    rows["start_date"] = rows["start_datetime_local"].dt.date
+    rows["month"] = rows["start_datetime_local"].dt.month
+    rows["week"] = rows["start_datetime_local"].dt.isocalendar().week.astype(int)
+    rows["day_name"] = rows["start_datetime_local"].dt.day_name()
+    return rows.reset_index(drop=True)
+
+
+@pytest.fixture
+def store():
+    store = ActivityStore(ATHLETE_ID)
+    store.upsert(YEAR, activities(120))
+    return store
+
+
+def test_upsert(store):
+    assert_matches_rows(store)
+
+    stored = store.load(YEAR)
+    store.upsert(YEAR, edited(stored, stored["id"].iloc[:10]))
+    assert_matches_rows(store)
+
+    store.upsert(YEAR, activities(30, seed=ATHLETE_ID + 1))
+    assert_matches_rows(store)
+
+
+def test_delete(store):
+    stored = store.load(YEAR)
+    store.delete(YEAR, stored["id"].iloc[::3])
+    assert_matches_rows(store)
+
+    store.delete(YEAR, store.load(YEAR)["id"])
+    assert store.rollups().totals("monthly", YEAR).empty
+
+
+def test_replace(store):
+    stored = store.load(YEAR)
+    kept = stored.iloc[20:].reset_index(drop=True)
+    download = pd.concat(
+        [
+            kept[~kept["id"].isin(kept["id"].iloc[:5])],
+            edited(kept, kept["id"].iloc[:5]),
+            activities(10, seed=ATHLETE_ID + 2),
+        ],
+        ignore_index=True,
+    )
+    store.replace(YEAR, download)
+
+    assert set(store.load(YEAR)["id"]) == set(download["id"])
+    assert_matches_rows(store)
+
+
+def test_duplicates_are_counted_once(store):
+    # the same sessions uploaded again by a second device
+    stored = store.load(YEAR)
+    sessions = len(deduplicate(stored))
+    copies = stored.iloc[:15].copy()
+    copies["id"] += 10**6
+    copies["average_heartrate"] = np.nan
+    store.upsert(YEAR, copies)
+
+    assert len(store.load(YEAR)) == len(stored) + len(copies)
+    assert len(deduplicate(store.load(YEAR))) == sessions
+    assert_matches_rows(store)
+
+    store.delete(YEAR, stored["id"].iloc[:5])
+    assert_matches_rows(store)
+
+
+def test_aggregates_cached_apart_with_and_without_rollups(store):
+    df = deduplicate(store.load(YEAR))
+    df.attrs["dataset_id"] = "dataset"
+    rollups = load_rollups(ATHLETE_ID)
+
+    without = build_sport_aggregates(df)
+    with_rollups = build_sport_aggregates(df, rollups)
+    assert without is not with_rollups
+    assert build_sport_aggregates(df) is without
+    assert build_sport_aggregates(df, rollups) is with_rollups
+
+    store.upsert(YEAR, activities(5, seed=ATHLETE_ID + 3))
+    assert build_sport_aggregates(df, load_rollups(ATHLETE_ID)) is not with_rollups